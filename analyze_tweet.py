@@ -1,72 +1,173 @@
-import requests
+"""
+Analyze the URLs in tweets with the URL Safety Sentinel API.
+
+Each tweet goes to ``POST /analyze/tweet``, which extracts every URL on the
+server and scores them in one batched call. All requests share one pooled
+HTTP session, so connections are reused. Typed at a terminal, the tool
+prompts for one tweet at a time. Piped input is read as one tweet per line
+and analyzed ``--workers`` tweets at a time, with results printed in input
+order.
+
+Usage:
+    python analyze_tweet.py
+    python analyze_tweet.py --api http://localhost:8000 < tweets.txt
+    cat tweets.txt | python analyze_tweet.py --workers 16 --json > verdicts.ndjson
+"""
+
+import argparse
 import json
 import sys
-import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Tuple
 
-def extract_urls(tweet_text):
-    """Extract URLs from tweet text."""
-    url_pattern = r'https?://[^\s<>"]+|www\.[^\s<>"]+'
-    return re.findall(url_pattern, tweet_text)
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def analyze_url(url):
-    """Send URL to API for analysis."""
-    try:
-        response = requests.post(
-            "http://localhost:8000/analyze",
-            json={"url": url}
-        )
-        return response.json()
-    except requests.exceptions.ConnectionError:
-        print("ERROR: Unable to connect to the API. Make sure the server is running.")
-        print("Run the server with: uvicorn api.main:app --host 0.0.0.0 --port 8000")
-        sys.exit(1)
+DEFAULT_API = "http://localhost:8000"
 
-def print_analysis(result):
-    """Print the analysis results in a readable format."""
-    print("\n" + "="*50)
-    print(f"URL: {result['url']}")
-    print(f"Status: {result['status'].upper()}")
-    print(f"Risk Score: {result['score']}/100")
-    print(f"Analysis Details: {result['details']}")
-    print("\nFeature Metrics:")
-    
-    for metric in result['featureMetrics']:
-        print(f"  - {metric['name']}: {metric['value']} (Score: {metric['score']}/100)")
-    
-    print("\nAdditional Information:")
-    print(f"  - SSL Status: {'Secure' if result['sslStatus'] else 'Insecure'}")
-    print(f"  - Domain Reputation: {result['domainReputation']}")
-    print(f"  - Is Shortened URL: {'Yes' if result['isShortened'] else 'No'}")
-    print(f"  - Redirections Count: {result['redirectionsCount']}")
-    print("="*50 + "\n")
 
-def main():
+def create_session(workers: int) -> requests.Session:
+    """
+    Session with a connection pool big enough for ``workers`` concurrent requests.
+
+    Requests the server sheds with a 503 while its inference queue is full
+    are retried, honouring its Retry-After header.
+    """
+    retry = Retry(total=3, backoff_factor=0.2, status_forcelist=(503,),
+                  allowed_methods=frozenset(['POST']), respect_retry_after_header=True,
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, workers), max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def analyze_tweet(session: requests.Session, api: str, tweet: str,
+                  include_features: bool = False, timeout: float = 30.0) -> Dict[str, Any]:
+    """Send one tweet's text to the API and return its /analyze/tweet response."""
+    response = session.post(
+        f"{api.rstrip('/')}/analyze/tweet",
+        json={"text": tweet, "include_features": include_features},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def analyze_tweets(session: requests.Session, api: str, tweets: Iterable[str], workers: int,
+                   include_features: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (tweet, response) pairs in input order, with up to ``workers`` requests in flight.
+
+    Tweets are read lazily, so any amount of piped input is handled in
+    bounded memory.
+    """
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for tweet in tweets:
+            in_flight.append((tweet, pool.submit(analyze_tweet, session, api, tweet, include_features)))
+            # Read at most one queued tweet per busy worker ahead of the oldest answer
+            while len(in_flight) > 2 * max(1, workers):
+                tweet, job = in_flight.popleft()
+                yield tweet, job.result()
+        while in_flight:
+            tweet, job = in_flight.popleft()
+            yield tweet, job.result()
+
+
+def print_analysis(item: Dict[str, Any]):
+    """Print one URL's result from an /analyze/tweet response in a readable format."""
     print("\n" + "="*50)
-    print("URL Safety Sentinel - Tweet Analyzer")
+    print(f"URL: {item['url']}")
+    result = item.get('result')
+    if result is None:
+        print(f"Error: {item['error']}")
+        print("="*50)
+        return
+
+    metrics = result['prediction_metrics']
+    print(f"Verdict: {'SAFE' if result['is_safe'] else 'UNSAFE'}")
+    print(f"Malicious Probability: {metrics['malicious_probability']:.1%}")
+    print(f"Confidence Score: {result['confidence_score']:.1%}")
+    print(f"Decided By: {result.get('verdict_source') or 'ensemble'}")
+    print("\nPrediction Metrics:")
+    for name, value in metrics.items():
+        print(f"  - {name}: {value:.4f}")
+
+    if result.get('extracted_features'):
+        importance = result.get('feature_importance') or {}
+        print("\nExtracted Features:")
+        for name, value in result['extracted_features'].items():
+            weight = f" (importance: {importance[name]:.3f})" if name in importance else ""
+            print(f"  - {name}: {value}{weight}")
     print("="*50)
-    
+
+
+def print_tweet(tweet: str, response: Dict[str, Any]):
+    """Print every URL result of one tweet."""
+    if not response['total']:
+        print(f"\nNo URLs found in the tweet: {tweet}")
+        return
+    verdict = {True: 'SAFE', False: 'UNSAFE', None: 'UNKNOWN'}[response['is_safe']]
+    print(f"\nFound {response['total']} URL(s) in the tweet, overall {verdict}: {tweet}")
+    for item in response['results']:
+        print_analysis(item)
+
+
+def prompt_tweets() -> Iterator[str]:
+    """Yield tweets typed at the prompt until 'q' or end of input."""
     while True:
-        # Get user input
         print("\nEnter a tweet to analyze (or 'q' to quit):")
-        tweet = input("> ")
-        
+        try:
+            tweet = input("> ")
+        except EOFError:
+            return
         if tweet.lower() == 'q':
-            break
-        
-        # Extract URLs from the tweet
-        urls = extract_urls(tweet)
-        
-        if not urls:
-            print("No URLs found in the tweet. Please try again.")
-            continue
-        
-        print(f"\nFound {len(urls)} URL(s) in the tweet.")
-        
-        # Analyze each URL
-        for i, url in enumerate(urls, 1):
-            print(f"\nAnalyzing URL {i}/{len(urls)}: {url}")
-            result = analyze_url(url)
-            print_analysis(result)
+            return
+        yield tweet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--api', default=DEFAULT_API, help=f'API base URL (default: {DEFAULT_API})')
+    parser.add_argument('--workers', type=int, default=8, help='tweets analyzed concurrently from piped input')
+    parser.add_argument('--include-features', action='store_true', help='also show the extracted features')
+    parser.add_argument('--json', action='store_true',
+                        help='print one JSON line per tweet with its text and the API response')
+    args = parser.parse_args()
+
+    workers = args.workers if not sys.stdin.isatty() else 1
+    session = create_session(workers)
+    if sys.stdin.isatty():
+        print("\n" + "="*50)
+        print("URL Safety Sentinel - Tweet Analyzer")
+        print("="*50)
+        # One tweet at a time, answered before the next prompt
+        results = ((tweet, analyze_tweet(session, args.api, tweet, args.include_features))
+                   for tweet in prompt_tweets())
+    else:
+        tweets = (line.rstrip('\r\n') for line in sys.stdin if line.strip())
+        results = analyze_tweets(session, args.api, tweets, workers, args.include_features)
+
+    try:
+        for tweet, response in results:
+            if args.json:
+                print(json.dumps({'text': tweet, **response}), flush=True)
+            else:
+                print_tweet(tweet, response)
+    except requests.exceptions.ConnectionError:
+        print("ERROR: Unable to connect to the API. Make sure the server is running.", file=sys.stderr)
+        print("Run the server with: uvicorn api.main:app --host 0.0.0.0 --port 8000", file=sys.stderr)
+        sys.exit(1)
+    except requests.exceptions.HTTPError as e:
+        print(f"ERROR: The API rejected the request: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        session.close()
+
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,118 @@
+"""Coalesce concurrent single-URL requests into batched inference calls."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+class MicroBatcher:
+    """
+    Adaptive micro-batching scheduler in front of the inference executor.
+
+    Callers ``submit`` one URL each and get back that URL's result. Queued
+    URLs are sent to ``score`` together as soon as ``max_size`` of them are
+    waiting or the oldest has waited ``max_wait`` seconds. The window adapts
+    to load:
+
+    - when no batch is in flight the queue is flushed on the next loop
+      iteration, so a lone request only waits for requests that arrived in
+      the same tick
+    - when ``max_concurrency`` batches are already running, URLs keep
+      queueing until one finishes, since dispatching earlier would only
+      park a smaller batch in the executor's queue
+
+    Parameters:
+    -----------
+    score : Callable[[List[str]], Awaitable[List[Any]]]
+        Scores a list of URLs and returns one result per URL, in order. A
+        result that is an exception instance fails only that caller
+    max_size : int
+        Maximum number of URLs per batch
+    max_wait : float
+        Seconds the oldest queued URL waits for more to arrive while a
+        worker is free
+    max_concurrency : int
+        Batches in flight at once, normally the number of inference workers
+    """
+
+    def __init__(self, score: Callable[[List[str]], Awaitable[List[Any]]],
+                 max_size: int = 256, max_wait: float = 0.005, max_concurrency: int = 4):
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1, got {max_size}")
+        self._score = score
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.max_concurrency = max(1, max_concurrency)
+        self.batches = 0
+        self.items = 0
+        self._queue: List[Tuple[str, asyncio.Future]] = []
+        self._in_flight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Set once the oldest queued URL has waited max_wait
+        self._due = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, url: str) -> Any:
+        """Queue ``url`` for the next batch and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((url, future))
+        self._drain()
+        return await future
+
+    def _drain(self):
+        """Dispatch every batch that is ready and a worker is free for."""
+        while (self._queue and self._in_flight < self.max_concurrency
+               and (self._due or len(self._queue) >= self.max_size)):
+            batch = self._queue[:self.max_size]
+            del self._queue[:self.max_size]
+            # Whatever is left arrived after the batch that just left
+            self._due = False
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._in_flight += 1
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        if self._queue and self._timer is None and not self._due:
+            delay = 0 if self._in_flight == 0 else self.max_wait
+            self._timer = asyncio.get_running_loop().call_later(delay, self._expire)
+
+    def _expire(self):
+        self._timer = None
+        self._due = True
+        self._drain()
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self._score([url for url, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                # The caller may have gone away while the batch ran
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            self._drain()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'max_size': self.max_size,
+            'max_wait_seconds': self.max_wait,
+            'max_concurrency': self.max_concurrency,
+            'queued': len(self._queue),
+            'in_flight': self._in_flight,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+        }
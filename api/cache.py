@@ -0,0 +1,95 @@
+"""In-process verdict cache for the URL Safety Sentinel API."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class VerdictCache:
+    """
+    Bounded LRU cache with a per-entry TTL for URL verdicts.
+
+    Entries are keyed by the normalized URL and the model version that
+    produced them, so a verdict can never outlive the model it came from.
+
+    Parameters:
+    -----------
+    max_size : int
+        Maximum number of entries kept; 0 disables the cache
+    ttl_seconds : float
+        How long an entry stays valid after it was stored
+    clock : Callable[[], float]
+        Monotonic time source, injectable for testing
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, url: str, version: Hashable) -> Optional[Any]:
+        """Return the cached verdict or None on a miss."""
+        if not self.enabled:
+            return None
+        key = (url, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, url: str, version: Hashable, value: Any):
+        """Store a verdict, evicting the least recently used entries if full."""
+        if not self.enabled:
+            return
+        key = (url, version)
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every entry, e.g. after a new model artifact was loaded."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and sizing information."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
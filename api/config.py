@@ -0,0 +1,103 @@
+"""Runtime configuration for the URL Safety Sentinel API.
+
+Every setting can be overridden through an environment variable of the same
+name, so deployments can tune the service without code changes.
+"""
+
+import os
+
+_API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment."""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be an integer, got {value!r}")
+
+
+def _env_str(name: str, default: str) -> str:
+    """Read a string setting from the environment."""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment."""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be a number, got {value!r}")
+
+
+# Maximum number of URLs accepted by a single /analyze/batch request
+MAX_BATCH_SIZE = _env_int("MAX_BATCH_SIZE", 1000)
+
+# URLs scored per inference call by the streaming /analyze/stream endpoint
+STREAM_CHUNK_SIZE = _env_int("STREAM_CHUNK_SIZE", 500)
+
+# Verdict cache in front of /analyze; a size of 0 disables it
+VERDICT_CACHE_SIZE = _env_int("VERDICT_CACHE_SIZE", 10000)
+VERDICT_CACHE_TTL = _env_float("VERDICT_CACHE_TTL", 300.0)
+
+# Inference executor: "thread", "process" or "inline" (runs on the event loop)
+INFERENCE_EXECUTOR = _env_str("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = _env_int("INFERENCE_WORKERS", 4)
+# Queued plus running inference jobs before new requests get a 503
+INFERENCE_MAX_PENDING = _env_int("INFERENCE_MAX_PENDING", 64)
+# Seconds a request waits for its inference job before getting a 504
+INFERENCE_TIMEOUT = _env_float("INFERENCE_TIMEOUT", 10.0)
+
+# Micro-batching of concurrent /analyze requests into one inference call:
+# at most MICROBATCH_MAX_SIZE URLs, waiting at most MICROBATCH_MAX_WAIT
+# seconds for more to arrive; a size of 1 disables it
+MICROBATCH_MAX_SIZE = _env_int("MICROBATCH_MAX_SIZE", 256)
+MICROBATCH_MAX_WAIT = _env_float("MICROBATCH_MAX_WAIT", 0.005)
+
+# Domain reputation index consulted before the model: allowed and denied
+# domains (and their subdomains) are answered without scoring. Off by
+# default, since a listed domain skips the model entirely; an empty path
+# builds the index from the synthetic data generator's legitimate domains
+REPUTATION_ENABLED = _env_int("REPUTATION_ENABLED", 0) != 0
+REPUTATION_INDEX_PATH = _env_str("REPUTATION_INDEX_PATH", "")
+# Probability that an allowed domain is safe and a denied one malicious,
+# reported as the verdict's probability and confidence; set them to the
+# precision measured for the lists the index was built from
+REPUTATION_ALLOW_PRECISION = _env_float("REPUTATION_ALLOW_PRECISION", 0.99)
+REPUTATION_DENY_PRECISION = _env_float("REPUTATION_DENY_PRECISION", 0.95)
+
+# Cost-ordered cascade: measured feature rules, then the logistic regression
+# base model, then the full ensemble. A URL stops at the first stage whose
+# calibrated confidence reaches its threshold; CASCADE_ENABLED=0 scores
+# every URL with the full ensemble
+CASCADE_ENABLED = _env_int("CASCADE_ENABLED", 0) != 0
+# Smoothed training precision a rule needs; above 1 disables the rules
+CASCADE_RULE_PRECISION = _env_float("CASCADE_RULE_PRECISION", 0.995)
+# Calibrated probability at which the linear stage decides; 1 disables it
+CASCADE_LINEAR_CONFIDENCE = _env_float("CASCADE_LINEAR_CONFIDENCE", 0.99)
+
+# Model runtime: "sklearn" evaluates the fitted estimators directly,
+# "compiled" exports them to packed NumPy arrays at load time
+MODEL_RUNTIME = _env_str("MODEL_RUNTIME", "sklearn")
+
+# Model artifact loaded once at startup; the serving process never trains
+MODEL_PATH = _env_str("MODEL_PATH", os.path.join(_API_DIR, "saved_models", "stack_ensemble_model.joblib"))
+# Scoring passes over representative URLs before /ready reports ready
+WARMUP_ROUNDS = _env_int("WARMUP_ROUNDS", 3)
+
+# Seconds between checks of MODEL_PATH for a newly published artifact; 0 disables
+MODEL_WATCH_INTERVAL = _env_float("MODEL_WATCH_INTERVAL", 10.0)
+# Token expected in the X-Admin-Token header of /admin endpoints; empty disables them
+ADMIN_TOKEN = _env_str("ADMIN_TOKEN", "")
+
+# Record per-stage latency histograms and request counters for /metrics
+METRICS_ENABLED = _env_int("METRICS_ENABLED", 1) != 0
@@ -1,121 +1,407 @@
-import snscrape.modules.twitter as sntwitter
 import pandas as pd
 import datetime
+import argparse
+import glob
+import json
 import os
+import queue
 import re
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 import time
 import logging
+from typing import Any, Dict, Iterator, List, Optional
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Columns of the collected datasets, in file order
+COLUMNS = [
+    'tweet_id', 'date', 'url', 'domain', 'is_https', 'tweet_text', 'user_name', 'user_verified',
+    'user_followers', 'user_friends', 'retweet_count', 'like_count', 'potentially_malicious'
+]
+
+DEFAULT_QUERIES = [
+    'url filter:links lang:en',  # General URLs
+    'malicious url OR scam url lang:en',  # Potentially malicious URLs
+    'security url OR safe url lang:en'  # Security-related URLs
+]
+
 def extract_urls(text):
     """Extract URLs from tweet text."""
     url_pattern = r'https?://[^\s<>"]+|www\.[^\s<>"]+'
     return re.findall(url_pattern, text)
 
+# Substrings that mark a URL as potentially malicious, matched in one pass
+SUSPICIOUS_PATTERNS = ['bit.ly', 'goo.gl', 'tinyurl', 'suspicious', 'malware', 'virus']
+_SUSPICIOUS_RE = re.compile('|'.join(map(re.escape, SUSPICIOUS_PATTERNS)))
+
 def is_potentially_malicious(url):
     """Basic check for potentially malicious URLs."""
-    suspicious_patterns = ['bit.ly', 'goo.gl', 'tinyurl', 'suspicious', 'malware', 'virus']
-    return any(pattern in url.lower() for pattern in suspicious_patterns)
+    return _SUSPICIOUS_RE.search(url.lower()) is not None
+
+def tweet_rows(tweet: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One dataset row per URL in a tweet record of a ``TweetSource``."""
+    rows = []
+    for url in extract_urls(tweet['text']):
+        try:
+            parsed_url = urlparse(url)
+            rows.append({
+                'tweet_id': tweet['tweet_id'],
+                'date': tweet['date'],
+                'url': url,
+                'domain': parsed_url.netloc,
+                'is_https': parsed_url.scheme == 'https',
+                'tweet_text': tweet['text'],
+                'user_name': tweet['user_name'],
+                'user_verified': tweet['user_verified'],
+                'user_followers': tweet['user_followers'],
+                'user_friends': tweet['user_friends'],
+                'retweet_count': tweet['retweet_count'],
+                'like_count': tweet['like_count'],
+                'potentially_malicious': is_potentially_malicious(url)
+            })
+        except Exception as e:
+            logger.warning(f"Error processing URL: {str(e)}")
+    return rows
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` tokens per second, bursts of up to ``capacity``.
+
+    ``acquire`` blocks until a token is available, so every caller sharing
+    the bucket together stays under the rate.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop: Optional[threading.Event] = None) -> bool:
+        """Take one token, waiting for it; returns False if ``stop`` is set first."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop is None:
+                time.sleep(wait)
+            elif stop.wait(wait):
+                return False
+
+
+class TweetSource(ABC):
+    """
+    Where tweets come from.
+
+    ``search`` yields tweet records, dicts with tweet_id, date, text,
+    user_name, user_verified, user_followers, user_friends, retweet_count
+    and like_count, newest first. Collection resumes a query by passing the
+    id below which it should continue as ``max_id``.
+    """
+
+    @abstractmethod
+    def search(self, query: str, max_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        ...
+
+
+class SnscrapeSource(TweetSource):
+    """Live Twitter search through snscrape."""
+
+    def search(self, query: str, max_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        import snscrape.modules.twitter as sntwitter
+
+        if max_id is not None:
+            query = f"{query} max_id:{max_id}"
+        for tweet in sntwitter.TwitterSearchScraper(query).get_items():
+            yield {
+                'tweet_id': tweet.id,
+                'date': tweet.date,
+                'text': tweet.rawContent,
+                'user_name': tweet.user.username,
+                'user_verified': tweet.user.verified,
+                'user_followers': tweet.user.followersCount,
+                'user_friends': tweet.user.friendsCount,
+                'retweet_count': tweet.retweetCount,
+                'like_count': tweet.likeCount,
+            }
+
+
+class FixtureSource(TweetSource):
+    """
+    Tweets from local CSV or NDJSON files in the shape of the collected datasets.
+
+    Every query sees all tweets of the files (or those whose ``query``
+    column matches, if there is one), so collection can be tested and
+    benchmarked offline. ``latency`` seconds are slept before every
+    ``page_size`` tweets to imitate the requests of a live source.
+    """
+
+    def __init__(self, paths: List[str], latency: float = 0.0, page_size: int = 20):
+        frames = [pd.read_json(path, lines=True, dtype=False) if path.endswith(('.ndjson', '.jsonl'))
+                  else pd.read_csv(path, keep_default_na=False) for path in paths]
+        frames = [frame for frame in frames if len(frame)]
+        tweets = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['tweet_id'])
+        if 'text' not in tweets.columns and 'tweet_text' in tweets.columns:
+            tweets = tweets.rename(columns={'tweet_text': 'text'})
+        tweets['tweet_id'] = tweets['tweet_id'].astype('uint64')
+        self.tweets = tweets.drop_duplicates('tweet_id').sort_values('tweet_id', ascending=False)
+        self.latency = latency
+        self.page_size = page_size
+
+    def search(self, query: str, max_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        tweets = self.tweets
+        if 'query' in tweets.columns:
+            tweets = tweets[tweets['query'] == query]
+        if max_id is not None:
+            tweets = tweets[tweets['tweet_id'] <= max_id]
+        for i, tweet in enumerate(tweets.to_dict('records')):
+            if self.latency and i % self.page_size == 0:
+                time.sleep(self.latency)
+            tweet['tweet_id'] = int(tweet['tweet_id'])
+            yield tweet
+
+
+def _load_checkpoint(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {'bytes': 0, 'rows': 0, 'queries': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_checkpoint(path: str, state: Dict[str, Any]):
+    # Written aside and renamed, so a crash leaves the previous checkpoint intact
+    staging = f"{path}.tmp"
+    with open(staging, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(staging, path)
+
+
+def collect(source: TweetSource, queries: List[str], output: str, limit: int = 50, rate: float = 5.0,
+            burst: int = 20, concurrency: int = 3, chunk_size: int = 500,
+            checkpoint_path: Optional[str] = None, overwrite: bool = False) -> Dict[str, Any]:
+    """
+    Collect URL rows for ``queries`` concurrently and stream them to a CSV file.
+
+    Each query runs in its own thread, up to ``concurrency`` at a time, and
+    all of them draw from one token bucket of ``rate`` tweets per second.
+    Rows whose URL has already been written are dropped as they arrive,
+    and the rest are appended to ``output`` every ``chunk_size`` rows.
+    After every chunk a checkpoint records the output size and, per query,
+    the rows collected and the last tweet written. If collection stops for
+    any reason, calling ``collect`` again with the same output truncates
+    anything written after the last checkpoint and resumes each query
+    below its last tweet; finished queries are not run again. A non-empty
+    ``output`` without a checkpoint is left alone unless ``overwrite``.
+
+    Parameters:
+    -----------
+    limit : int
+        Rows (URLs, before deduplication) to collect per query
+    checkpoint_path : Optional[str]
+        Defaults to ``<output>.checkpoint.json``
+    overwrite : bool
+        Replace an existing ``output`` that has no checkpoint instead of
+        raising ``FileExistsError``
+
+    Returns:
+    --------
+    Dict[str, Any]
+        Rows written, duplicates dropped and per-query progress
+    """
+    checkpoint_path = checkpoint_path or f"{output}.checkpoint.json"
+    if (not os.path.exists(checkpoint_path) and not overwrite
+            and os.path.exists(output) and os.path.getsize(output) > 0):
+        # Without a checkpoint there is nothing to resume, only data to lose
+        raise FileExistsError(
+            f"{output} already exists and has no checkpoint {checkpoint_path}; "
+            f"choose a new output file or overwrite it"
+        )
+    state = _load_checkpoint(checkpoint_path)
+    progress = {query: state['queries'].get(query, {'rows': 0, 'last_id': None, 'done': False})
+                for query in queries}
+    state['queries'].update(progress)
+
+    # Drop anything appended after the last checkpoint, then rebuild the URLs already written
+    seen = set()
+    if os.path.exists(output):
+        with open(output, 'r+b') as f:
+            f.truncate(state['bytes'])
+        if state['bytes']:
+            seen.update(pd.read_csv(output, usecols=['url'], dtype=str, keep_default_na=False)['url'])
+    elif state['bytes']:
+        raise RuntimeError(f"Checkpoint {checkpoint_path} refers to a missing output file {output}")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    pending_queries = [query for query in queries if not progress[query]['done']]
+    if state['bytes']:
+        logger.info(f"Resuming {output}: {state['rows']} rows written, {len(pending_queries)} queries left")
+
+    bucket = TokenBucket(rate, burst)
+    stop = threading.Event()
+    # Bounded, so fetching cannot run far ahead of writing
+    items = queue.Queue(maxsize=4 * chunk_size)
+    finished = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch(query: str):
+        """Put (query, tweet id, rows) items on the queue, then (query, finished, error)."""
+        collected = progress[query]['rows']
+        last_id = progress[query]['last_id']
+        error = None
+        try:
+            tweets = iter(source.search(query, max_id=last_id - 1 if last_id is not None else None))
+            # Take the token before asking the source, which may go to the network
+            while collected < limit and bucket.acquire(stop):
+                tweet = next(tweets, None)
+                if tweet is None:
+                    break
+                rows = tweet_rows(tweet)[:limit - collected]
+                collected += len(rows)
+                if not put((query, tweet['tweet_id'], rows)):
+                    return
+        except Exception as e:
+            error = e
+        put((query, finished, error))
+
+    buffer = []
+    # Per query: rows collected and last tweet id, as of the rows in ``buffer``
+    buffered = {}
+    duplicates = 0
+
+    def flush():
+        if buffer:
+            frame = pd.DataFrame(buffer, columns=COLUMNS)
+            with open(output, 'a', newline='', encoding='utf-8') as f:
+                frame.to_csv(f, header=state['bytes'] == 0, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+                state['bytes'] = f.tell()
+            state['rows'] += len(buffer)
+            buffer.clear()
+        for query, (rows, last_id) in buffered.items():
+            progress[query]['rows'] += rows
+            progress[query]['last_id'] = last_id
+        buffered.clear()
+        _save_checkpoint(checkpoint_path, state)
+
+    started = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        for query in pending_queries:
+            pool.submit(fetch, query)
+        running = len(pending_queries)
+        while running:
+            query, tweet_id, rows = items.get()
+            if tweet_id is finished:
+                running -= 1
+                if rows is not None:
+                    logger.error(f"Error during scraping {query!r}: {str(rows)}")
+                else:
+                    progress[query]['done'] = True
+                    logger.info(f"Finished query {query!r}")
+                continue
+            for row in rows:
+                if row['url'] in seen:
+                    duplicates += 1
+                    continue
+                seen.add(row['url'])
+                buffer.append(row)
+            count, _ = buffered.get(query, (0, None))
+            buffered[query] = (count + len(rows), tweet_id)
+            if len(buffer) >= chunk_size:
+                flush()
+                logger.info(f"Collected {state['rows']} unique URLs")
+    finally:
+        # Fetchers stop at their next token or queue put; rows they still hold are fetched again on resume
+        stop.set()
+        pool.shutdown()
+        flush()
+
+    return {
+        'rows': state['rows'],
+        'duplicates': duplicates,
+        'seconds': time.perf_counter() - started,
+        'queries': progress,
+        'complete': all(progress[query]['done'] for query in queries),
+    }
 
 def scrape_tweets(query, limit=50):
     """Scrape tweets containing URLs with simplified approach."""
     tweets_list = []
-    count = 0
+    bucket = TokenBucket(rate=1.0)
     
     try:
-        # Create a TwitterSearchScraper object
-        scraper = sntwitter.TwitterSearchScraper(query)
-        
-        # Iterate through tweets
-        for tweet in scraper.get_items():
-            if count >= limit:
+        for tweet in SnscrapeSource().search(query):
+            if len(tweets_list) >= limit:
                 break
-                
-            # Extract URLs from tweet
-            urls = extract_urls(tweet.rawContent)
-            if not urls:
-                continue
-                
-            # Process each URL in the tweet
-            for url in urls:
-                try:
-                    parsed_url = urlparse(url)
-                    tweets_list.append({
-                        'tweet_id': tweet.id,
-                        'date': tweet.date,
-                        'url': url,
-                        'domain': parsed_url.netloc,
-                        'is_https': parsed_url.scheme == 'https',
-                        'tweet_text': tweet.rawContent,
-                        'user_name': tweet.user.username,
-                        'user_verified': tweet.user.verified,
-                        'user_followers': tweet.user.followersCount,
-                        'user_friends': tweet.user.friendsCount,
-                        'retweet_count': tweet.retweetCount,
-                        'like_count': tweet.likeCount,
-                        'potentially_malicious': is_potentially_malicious(url)
-                    })
-                    count += 1
-                    
-                    if count % 5 == 0:
-                        logger.info(f"Collected {count} tweets")
-                        
-                except Exception as e:
-                    logger.warning(f"Error processing URL: {str(e)}")
-                    continue
-            
-            # Small delay between tweets
-            time.sleep(1)
-            
+            bucket.acquire()
+            tweets_list.extend(tweet_rows(tweet)[:limit - len(tweets_list)])
     except Exception as e:
         logger.error(f"Error during scraping: {str(e)}")
     
     return tweets_list
 
-def main():
-    # Create data directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
-    
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Collect tweets with URLs into a CSV dataset")
+    parser.add_argument('--queries', nargs='+', default=DEFAULT_QUERIES)
+    parser.add_argument('--limit', type=int, default=50, help='URLs to collect per query')
+    parser.add_argument('--output', help='CSV file; rerun with the same file to resume an interrupted run')
+    parser.add_argument('--fixture', nargs='+',
+                        help='read tweets from these CSV/NDJSON files (globs allowed) instead of Twitter')
+    parser.add_argument('--rate', type=float, default=5.0, help='tweets per second across all queries')
+    parser.add_argument('--burst', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=3)
+    parser.add_argument('--chunk-size', type=int, default=500, help='rows written per checkpoint')
+    parser.add_argument('--force', action='store_true',
+                        help='overwrite an existing output file that has no checkpoint to resume from')
+    args = parser.parse_args(argv)
+
     # Current timestamp for file naming
     timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    output = args.output or f'data/twitter_urls_{timestamp}.csv'
     
-    # Simplified queries
-    queries = [
-        'url filter:links lang:en',  # General URLs
-        'malicious url OR scam url lang:en',  # Potentially malicious URLs
-        'security url OR safe url lang:en'  # Security-related URLs
-    ]
-    
-    all_tweets = []
+    if args.fixture:
+        source = FixtureSource(sorted({path for pattern in args.fixture for path in glob.glob(pattern)}))
+    else:
+        source = SnscrapeSource()
     
-    # Collect tweets for each query
-    for i, query in enumerate(queries, 1):
-        logger.info(f"\nProcessing query {i}/3: {query}")
-        tweets = scrape_tweets(query, limit=50)  # Reduced limit to 50 tweets per query
-        all_tweets.extend(tweets)
-        logger.info(f"Query {i}: Collected {len(tweets)} tweets")
-        
-        # Delay between queries
-        if i < len(queries):
-            time.sleep(5)
-    
-    # Convert to DataFrame and remove duplicates
-    df = pd.DataFrame(all_tweets)
-    total_tweets = len(df)
-    df = df.drop_duplicates(subset=['url'])
-    
-    # Save to CSV
-    output_file = f'data/twitter_urls_{timestamp}.csv'
-    df.to_csv(output_file, index=False)
+    try:
+        result = collect(source, args.queries, output, args.limit, args.rate, args.burst,
+                         args.concurrency, args.chunk_size, overwrite=args.force)
+    except FileExistsError as e:
+        parser.error(f"{str(e)} with --force")
     
     logger.info(f"\nData collection summary:")
-    logger.info(f"Total tweets collected: {total_tweets}")
-    logger.info(f"Unique URLs after deduplication: {len(df)}")
-    logger.info(f"Data saved to: {output_file}")
+    logger.info(f"Unique URLs written: {result['rows']}")
+    logger.info(f"Duplicate URLs dropped this run: {result['duplicates']}")
+    for query, progress in result['queries'].items():
+        logger.info(f"{query!r}: {progress['rows']} URLs, {'done' if progress['done'] else 'incomplete'}")
+    logger.info(f"Data saved to: {output}")
+    if not result['complete']:
+        logger.warning(f"Some queries did not finish; rerun with --output {output} to resume")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
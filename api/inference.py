@@ -0,0 +1,199 @@
+"""Run CPU-bound inference off the asyncio event loop."""
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from api.scoring import load_serving_model, score_urls, score_urls_timed
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ('thread', 'process', 'inline')
+
+
+class InferenceOverloaded(Exception):
+    """Raised when the inference queue is full."""
+
+
+class InferenceTimeout(Exception):
+    """Raised when a request waited longer than the configured timeout."""
+
+
+# Model held by each worker process of a process pool
+_worker_model = None
+
+
+def _init_worker(model_path: str, runtime: str, cascade: Optional[Dict[str, Any]] = None):
+    """Load the model once per worker process."""
+    global _worker_model
+    _worker_model = load_serving_model(model_path, runtime, cascade)
+
+
+def _score_in_worker(urls: List[str], timed: bool = False):
+    if timed:
+        return score_urls_timed(_worker_model, urls)
+    return score_urls(_worker_model, urls)
+
+
+class InferenceExecutor:
+    """
+    Bounded executor for feature extraction and ensemble inference.
+
+    Parameters:
+    -----------
+    kind : str
+        'thread' runs inference on a thread pool, 'process' on a process pool
+        that loads the model once per worker, and 'inline' on the event loop
+        itself (the old behaviour, kept for benchmarking)
+    max_workers : int
+        Number of worker threads or processes
+    max_pending : int
+        Maximum number of queued plus running jobs; further requests are rejected
+    timeout : float
+        Seconds a request waits for its result before giving up
+    runtime : str
+        Model runtime used by process workers, see ``api.scoring.prepare_model``
+    cascade : Optional[Dict[str, Any]]
+        Cascade settings used by process workers, see ``api.scoring.prepare_model``
+    observe_stage : Optional[Callable[[str, float], None]]
+        Receives the (stage, seconds) timings of every job on the event loop,
+        including jobs that ran in worker processes
+    """
+
+    def __init__(self, kind: str = 'thread', max_workers: int = 4, max_pending: int = 64,
+                 timeout: float = 10.0, runtime: str = 'sklearn',
+                 cascade: Optional[Dict[str, Any]] = None,
+                 observe_stage: Optional[Callable[[str, float], None]] = None):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind {kind!r}; expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.runtime = runtime
+        self.cascade = cascade
+        self.observe_stage = observe_stage
+        self.pending = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._model = None
+        self._model_path: Optional[str] = None
+        self._pool: Optional[Executor] = None
+
+    def set_model(self, model, model_path: Optional[str] = None):
+        """Serve ``model`` from now on; process workers reload it from ``model_path``."""
+        self._model = model
+        if self.kind == 'process' and model_path != self._model_path and self._pool is not None:
+            # Jobs already submitted finish on the old workers
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        self._model_path = model_path
+
+    async def swap_model(self, model, model_path: Optional[str] = None, warmup_urls: List[str] = ()):
+        """
+        Warm up ``model`` next to the current one, then switch new jobs to it.
+
+        Process pools are replaced by a fresh pool that has already loaded
+        and scored with the new artifact. Jobs already running finish on the
+        previous model.
+        """
+        loop = asyncio.get_running_loop()
+        if self.kind == 'process':
+            pool = self._new_process_pool(model_path)
+            try:
+                if warmup_urls:
+                    await asyncio.gather(*(
+                        loop.run_in_executor(pool, _score_in_worker, list(warmup_urls))
+                        for _ in range(self.max_workers)
+                    ))
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            previous, self._pool = self._pool, pool
+            if previous is not None:
+                previous.shutdown(wait=False)
+        elif warmup_urls:
+            await loop.run_in_executor(
+                self._get_pool() if self.kind == 'thread' else None, score_urls, model, list(warmup_urls)
+            )
+        self._model = model
+        self._model_path = model_path
+
+    def _new_process_pool(self, model_path: Optional[str]) -> Executor:
+        if model_path is None:
+            raise RuntimeError("Process inference needs a model artifact path")
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(model_path, self.runtime, self.cascade)
+        )
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == 'process':
+                self._pool = self._new_process_pool(self._model_path)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='inference'
+                )
+        return self._pool
+
+    def _job_done(self, _future):
+        self.pending -= 1
+
+    async def score(self, urls: List[str]) -> List[Tuple[Dict[str, float], np.ndarray]]:
+        """Score ``urls`` on the executor without blocking the event loop."""
+        timed = self.observe_stage is not None
+        if self.kind == 'inline':
+            return self._finish(score_urls_timed(self._model, urls) if timed else score_urls(self._model, urls), timed)
+
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise InferenceOverloaded(f"Inference queue is full ({self.max_pending} pending jobs)")
+
+        loop = asyncio.get_running_loop()
+        if self.kind == 'process':
+            future = loop.run_in_executor(self._get_pool(), _score_in_worker, urls, timed)
+        else:
+            future = loop.run_in_executor(
+                self._get_pool(), score_urls_timed if timed else score_urls, self._model, urls
+            )
+        # The slot is released when the work really finishes, not when the
+        # caller stops waiting, so the bound reflects what the pool is doing
+        self.pending += 1
+        future.add_done_callback(self._job_done)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise InferenceTimeout(f"Inference did not finish within {self.timeout} seconds")
+        return self._finish(result, timed)
+
+    def _finish(self, result, timed: bool):
+        if not timed:
+            return result
+        results, timings = result
+        for stage, seconds in timings:
+            self.observe_stage(stage, seconds)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'timeout_seconds': self.timeout,
+            'pending': self.pending,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -1,7 +1,7 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
-import pandas as pd
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, HttpUrl, TypeAdapter, ValidationError
 import numpy as np
 from datetime import datetime
 import re
@@ -9,10 +9,26 @@ from urllib.parse import urlparse
 import os
 import sys
 import logging
-from typing import Dict, Any, Optional
+import asyncio
+import hmac
+from starlette.requests import ClientDisconnect
+import time
+from typing import Dict, Any, Optional, List, Tuple
 
-from api.ml_model.feature_extraction import extract_advanced_features
-from api.ml_model.stack_ensemble import StackEnsembleModel
+from api import config
+from api.batching import MicroBatcher
+from api.cache import VerdictCache
+from api.inference import InferenceExecutor, InferenceOverloaded, InferenceTimeout
+from api.metrics import SIZE_BUCKETS, Counter, Gauge, Histogram, MetricsMiddleware, MetricsRegistry
+from api.ml_model.cascade import ENSEMBLE, STAGE_NAMES
+from api.reputation import ALLOW, DENY, VERDICT_NAMES, load_index
+from api.scoring import load_serving_model, prepare_model
+from api.streaming import (
+    STREAM_FORMATS, DuplexStreamingResponse, StreamFormatError, csv_url_column, iter_chunks, iter_lines
+)
+from api.tweets import extract_urls
+from api.ml_model.feature_extraction import extract_feature_vector, feature_vector_to_dict
+from api.ml_model.model_store import activate_version, artifact_version, list_versions
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -21,35 +37,6 @@ logger = logging.getLogger(__name__)
 # Add the parent directory to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Create a dummy model class in case imports fail
-class DummyModel:
-    """A simple fallback model that always works."""
-    def __init__(self):
-        self.is_fitted = True  # Mark as fitted so it doesn't raise errors
-        
-    def predict(self, X):
-        """Return safe predictions for all URLs."""
-        n_samples = len(X) if hasattr(X, '__len__') else 1
-        logger.info(f"DummyModel predicting {n_samples} samples")
-        return np.zeros(n_samples, dtype=int)  # All safe
-
-    def predict_proba(self, X):
-        """Return probability predictions."""
-        n_samples = len(X) if hasattr(X, '__len__') else 1
-        probs = np.zeros((n_samples, 2), dtype=float)
-        probs[:, 0] = 0.8  # 80% probability of being safe
-        probs[:, 1] = 0.2  # 20% probability of being malicious
-        return probs
-
-# Try to import the StackEnsembleModel
-try:
-    from api.ml_model.stack_ensemble import StackEnsembleModel
-    logger.info("Successfully imported StackEnsembleModel")
-except ImportError as e:
-    logger.error(f"Failed to import StackEnsembleModel: {str(e)}")
-    # Define a dummy StackEnsembleModel if import fails
-    StackEnsembleModel = DummyModel
-
 app = FastAPI(
     title="URL Safety Analyzer",
     description="An advanced API for analyzing URL safety using ML ensemble methods",
@@ -75,58 +62,204 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
-# Path to the model file
-model_path = os.path.join(os.path.dirname(__file__), 'saved_models', 'stack_ensemble_model.joblib')
+# Prometheus-style metrics served at /metrics
+metrics = MetricsRegistry()
+HTTP_REQUESTS = metrics.register(Counter(
+    'url_sentinel_http_requests_total', 'HTTP requests by route and status code', ('endpoint', 'status')
+))
+HTTP_LATENCY = metrics.register(Histogram(
+    'url_sentinel_http_request_seconds', 'HTTP request latency by route', ('endpoint',)
+))
+STAGE_LATENCY = metrics.register(Histogram(
+    'url_sentinel_inference_stage_seconds',
+    'Inference latency per stage: feature_extraction, cascade.rules, cascade.linear, base_models, '
+    'meta_model, confidence', ('stage',)
+))
+INFERENCE_BATCH_SIZE = metrics.register(Histogram(
+    'url_sentinel_inference_batch_size', 'URLs scored per inference call', buckets=SIZE_BUCKETS
+))
+BATCH_REQUEST_SIZE = metrics.register(Histogram(
+    'url_sentinel_batch_request_size', 'URLs per /analyze/batch request', buckets=SIZE_BUCKETS
+))
+MODEL_SWAPS = metrics.register(Counter(
+    'url_sentinel_model_swaps_total', 'Hot model swaps since startup'
+))
 
-# Initialize model
-def get_trained_model():
-    """Get a trained model or create a dummy model if needed."""
-    # Try to load the existing model
-    try:
-        logger.info(f"Attempting to load model from {model_path}")
-        model = StackEnsembleModel.load_model(model_path)
-        
-        # Check if the model is actually fitted
-        if hasattr(model, 'is_fitted') and model.is_fitted:
-            logger.info("Model loaded successfully and is fitted")
-            return model
-        else:
-            logger.warning("Loaded model is not fitted. Training a new model.")
-            # Fall through to training
-    except Exception as e:
-        logger.error(f"Error loading model: {str(e)}")
-        # Fall through to training
-    
-    # Try to train a new model
+if config.METRICS_ENABLED:
+    app.add_middleware(
+        MetricsMiddleware,
+        requests=HTTP_REQUESTS,
+        latency=HTTP_LATENCY,
+        routes=lambda: [route.path for route in app.routes]
+    )
+
+def _observe_stage(stage: str, seconds: float):
+    STAGE_LATENCY.observe(seconds, stage)
+
+# Verdicts are cached per (normalized URL, model version)
+verdict_cache = VerdictCache(config.VERDICT_CACHE_SIZE, config.VERDICT_CACHE_TTL)
+model = None
+model_version = None
+# Domain reputation index, loaded at startup; None sends every URL to the model
+reputation = None
+# Keyword arguments of CascadeEnsemble; None scores every URL with the full ensemble
+CASCADE = {
+    'rule_precision': config.CASCADE_RULE_PRECISION,
+    'linear_confidence': config.CASCADE_LINEAR_CONFIDENCE,
+} if config.CASCADE_ENABLED else None
+# URLs decided by each cascade stage, counted here because process workers keep their own models
+cascade_decisions = {stage: 0 for stage in STAGE_NAMES}
+# Startup progress reported by /ready: loading, warming_up, ready or failed
+readiness = {'status': 'loading', 'detail': None}
+
+# CPU-bound scoring runs here so the event loop stays responsive
+inference_executor = InferenceExecutor(
+    kind=config.INFERENCE_EXECUTOR,
+    max_workers=config.INFERENCE_WORKERS,
+    max_pending=config.INFERENCE_MAX_PENDING,
+    timeout=config.INFERENCE_TIMEOUT,
+    runtime=config.MODEL_RUNTIME,
+    cascade=CASCADE,
+    observe_stage=_observe_stage if config.METRICS_ENABLED else None
+)
+
+# Read at scrape time from the objects that already keep these numbers
+metrics.register(Gauge(
+    'url_sentinel_model_info', 'Model version being served', ('version', 'runtime'),
+    lambda: [((model_version or 'none', config.MODEL_RUNTIME), 1)]
+))
+metrics.register(Gauge(
+    'url_sentinel_ready', 'Whether the service reports ready', (),
+    lambda: [((), int(readiness['status'] == 'ready'))]
+))
+metrics.register(Gauge(
+    'url_sentinel_verdict_cache_lookups_total', 'Verdict cache lookups by result', ('result',),
+    lambda: [(('hit',), verdict_cache.hits), (('miss',), verdict_cache.misses)], kind='counter'
+))
+metrics.register(Gauge(
+    'url_sentinel_verdict_cache_hit_ratio', 'Share of verdict cache lookups that hit', (),
+    lambda: [((), verdict_cache.stats()['hit_ratio'])]
+))
+metrics.register(Gauge(
+    'url_sentinel_verdict_cache_entries', 'Entries held by the verdict cache', (),
+    lambda: [((), verdict_cache.stats()['size'])]
+))
+metrics.register(Gauge(
+    'url_sentinel_reputation_decisions_total', 'URLs decided by the domain reputation index', ('verdict',),
+    lambda: [((VERDICT_NAMES[verdict],), count) for verdict, count in reputation.decided.items()]
+    if reputation is not None else [], kind='counter'
+))
+metrics.register(Gauge(
+    'url_sentinel_reputation_skip_ratio', 'Share of looked-up URLs answered without the model', (),
+    lambda: [((), reputation.stats()['skip_ratio'])] if reputation is not None else []
+))
+metrics.register(Gauge(
+    'url_sentinel_cascade_decisions_total', 'Scored URLs decided by each cascade stage', ('stage',),
+    lambda: [((stage,), count) for stage, count in cascade_decisions.items()]
+    if CASCADE is not None else [], kind='counter'
+))
+metrics.register(Gauge(
+    'url_sentinel_inference_pending', 'Queued plus running inference jobs', (),
+    lambda: [((), inference_executor.pending)]
+))
+metrics.register(Gauge(
+    'url_sentinel_inference_rejected_total', 'Inference jobs rejected because the queue was full', (),
+    lambda: [((), inference_executor.rejected)], kind='counter'
+))
+metrics.register(Gauge(
+    'url_sentinel_inference_timed_out_total', 'Inference jobs that exceeded the timeout', (),
+    lambda: [((), inference_executor.timed_out)], kind='counter'
+))
+
+def _install_model(new_model, version: str):
+    """Point request handling at ``new_model`` and drop verdicts of the previous one."""
+    global model, model_version
+    model = new_model
+    model_version = version
+    verdict_cache.invalidate()
+    logger.info(f"Serving model version {model_version}")
+
+def _set_model(new_model, path: Optional[str] = None):
+    """Install a model and invalidate verdicts produced by the previous one."""
     try:
-        logger.info("Attempting to train a new model")
-        try:
-            from api.ml_model.train_model import main as train_model
-            train_model()
-            
-            # Load the newly trained model
-            model = StackEnsembleModel.load_model(model_path)
-            
-            # Verify it's fitted
-            if hasattr(model, 'is_fitted') and model.is_fitted:
-                logger.info("New model trained and loaded successfully")
-                return model
-            else:
-                logger.error("Newly trained model is not fitted")
-                # Fall through to dummy model
-        except ImportError as e:
-            logger.error(f"Failed to import train_model: {str(e)}")
-            # Fall through to dummy model
-    except Exception as e:
-        logger.error(f"Error training model: {str(e)}")
-        # Fall through to dummy model
+        version = artifact_version(path) if path else 'untrained'
+    except OSError:
+        version = 'untrained'
+    new_model = prepare_model(new_model, config.MODEL_RUNTIME, CASCADE)
+    inference_executor.set_model(new_model, path)
+    _install_model(new_model, version)
+
+# Scored during warm-up so the first real request does not pay for lazy
+# initialisation (public suffix list, worker processes, allocator growth)
+WARMUP_URLS = [
+    "https://www.google.com/",
+    "https://github.com/python/cpython/blob/main/README.rst",
+    "http://login-verify-account.example.tk/secure/update.php?user=1&session=abc",
+    "http://192.168.10.24:8080/admin/confirm#step=2",
+    "https://bit.ly/3xYzAbC",
+    "https://docs.example.co.uk/path/to/page?id=42",
+]
+
+async def _warm_up(rounds: int):
+    """Run full scoring passes so every worker has touched the model."""
+    for _ in range(rounds):
+        await asyncio.gather(*(
+            inference_executor.score(WARMUP_URLS)
+            for _ in range(inference_executor.max_workers)
+        ))
 
-    # Create a dummy model as a last resort
-    logger.warning("Using dummy model as fallback")
-    return DummyModel()
+# Serializes hot swaps from the admin endpoint and the file watcher
+_reload_lock = asyncio.Lock()
+_model_watcher: Optional[asyncio.Task] = None
 
-# Load or create the model
-model = get_trained_model()
+async def reload_model() -> Dict[str, Any]:
+    """
+    Hot-swap to the artifact currently at MODEL_PATH.
+
+    The new model is loaded and warmed up off the event loop while the old
+    one keeps serving. The switch is a reference assignment, so in-flight
+    requests finish on the model they started with.
+    """
+    path = config.MODEL_PATH
+    loop = asyncio.get_running_loop()
+    async with _reload_lock:
+        started = time.perf_counter()
+        previous = model_version
+        version = await loop.run_in_executor(None, artifact_version, path)
+        if version == previous:
+            return {"swapped": False, "model_version": version, "previous_version": previous}
+        loaded = await loop.run_in_executor(None, load_serving_model, path, config.MODEL_RUNTIME, CASCADE)
+        await inference_executor.swap_model(loaded, path, WARMUP_URLS)
+        _install_model(loaded, version)
+        readiness.update(status='ready', detail=None)
+        MODEL_SWAPS.inc()
+        return {
+            "swapped": True,
+            "model_version": version,
+            "previous_version": previous,
+            "seconds": time.perf_counter() - started
+        }
+
+async def _watch_model_file(interval: float):
+    """Hot-swap whenever a new artifact is published at MODEL_PATH."""
+    last_seen = None
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            stat = os.stat(config.MODEL_PATH)
+        except OSError:
+            continue
+        # Publishing replaces the file, which changes at least its inode
+        seen = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if seen == last_seen:
+            continue
+        last_seen = seen
+        try:
+            result = await reload_model()
+            if result["swapped"]:
+                logger.info(f"Swapped model {result['previous_version']} -> {result['model_version']}")
+        except Exception as e:
+            logger.error(f"Error reloading model: {str(e)}")
 
 class URLRequest(BaseModel):
     url: HttpUrl
@@ -139,17 +272,169 @@ class URLResponse(BaseModel):
     prediction_metrics: Dict[str, float]
     feature_importance: Optional[Dict[str, float]] = None
     extracted_features: Optional[Dict[str, Any]] = None
+    # "reputation" when the domain reputation index decided without the model,
+    # "rules" or "linear" when an early cascade stage decided without the full ensemble
+    verdict_source: Optional[str] = None
+
+class BatchURLRequest(BaseModel):
+    urls: List[str]
+    include_features: Optional[bool] = False
+
+class BatchItemResult(BaseModel):
+    index: int
+    url: str
+    result: Optional[URLResponse] = None
+    error: Optional[str] = None
+
+class BatchURLResponse(BaseModel):
+    results: List[BatchItemResult]
+    total: int
+    succeeded: int
+    failed: int
+
+class TweetRequest(BaseModel):
+    text: str
+    include_features: Optional[bool] = False
+
+class TweetResponse(BatchURLResponse):
+    # False when any URL in the tweet is unsafe, True when every URL was
+    # scored safe, None when the tweet has no URL or none could be scored
+    is_safe: Optional[bool] = None
+
+class ModelReloadRequest(BaseModel):
+    # File name of a published version to roll to; defaults to MODEL_PATH as is
+    version: Optional[str] = None
+
+_http_url_adapter = TypeAdapter(HttpUrl)
+
+async def _score(urls: List[str]) -> List[Tuple[Dict[str, float], np.ndarray]]:
+    """Score URLs on the inference executor, mapping overload and timeouts to HTTP errors."""
+    if config.METRICS_ENABLED:
+        INFERENCE_BATCH_SIZE.observe(len(urls))
+    try:
+        results = await inference_executor.score(urls)
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    for prediction, _ in results:
+        stage = prediction.get('cascade_stage')
+        if stage is not None:
+            cascade_decisions[STAGE_NAMES[int(stage)]] += 1
+    return results
+
+async def _score_coalesced(urls: List[str]) -> List[Any]:
+    """Score URLs coalesced from separate /analyze requests."""
+    try:
+        return await _score(urls)
+    except HTTPException:
+        raise
+    except Exception as e:
+        if len(urls) == 1:
+            raise
+        # One URL that breaks scoring must not fail the requests it was batched with
+        logger.error(f"Error scoring a batch of {len(urls)} URLs, retrying them one by one: {str(e)}")
+        results = await asyncio.gather(*(_score([url]) for url in urls), return_exceptions=True)
+        return [result if isinstance(result, BaseException) else result[0] for result in results]
+
+# Concurrent /analyze requests share inference calls
+microbatcher = MicroBatcher(
+    _score_coalesced,
+    max_size=max(1, config.MICROBATCH_MAX_SIZE),
+    max_wait=config.MICROBATCH_MAX_WAIT,
+    max_concurrency=config.INFERENCE_WORKERS
+)
+
+def _build_response(
+    url: str,
+    prediction_metrics: Dict[str, float],
+    features: np.ndarray,
+    include_features: bool
+) -> URLResponse:
+    """Turn one ensemble prediction into the public response model."""
+    is_safe = prediction_metrics['safe_probability'] > 0.5  # probability of being safe
+
+    # Calculate confidence score (weighted average of metrics)
+    confidence_score = (
+        0.7 * prediction_metrics['model_confidence'] +
+        0.3 * prediction_metrics['prediction_stability']
+    )
+
+    response = URLResponse(
+        url=url,
+        is_safe=bool(is_safe),
+        confidence_score=float(confidence_score),
+        prediction_metrics=prediction_metrics
+    )
+    stage = prediction_metrics.get('cascade_stage')
+    if stage is not None and int(stage) != ENSEMBLE:
+        response.verdict_source = STAGE_NAMES[int(stage)]
+
+    # Include additional information if requested
+    if include_features:
+        response.feature_importance = model.get_feature_importance()
+        response.extracted_features = feature_vector_to_dict(features)
+
+    return response
+
+def _reputation_response(url: str, verdict: int, include_features: bool) -> URLResponse:
+    """Response for a URL whose domain the reputation index allows or denies."""
+    # A list is as reliable as its measured precision, never certain
+    if verdict == ALLOW:
+        precision = config.REPUTATION_ALLOW_PRECISION
+        safe = precision
+    else:
+        precision = config.REPUTATION_DENY_PRECISION
+        safe = 1.0 - precision
+    prediction_metrics = {
+        'safe_probability': safe,
+        'malicious_probability': 1.0 - safe,
+        'model_confidence': precision,
+        'prediction_stability': 1.0
+    }
+    # Features are only extracted when asked for; the model never runs
+    features = extract_feature_vector(url) if include_features else None
+    response = _build_response(url, prediction_metrics, features, include_features)
+    response.verdict_source = 'reputation'
+    return response
 
 @app.on_event("startup")
 async def load_model():
-    global model
+    """Load the model artifact once, warm it up, then report ready."""
+    path = config.MODEL_PATH
+    loop = asyncio.get_running_loop()
+    global reputation
+    if config.REPUTATION_ENABLED:
+        try:
+            reputation = await loop.run_in_executor(None, load_index, config.REPUTATION_INDEX_PATH)
+            logger.info(f"Loaded domain reputation index with {len(reputation)} entries")
+        except Exception as e:
+            # The model can still answer everything on its own
+            logger.error(f"Error loading domain reputation index: {str(e)}")
     try:
-        model_path = os.path.join('api', 'saved_models', 'stack_ensemble_model.joblib')
-        model = StackEnsembleModel.load_model(model_path)
-        logger.info("Model loaded successfully")
+        logger.info(f"Loading model from {path}")
+        loaded = await loop.run_in_executor(None, load_serving_model, path, config.MODEL_RUNTIME, CASCADE)
+        _set_model(loaded, path)
+        readiness['status'] = 'warming_up'
+        started = time.perf_counter()
+        await _warm_up(config.WARMUP_ROUNDS)
+        logger.info(f"Model warmed up in {time.perf_counter() - started:.2f} seconds")
     except Exception as e:
+        # Stay unready rather than serve an untrained or dummy model
         logger.error(f"Error loading model: {str(e)}")
-        model = StackEnsembleModel()  # Fallback to new model
+        readiness.update(status='failed', detail=str(e))
+    else:
+        readiness.update(status='ready', detail=None)
+
+    global _model_watcher
+    if config.MODEL_WATCH_INTERVAL > 0:
+        _model_watcher = asyncio.create_task(_watch_model_file(config.MODEL_WATCH_INTERVAL))
+
+@app.on_event("shutdown")
+async def stop_inference_executor():
+    if _model_watcher is not None:
+        _model_watcher.cancel()
+    inference_executor.shutdown()
 
 @app.get("/")
 async def root():
@@ -159,42 +444,39 @@ async def root():
         "status": "active"
     }
 
+def _require_model():
+    if model is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model is not loaded ({readiness['status']})",
+            headers={"Retry-After": "1"}
+        )
+
 @app.post("/analyze", response_model=URLResponse)
 async def analyze_url(request: URLRequest):
+    _require_model()
     try:
-        # Extract features
-        features = extract_advanced_features(str(request.url))
-        X = pd.DataFrame([features])
-        
-        # Get predictions and confidence
-        probas, confidence_metrics = model.predict_proba(X)
-        is_safe = probas[0, 0] > 0.5  # probability of being safe
-        
-        # Calculate confidence score (weighted average of metrics)
-        confidence_score = (
-            0.7 * confidence_metrics['model_confidence'] +
-            0.3 * confidence_metrics['prediction_stability']
-        )
-        
-        response = URLResponse(
-            url=str(request.url),
-            is_safe=bool(is_safe),
-            confidence_score=float(confidence_score),
-            prediction_metrics={
-                'safe_probability': float(probas[0, 0]),
-                'malicious_probability': float(probas[0, 1]),
-                'model_confidence': confidence_metrics['model_confidence'],
-                'prediction_stability': confidence_metrics['prediction_stability']
-            }
-        )
-        
-        # Include additional information if requested
-        if request.include_features:
-            response.feature_importance = model.get_feature_importance()
-            response.extracted_features = features
-            
-        return response
+        url = str(request.url)
+        if reputation is not None:
+            verdict = reputation.decide([url])[0]
+            if verdict is not None:
+                return _reputation_response(url, verdict, request.include_features)
+        version = model_version
+        cached = verdict_cache.get(url, version)
+        if cached is None:
+            # Extract features and get predictions and confidence
+            if config.MICROBATCH_MAX_SIZE > 1:
+                prediction, features = await microbatcher.submit(url)
+            else:
+                prediction, features = (await _score([url]))[0]
+            verdict_cache.put(url, version, (prediction, features))
+        else:
+            prediction, features = cached
+
+        return _build_response(url, prediction, features, request.include_features)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing URL: {str(e)}")
         raise HTTPException(
@@ -202,6 +484,224 @@ async def analyze_url(request: URLRequest):
             detail=f"Error analyzing URL: {str(e)}"
         )
 
+def _resolve_items(items: List[BatchItemResult], version: Optional[str], include_features: bool) -> List[BatchItemResult]:
+    """
+    Validate items and answer them from the reputation index or the verdict cache where possible.
+
+    Items that fail validation get an error instead of failing the others.
+    Returns the items that still need scoring.
+    """
+    valid = []
+    for item in items:
+        if item.error is not None:
+            continue
+        try:
+            item.url = str(_http_url_adapter.validate_python(item.url))
+        except ValidationError as e:
+            item.error = f"Invalid URL: {e.errors()[0]['msg']}"
+            continue
+        valid.append(item)
+
+    verdicts = reputation.decide([item.url for item in valid]) if reputation is not None else [None] * len(valid)
+    pending = []
+    for item, verdict in zip(valid, verdicts):
+        url = item.url
+        if verdict is not None:
+            item.result = _reputation_response(url, verdict, include_features)
+            continue
+        cached = verdict_cache.get(url, version)
+        if cached is not None:
+            prediction, features = cached
+            item.result = _build_response(url, prediction, features, include_features)
+        else:
+            pending.append(item)
+    return pending
+
+async def _score_items(
+    items: List[BatchItemResult],
+    version: Optional[str],
+    include_features: bool,
+    cache_results: bool = True
+):
+    """Score validated items in one inference call and fill in their results or errors."""
+    try:
+        scored = await _score([item.url for item in items])
+    except HTTPException:
+        raise
+    except Exception as e:
+        if len(items) == 1:
+            logger.error(f"Error analyzing URL: {str(e)}")
+            items[0].error = f"Error analyzing URL: {str(e)}"
+            return
+        # One URL that breaks scoring must only fail itself, not the whole batch
+        logger.error(f"Error analyzing a batch of {len(items)} URLs, retrying them one by one: {str(e)}")
+        scored = await asyncio.gather(*(_score([item.url]) for item in items), return_exceptions=True)
+        scored = [result if isinstance(result, BaseException) else result[0] for result in scored]
+    for item, result in zip(items, scored):
+        if isinstance(result, BaseException):
+            detail = result.detail if isinstance(result, HTTPException) else str(result)
+            item.error = f"Error analyzing URL: {detail}"
+            continue
+        prediction, features = result
+        if cache_results:
+            verdict_cache.put(item.url, version, (prediction, features))
+        item.result = _build_response(item.url, prediction, features, include_features)
+
+@app.post("/analyze/batch", response_model=BatchURLResponse)
+async def analyze_url_batch(request: BatchURLRequest):
+    """
+    Score many URLs with a single pass through the ensemble.
+
+    Results are returned in request order. URLs that fail validation are
+    reported individually instead of failing the batch.
+    """
+    _require_model()
+    if config.METRICS_ENABLED:
+        BATCH_REQUEST_SIZE.observe(len(request.urls))
+    if len(request.urls) > config.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch contains {len(request.urls)} URLs; the maximum is {config.MAX_BATCH_SIZE}"
+        )
+
+    results = [BatchItemResult(index=i, url=url) for i, url in enumerate(request.urls)]
+    pending = _resolve_items(results, model_version, request.include_features)
+    if pending:
+        await _score_items(pending, model_version, request.include_features)
+
+    failed = sum(1 for item in results if item.error is not None)
+    return BatchURLResponse(
+        results=results,
+        total=len(results),
+        succeeded=len(results) - failed,
+        failed=failed
+    )
+
+@app.post("/analyze/tweet", response_model=TweetResponse)
+async def analyze_tweet(request: TweetRequest):
+    """
+    Extract every URL from raw tweet text and score them in one inference call.
+
+    Results are in order of first appearance in the text, duplicates
+    removed; see ``api.tweets.extract_urls``. A tweet without URLs gets an
+    empty result list.
+    """
+    _require_model()
+    urls = extract_urls(request.text)
+    if len(urls) > config.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Tweet contains {len(urls)} URLs; the maximum is {config.MAX_BATCH_SIZE}"
+        )
+
+    results = [BatchItemResult(index=i, url=url) for i, url in enumerate(urls)]
+    pending = _resolve_items(results, model_version, request.include_features)
+    if pending:
+        await _score_items(pending, model_version, request.include_features)
+
+    scored = [item.result for item in results if item.result is not None]
+    failed = len(results) - len(scored)
+    is_safe = None
+    if any(not result.is_safe for result in scored):
+        is_safe = False
+    elif scored and not failed:
+        is_safe = True
+    return TweetResponse(
+        results=results,
+        total=len(results),
+        succeeded=len(scored),
+        failed=failed,
+        is_safe=is_safe
+    )
+
+# Attempts at scoring a stream chunk while the inference queue is full
+_STREAM_OVERLOAD_RETRIES = 5
+
+async def _score_stream_chunk(
+    chunk: List[Tuple[str, Optional[str]]],
+    first_index: int,
+    include_features: bool
+) -> bytes:
+    """Score one chunk of a streamed upload and render its NDJSON result lines."""
+    items = [
+        BatchItemResult(index=first_index + i, url=url, error=error)
+        for i, (url, error) in enumerate(chunk)
+    ]
+    version = model_version
+    pending = _resolve_items(items, version, include_features)
+    for attempt in range(_STREAM_OVERLOAD_RETRIES):
+        if not pending:
+            break
+        try:
+            # Bulk audits would evict the verdicts of interactive traffic,
+            # so streams read the cache but do not fill it
+            await _score_items(pending, version, include_features, cache_results=False)
+            break
+        except HTTPException as e:
+            if e.status_code != 503 or attempt == _STREAM_OVERLOAD_RETRIES - 1:
+                for item in pending:
+                    item.error = f"Error analyzing URL: {e.detail}"
+                break
+            await asyncio.sleep(0.1 * 2 ** attempt)
+    return ''.join(item.model_dump_json(exclude_none=True) + '\n' for item in items).encode('utf-8')
+
+@app.post("/analyze/stream")
+async def analyze_url_stream(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format"),
+    include_features: bool = False
+):
+    """
+    Score an NDJSON or CSV upload of any size, streaming NDJSON verdicts back.
+
+    NDJSON lines are {"url": ...} objects or bare JSON strings; CSV needs a
+    header with a url column. The format defaults from the Content-Type.
+    The upload is scored STREAM_CHUNK_SIZE URLs at a time while the next
+    chunk is being read, so memory stays flat whatever the input size.
+    Every output line is a BatchItemResult whose index is the position of
+    the URL in the input.
+    """
+    _require_model()
+    if fmt is None:
+        fmt = 'csv' if 'csv' in request.headers.get('content-type', '') else 'ndjson'
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format {fmt!r}; expected one of {STREAM_FORMATS}")
+
+    lines = iter_lines(request.stream())
+    url_column = 0
+    if fmt == 'csv':
+        header = None
+        try:
+            async for header in lines:
+                break
+            if header is None:
+                raise StreamFormatError("CSV upload has no header line")
+            url_column = csv_url_column(header)
+        except StreamFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except ClientDisconnect:
+            raise HTTPException(status_code=400, detail="Client disconnected")
+
+    async def results():
+        index = 0
+        scoring = []
+        try:
+            async for chunk in iter_chunks(lines, fmt, config.STREAM_CHUNK_SIZE, url_column):
+                # Score this chunk while the previous one is sent and the next one read
+                scoring.append(asyncio.ensure_future(_score_stream_chunk(chunk, index, include_features)))
+                index += len(chunk)
+                if len(scoring) > 1:
+                    yield await scoring.pop(0)
+            while scoring:
+                yield await scoring.pop(0)
+        except ClientDisconnect:
+            logger.info(f"Client disconnected from /analyze/stream after {index} URLs")
+        finally:
+            for task in scoring:
+                task.cancel()
+
+    return DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
 @app.get("/model/performance")
 async def get_model_performance():
     """Get model performance metrics and statistics."""
@@ -239,6 +739,7 @@ async def get_model_performance():
 @app.get("/model/dataset")
 async def get_dataset_metrics():
     """Get information about the training dataset."""
+    _require_model()
     return {
         "totalSamples": 10000,
         "maliciousSamples": 2500,
@@ -249,6 +750,79 @@ async def get_dataset_metrics():
         "lastUpdated": datetime.now().isoformat()
     }
 
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get verdict cache counters for the model version being served."""
+    return {**verdict_cache.stats(), "model_version": model_version}
+
+@app.get("/reputation/stats")
+async def get_reputation_stats():
+    """Get the size of the domain reputation index and the share of URLs it decided."""
+    if reputation is None:
+        return {"enabled": False}
+    return {"enabled": True, **reputation.stats()}
+
+@app.get("/inference/stats")
+async def get_inference_stats():
+    """Get inference executor queue and error counters."""
+    stats = inference_executor.stats()
+    stats['microbatching'] = microbatcher.stats() if config.MICROBATCH_MAX_SIZE > 1 else None
+    stats['cascade'] = {**CASCADE, 'decided': dict(cascade_decisions)} if CASCADE is not None else None
+    return stats
+
+def _require_admin(token: Optional[str]):
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if token is None or not hmac.compare_digest(token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/model")
+async def get_model_versions(x_admin_token: Optional[str] = Header(None)):
+    """List the published model versions and the one being served."""
+    _require_admin(x_admin_token)
+    return {
+        "model_version": model_version,
+        "model_path": config.MODEL_PATH,
+        "versions": [os.path.basename(path) for path in list_versions(config.MODEL_PATH)]
+    }
+
+@app.post("/admin/model/reload")
+async def reload_model_endpoint(
+    request: Optional[ModelReloadRequest] = None,
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Hot-swap the served model, optionally activating a published version first."""
+    _require_admin(x_admin_token)
+    loop = asyncio.get_running_loop()
+    try:
+        if request is not None and request.version is not None:
+            versions = {os.path.basename(path): path for path in list_versions(config.MODEL_PATH)}
+            if request.version not in versions:
+                raise HTTPException(status_code=404, detail=f"Unknown model version {request.version!r}")
+            await loop.run_in_executor(None, activate_version, config.MODEL_PATH, versions[request.version])
+        return await reload_model()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reloading model: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error reloading model: {str(e)}"
+        )
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the model is loaded and warmed up, 503 before."""
+    body = {**readiness, "model_version": model_version}
+    if readiness['status'] != 'ready':
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
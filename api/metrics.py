@@ -0,0 +1,178 @@
+"""
+Low-overhead Prometheus-style metrics for the URL Safety Sentinel API.
+
+Metrics are recorded and rendered on the event loop thread only: inference
+jobs hand their stage timings back to the loop instead of recording them in
+worker threads, so no locking is needed on the hot path.
+"""
+
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from 50 microseconds to 10 seconds
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+# Number of URLs per inference call or batch request
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter with optional labels; by convention its name ends in ``_total``."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        # Unlabelled counters are exported as 0 before the first increment
+        self._values: Dict[Tuple[str, ...], float] = {} if self.label_names else {(): 0.0}
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for label_values, value in list(self._values.items()):
+            yield f'{self.name}{_labels(self.label_names, label_values)} {_format_value(value)}'
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets and optional labels.
+
+    ``observe`` only bumps one bucket counter; the cumulative counts the
+    exposition format expects are computed at scrape time.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        if not self.label_names:
+            self._series[()] = [[0] * (len(self.buckets) + 1), 0.0]
+
+    def observe(self, value: float, *label_values: str):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self) -> Iterable[str]:
+        series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        bounds = self.buckets + (math.inf,)
+        for label_values, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f'{self.name}_bucket{_labels(self.label_names, label_values, le)} {cumulative}'
+            labels = _labels(self.label_names, label_values)
+            yield f'{self.name}_sum{labels} {_format_value(total)}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Gauge:
+    """
+    Metric whose samples are read from a callback at scrape time, costing
+    nothing per request. Pass ``kind='counter'`` for running totals that are
+    already kept elsewhere, such as the verdict cache counters.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str],
+                 collect: Callable[[], Iterable[Tuple[Sequence[str], float]]], kind: str = 'gauge'):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._collect = collect
+
+    def samples(self) -> Iterable[str]:
+        for label_values, value in self._collect():
+            yield f'{self.name}{_labels(self.label_names, label_values)} {_format_value(value)}'
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the text exposition format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware counting HTTP requests and their latency per route.
+
+    Paths that are not routes of the app are reported as "other" so random
+    URLs cannot blow up the number of series.
+    """
+
+    def __init__(self, app, requests: Counter, latency: Histogram, routes: Optional[Callable[[], Iterable[str]]] = None):
+        self.app = app
+        self.requests = requests
+        self.latency = latency
+        self._routes = routes
+        self._known_paths = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        if self._known_paths is None:
+            self._known_paths = frozenset(self._routes()) if self._routes is not None else frozenset()
+        path = scope['path']
+        endpoint = path if path in self._known_paths else 'other'
+        status = ['500']
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = str(message['status'])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.latency.observe(time.perf_counter() - started, endpoint)
+            self.requests.inc(endpoint, status[0])
@@ -0,0 +1,148 @@
+import numpy as np
+from typing import Iterable, List
+
+from .feature_extraction import (
+    extract_feature_vector, get_feature_names,
+    SUSPICIOUS_CHARS, SUSPICIOUS_KEYWORDS,
+    _IP_PATTERN, _split_url, _suffix_features
+)
+
+FEATURE_NAMES = get_feature_names()
+_COL = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+# Byte lookup tables for ASCII URLs
+_IS_DIGIT = np.zeros(256, dtype=np.int32)
+_IS_DIGIT[ord('0'):ord('9') + 1] = 1
+
+_IS_SPECIAL = np.ones(256, dtype=np.int32)
+for _c in b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789':
+    _IS_SPECIAL[_c] = 0
+
+_IS_SUSPICIOUS = np.zeros(256, dtype=np.int32)
+for _c in SUSPICIOUS_CHARS.encode('ascii'):
+    _IS_SUSPICIOUS[_c] = 1
+
+_TO_LOWER = np.arange(256, dtype=np.uint8)
+_TO_LOWER[ord('A'):ord('Z') + 1] += ord('a') - ord('A')
+
+_KEYWORD_BYTES = [np.frombuffer(kw.encode('ascii'), dtype=np.uint8) for kw in SUSPICIOUS_KEYWORDS]
+
+def _segment_sums(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Sum ``values`` over each [start, end) segment of a flat buffer."""
+    cumulative = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(values, out=cumulative[1:])
+    return cumulative[ends] - cumulative[starts]
+
+
+def _fill_ascii_rows(urls: List[str], rows: np.ndarray, out: np.ndarray):
+    """Compute the character-class, keyword and entropy features for ASCII URLs."""
+    encoded = [url.encode('ascii') for url in urls]
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    flat = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    num_digits = _segment_sums(_IS_DIGIT[flat], starts, ends)
+    num_special = _segment_sums(_IS_SPECIAL[flat], starts, ends)
+    num_suspicious = _segment_sums(_IS_SUSPICIOUS[flat], starts, ends)
+
+    # Keyword hits: start from positions matching the first letter of each
+    # keyword and only count matches that end inside the same URL
+    lowered = _TO_LOWER[flat]
+    row_of_byte = np.repeat(np.arange(len(encoded)), lengths)
+    has_keyword = np.zeros(len(encoded), dtype=bool)
+    for kw in _KEYWORD_BYTES:
+        candidates = np.flatnonzero(lowered == kw[0])
+        candidates = candidates[candidates + len(kw) <= ends[row_of_byte[candidates]]]
+        for offset in range(1, len(kw)):
+            candidates = candidates[lowered[candidates + offset] == kw[offset]]
+        has_keyword[row_of_byte[candidates]] = True
+
+    # Shannon entropy from a per-URL byte histogram, using only non-empty bins
+    counts = np.bincount(row_of_byte * 128 + flat, minlength=len(encoded) * 128)
+    hit = np.flatnonzero(counts)
+    hit_rows = hit // 128
+    probs = counts[hit] / lengths[hit_rows]
+    entropy = -np.bincount(hit_rows, weights=probs * np.log2(probs), minlength=len(encoded))
+
+    out[rows, _COL['url_length']] = lengths
+    out[rows, _COL['num_digits']] = num_digits
+    out[rows, _COL['has_suspicious_chars']] = num_suspicious > 0
+    out[rows, _COL['has_suspicious_keywords']] = has_keyword
+    out[rows, _COL['digit_ratio']] = num_digits / lengths
+    out[rows, _COL['special_char_ratio']] = num_special / lengths
+    out[rows, _COL['url_entropy']] = entropy
+
+
+_STRUCTURAL_COLUMNS = [
+    _COL[name] for name in (
+        'domain_length', 'path_length', 'query_length', 'has_https', 'num_dots',
+        'num_params', 'path_depth', 'num_fragments', 'has_ip_pattern',
+        'domain_suffix_length', 'is_free_domain'
+    )
+]
+
+
+def _fill_chunk(urls: List[str], out: np.ndarray):
+    """Fill ``out`` (len(urls) x n_features) for one chunk of URLs."""
+    ascii_rows = []
+    ascii_urls = []
+    structural = []
+    for i, url in enumerate(urls):
+        try:
+            if not url or not url.isascii():
+                raise ValueError("needs the scalar extractor")
+            scheme, domain, path, query, fragment = _split_url(url)
+            segments = path.split('/')
+            structural.append((
+                len(domain),
+                len(path),
+                len(query),
+                scheme == 'https',
+                domain.count('.'),
+                query.count('&') + 1 if query else 0,
+                len(segments) - segments.count(''),
+                fragment.count('&') + 1 if fragment else 0,
+                _IP_PATTERN.match(domain) is not None,
+            ) + _suffix_features(domain))
+        except Exception:
+            # Empty, non-ASCII or unparsable URLs go through the single-URL
+            # kernel so edge cases keep exactly the same values
+            extract_feature_vector(url, out[i])
+            continue
+        ascii_rows.append(i)
+        ascii_urls.append(url)
+
+    if ascii_urls:
+        rows = np.asarray(ascii_rows, dtype=np.int64)
+        out[np.ix_(rows, _STRUCTURAL_COLUMNS)] = np.array(structural, dtype=np.float64)
+        _fill_ascii_rows(ascii_urls, rows, out)
+
+
+def extract_features_batch(urls: Iterable[str], chunk_size: int = 16384) -> np.ndarray:
+    """
+    Extract features for many URLs at once.
+
+    Produces the same values as calling ``extract_advanced_features`` on each
+    URL, but counts characters, keywords and entropy with vectorized NumPy
+    operations over the raw bytes of a whole chunk of URLs.
+
+    Parameters:
+    -----------
+    urls : Iterable[str]
+        URLs to analyze (list, tuple, NumPy array or pandas Series)
+    chunk_size : int
+        Number of URLs processed per vectorized pass; bounds temporary memory
+
+    Returns:
+    --------
+    np.ndarray
+        Array of shape (n_urls, n_features) in ``get_feature_names()`` order
+    """
+    if not isinstance(urls, (list, tuple)):
+        urls = list(urls)
+    out = np.zeros((len(urls), len(FEATURE_NAMES)), dtype=np.float64)
+    for start in range(0, len(urls), chunk_size):
+        stop = min(start + chunk_size, len(urls))
+        _fill_chunk(urls[start:stop], out[start:stop])
+    return out
@@ -0,0 +1,270 @@
+"""
+Cost-ordered cascade in front of the stacking ensemble.
+
+Most URLs are easy: a cheap rule or the logistic regression base model
+alone already knows the answer. The cascade tries the stages in order of
+cost and stops at the first one whose calibrated confidence clears its
+threshold; only the uncertain rest pays for every base model and the
+meta-model. Calibration only holds where it was measured, so rows with a
+feature outside the range seen in training skip the early stages.
+
+1. ``rules``: conjunctions of binary features whose precision was measured
+   on training data
+2. ``linear``: the fitted logistic regression base model, Platt-scaled on
+   its out-of-fold probabilities
+3. ``ensemble``: the full stack
+
+The calibration comes from ``calibrate_cascade``, which
+``StackEnsembleModel.fit`` and ``update`` run on data the models did not
+train on, and is stored with the model as ``cascade_calibration_``.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from api.ml_model.compiled_ensemble import _CompiledLinear
+
+logger = logging.getLogger(__name__)
+
+# Stage codes reported per row in the 'cascade_stage' confidence metric
+RULES, LINEAR, ENSEMBLE = 0, 1, 2
+STAGE_NAMES = ('rules', 'linear', 'ensemble')
+
+# Candidate rules: name, (feature, value) conditions that must all hold, and
+# the class they predict. Malicious rules come first; a row takes the
+# verdict of the first enabled rule it matches
+RULE_CANDIDATES = (
+    ('plain_http', (('has_https', 0),), 1),
+    ('ip_host', (('has_ip_pattern', 1),), 1),
+    ('free_domain', (('is_free_domain', 1),), 1),
+    ('suspicious_chars', (('has_suspicious_chars', 1),), 1),
+    ('suspicious_keywords', (('has_suspicious_keywords', 1),), 1),
+    ('clean_https', (('has_https', 1), ('has_ip_pattern', 0), ('is_free_domain', 0),
+                     ('has_suspicious_chars', 0), ('has_suspicious_keywords', 0), ('num_params', 0)), 0),
+)
+# Rules matching fewer training rows than this are never enabled
+MIN_RULE_SUPPORT = 50
+
+
+def _rule_matches(X: np.ndarray, columns: List[int], values: List[float]) -> np.ndarray:
+    return np.all(X[:, columns] == values, axis=1)
+
+
+def _logit(p: np.ndarray) -> np.ndarray:
+    p = np.clip(p, 1e-12, 1.0 - 1e-12)
+    return np.log(p) - np.log1p(-p)
+
+
+def find_linear_model(base_models: List) -> Optional[int]:
+    """Index of the first logistic regression base model, sklearn or compiled."""
+    for i, model in enumerate(base_models):
+        if isinstance(model, (LogisticRegression, _CompiledLinear)):
+            return i
+    return None
+
+
+def calibrate_cascade(X: np.ndarray, y: np.ndarray, feature_names: List[str], linear_index: int,
+                      linear_proba: np.ndarray, linear_y: np.ndarray) -> Dict[str, Any]:
+    """
+    Measure the cascade's rules and fit the Platt scaling of its linear stage.
+
+    Parameters:
+    -----------
+    X, y : np.ndarray
+        Labeled feature rows, in ``feature_names`` column order, on which
+        every candidate rule's hits (rows of the predicted class) and support
+        (matching rows) are counted
+    linear_index : int
+        Position of the logistic regression among the base models
+    linear_proba, linear_y : np.ndarray
+        Malicious probabilities of that model for rows it was not fitted on,
+        e.g. out-of-fold, and their labels
+
+    Returns:
+    --------
+    Dict[str, Any]
+        'linear_index', 'platt' as (slope, intercept) on the logit,
+        'rules' mapping rule names to their 'hits' and 'support', and the
+        per-feature 'feature_min' and 'feature_max' of ``X``
+    """
+    rules = {}
+    for name, conditions, verdict in RULE_CANDIDATES:
+        if any(feature not in feature_names for feature, _ in conditions):
+            continue
+        matches = _rule_matches(
+            X, [feature_names.index(feature) for feature, _ in conditions], [value for _, value in conditions]
+        )
+        rules[name] = {'hits': int(np.sum(y[matches] == verdict)), 'support': int(np.sum(matches))}
+
+    platt = (1.0, 0.0)
+    if len(np.unique(linear_y)) == 2:
+        scaler = LogisticRegression(C=1e6, max_iter=1000)
+        scaler.fit(_logit(np.asarray(linear_proba)).reshape(-1, 1), linear_y)
+        platt = (float(scaler.coef_[0, 0]), float(scaler.intercept_[0]))
+    return {
+        'linear_index': int(linear_index),
+        'platt': platt,
+        'rules': rules,
+        'feature_min': X.min(axis=0).tolist(),
+        'feature_max': X.max(axis=0).tolist(),
+    }
+
+
+class CascadeEnsemble:
+    """
+    Serve a fitted ``StackEnsembleModel`` or ``CompiledEnsemble`` as a cascade.
+
+    Exposes the same prediction interface as the wrapped model. Rows decided
+    early get the calibrated probability of their stage, so their
+    ``model_confidence`` is that stage's confidence; one model voted, so
+    their ``prediction_stability`` is 1. Rows with a feature outside the
+    calibration range always go to the full ensemble. Every row also
+    reports the stage that decided it in the 'cascade_stage' metric.
+
+    Parameters:
+    -----------
+    model : Union[StackEnsembleModel, CompiledEnsemble]
+        Fitted ensemble; its ``cascade_calibration_`` configures the stages
+    linear_confidence : float
+        Calibrated probability of the predicted class at which the linear
+        stage decides a row; 1 or more disables the stage
+    rule_precision : float
+        Smoothed training precision a rule needs to be enabled; above 1
+        disables the rules
+    min_rule_support : int
+        Training rows a rule must have matched to be enabled
+    """
+
+    def __init__(self, model, linear_confidence: float = 0.99, rule_precision: float = 0.995,
+                 min_rule_support: int = MIN_RULE_SUPPORT):
+        self.model = model
+        self.linear_confidence = float(linear_confidence)
+        self.rule_precision = float(rule_precision)
+        self.decided = {stage: 0 for stage in STAGE_NAMES}
+
+        calibration = getattr(model, 'cascade_calibration_', None)
+        if calibration is None:
+            # Models fitted before the cascade have nothing to trust an early exit on
+            logger.warning("Model has no cascade calibration; every row goes to the full ensemble")
+            calibration = {'linear_index': None, 'platt': (1.0, 0.0), 'rules': {}}
+        index = calibration['linear_index']
+        self.linear = model.base_models[index] if index is not None else None
+        self.platt = tuple(float(value) for value in calibration['platt'])
+        self.feature_range = None
+        if calibration.get('feature_min') is not None:
+            self.feature_range = (np.asarray(calibration['feature_min'], dtype=np.float64),
+                                  np.asarray(calibration['feature_max'], dtype=np.float64))
+
+        feature_names = list(model.feature_names) if model.feature_names is not None else None
+        self.rules = []
+        for name, conditions, verdict in RULE_CANDIDATES:
+            counts = calibration['rules'].get(name)
+            if counts is None or feature_names is None or counts['support'] < min_rule_support:
+                continue
+            # Laplace smoothing keeps a rule that was never wrong below certainty
+            precision = (counts['hits'] + 1) / (counts['support'] + 2)
+            if precision < self.rule_precision:
+                continue
+            columns = [feature_names.index(feature) for feature, _ in conditions]
+            self.rules.append((name, columns, [value for _, value in conditions], verdict, precision))
+
+    @property
+    def feature_names(self) -> Optional[List[str]]:
+        return self.model.feature_names
+
+    def _as_array(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        return self.model._as_array(X)
+
+    def calibrated_linear_proba(self, X: np.ndarray) -> np.ndarray:
+        """Platt-scaled malicious probability of the linear stage."""
+        slope, intercept = self.platt
+        return 1.0 / (1.0 + np.exp(-(slope * _logit(self.linear.predict_proba(X)[:, 1]) + intercept)))
+
+    def predict_proba(
+        self, X: Union[pd.DataFrame, np.ndarray],
+        observe: Optional[Callable[[str, float], None]] = None
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Predict class probabilities and per-row confidence metrics stage by stage.
+
+        ``observe`` receives 'cascade.rules' and 'cascade.linear' timings,
+        followed by the wrapped model's own stages for the rows that reach it.
+        """
+        X = self._as_array(X)
+        n = X.shape[0]
+        malicious = np.empty(n)
+        stage = np.full(n, ENSEMBLE, dtype=np.int64)
+        model_confidence = np.empty(n)
+        prediction_stability = np.ones(n)
+        started = time.perf_counter()
+        remaining = np.ones(n, dtype=bool)
+        if self.feature_range is not None:
+            low, high = self.feature_range
+            familiar = np.all((X >= low) & (X <= high), axis=1)
+        else:
+            familiar = remaining.copy()
+        remaining &= familiar
+        for _, columns, values, verdict, precision in self.rules:
+            matched = remaining & _rule_matches(X, columns, values)
+            malicious[matched] = precision if verdict == 1 else 1.0 - precision
+            stage[matched] = RULES
+            remaining &= ~matched
+        rules_done = time.perf_counter()
+
+        rows = np.flatnonzero(remaining)
+        if rows.size and self.linear is not None and self.linear_confidence < 1.0:
+            proba = self.calibrated_linear_proba(X[rows])
+            sure = np.maximum(proba, 1.0 - proba) >= self.linear_confidence
+            malicious[rows[sure]] = proba[sure]
+            stage[rows[sure]] = LINEAR
+            remaining[rows[sure]] = False
+        linear_done = time.perf_counter()
+        if observe is not None:
+            observe('cascade.rules', rules_done - started)
+            observe('cascade.linear', linear_done - rules_done)
+        remaining |= ~familiar
+
+        probas = np.column_stack([1.0 - malicious, malicious])
+        early = ~remaining
+        model_confidence[early] = np.maximum(malicious[early], 1.0 - malicious[early])
+        rows = np.flatnonzero(remaining)
+        if rows.size:
+            if observe is None:
+                rest, metrics = self.model.predict_proba(X[rows])
+            else:
+                rest, metrics = self.model.predict_proba(X[rows], observe=observe)
+            probas[rows] = rest
+            model_confidence[rows] = metrics['model_confidence']
+            prediction_stability[rows] = metrics['prediction_stability']
+
+        counts = np.bincount(stage, minlength=len(STAGE_NAMES))
+        for name, count in zip(STAGE_NAMES, counts.tolist()):
+            self.decided[name] += count
+        return probas, {
+            'model_confidence': model_confidence,
+            'prediction_stability': prediction_stability,
+            'cascade_stage': stage,
+        }
+
+    def predict(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        probas, _ = self.predict_proba(X)
+        return (probas[:, 1] > 0.5).astype(int)
+
+    def get_feature_importance(self) -> Dict[str, float]:
+        return self.model.get_feature_importance()
+
+    def stats(self) -> Dict[str, Any]:
+        """Enabled rules, thresholds and how many rows each stage decided in this process."""
+        total = sum(self.decided.values())
+        return {
+            'rules': [name for name, *_ in self.rules],
+            'linear_confidence': self.linear_confidence,
+            'rule_precision': self.rule_precision,
+            'decided': dict(self.decided),
+            'early_exit_ratio': (total - self.decided['ensemble']) / total if total else 0.0,
+        }
@@ -0,0 +1,418 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+
+def _expit(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class _PackedTrees:
+    """
+    A list of fitted sklearn trees flattened into shared NumPy arrays.
+
+    Leaves point to themselves and compare against +inf, so a batch walks
+    every tree in lock-step for ``depth`` steps without any branching.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, depth: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+
+    @classmethod
+    def from_trees(cls, trees: List, leaf_value) -> '_PackedTrees':
+        """Pack sklearn ``Tree`` objects; ``leaf_value(tree)`` gives one row per node."""
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        depth = 0
+        for tree in trees:
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left == -1
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            children.append(np.stack([left, right], axis=1))
+            values.append(leaf_value(tree))
+            roots.append(offset)
+            depth = max(depth, tree.max_depth)
+            offset += n_nodes
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.concatenate(children).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            depth=depth
+        )
+
+    def leaf_values(self, X32: np.ndarray) -> np.ndarray:
+        """Return the leaf value reached in every tree, shape (n_samples, n_trees, ...)."""
+        n_samples, n_features = X32.shape
+        flat_X = np.ascontiguousarray(X32).ravel()
+        row_offsets = (np.arange(n_samples, dtype=np.intp) * n_features)[:, None]
+        flat_children = self.children.ravel()
+        node = np.repeat(self.roots[None, :], n_samples, axis=0)
+        for _ in range(self.depth):
+            # sklearn compares float32 inputs against float64 thresholds
+            go_right = flat_X.take(row_offsets + self.feature.take(node)) > self.threshold.take(node)
+            node = flat_children.take(2 * node + go_right)
+        return self.value[node]
+
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {
+            f'{prefix}feature': self.feature,
+            f'{prefix}threshold': self.threshold,
+            f'{prefix}children': self.children,
+            f'{prefix}value': self.value,
+            f'{prefix}roots': self.roots,
+            f'{prefix}depth': np.asarray(self.depth),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str) -> '_PackedTrees':
+        return cls(
+            feature=arrays[f'{prefix}feature'],
+            threshold=arrays[f'{prefix}threshold'],
+            children=arrays[f'{prefix}children'],
+            value=arrays[f'{prefix}value'],
+            roots=arrays[f'{prefix}roots'],
+            depth=int(arrays[f'{prefix}depth'])
+        )
+
+
+class _CompiledForest:
+    """RandomForestClassifier: average of per-tree class distributions."""
+
+    kind = 'random_forest'
+
+    def __init__(self, trees: _PackedTrees):
+        self.trees = trees
+
+    @classmethod
+    def from_estimator(cls, model: RandomForestClassifier) -> '_CompiledForest':
+        def leaf_value(tree):
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1, keepdims=True)
+            totals[totals == 0.0] = 1.0
+            return counts / totals
+        return cls(_PackedTrees.from_trees([est.tree_ for est in model.estimators_], leaf_value))
+
+    def predict_proba(self, X: np.ndarray, X32: np.ndarray) -> np.ndarray:
+        return self.trees.leaf_values(X32).mean(axis=1)
+
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return self.trees.to_arrays(prefix)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str) -> '_CompiledForest':
+        return cls(_PackedTrees.from_arrays(arrays, prefix))
+
+
+class _CompiledBoosting:
+    """Binary GradientBoostingClassifier: expit(init + learning_rate * sum of stage values)."""
+
+    kind = 'gradient_boosting'
+
+    def __init__(self, trees: _PackedTrees, init_raw: float, learning_rate: float):
+        self.trees = trees
+        self.init_raw = float(init_raw)
+        self.learning_rate = float(learning_rate)
+
+    @classmethod
+    def from_estimator(cls, model: GradientBoostingClassifier) -> '_CompiledBoosting':
+        if model.estimators_.shape[1] != 1:
+            raise TypeError("Only binary GradientBoostingClassifier models can be compiled")
+        # The prior-based init estimator gives the same raw score for every row
+        init_raw = model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0, 0]
+        trees = _PackedTrees.from_trees(
+            [est.tree_ for est in model.estimators_[:, 0]],
+            lambda tree: tree.value[:, 0, 0]
+        )
+        return cls(trees, init_raw, model.learning_rate)
+
+    def predict_proba(self, X: np.ndarray, X32: np.ndarray) -> np.ndarray:
+        raw = self.init_raw + self.learning_rate * self.trees.leaf_values(X32).sum(axis=1)
+        proba = _expit(raw)
+        return np.column_stack([1.0 - proba, proba])
+
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        arrays = self.trees.to_arrays(prefix)
+        arrays[f'{prefix}init_raw'] = np.asarray(self.init_raw)
+        arrays[f'{prefix}learning_rate'] = np.asarray(self.learning_rate)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str) -> '_CompiledBoosting':
+        return cls(
+            _PackedTrees.from_arrays(arrays, prefix),
+            float(arrays[f'{prefix}init_raw']),
+            float(arrays[f'{prefix}learning_rate'])
+        )
+
+
+class _CompiledLinear:
+    """Binary LogisticRegression: expit(X @ coef + intercept)."""
+
+    kind = 'logistic_regression'
+
+    def __init__(self, coef: np.ndarray, intercept: float):
+        self.coef = coef
+        self.intercept = float(intercept)
+
+    @classmethod
+    def from_estimator(cls, model: LogisticRegression) -> '_CompiledLinear':
+        if model.coef_.shape[0] != 1:
+            raise TypeError("Only binary LogisticRegression models can be compiled")
+        return cls(np.asarray(model.coef_[0], dtype=np.float64), model.intercept_[0])
+
+    def predict_proba(self, X: np.ndarray, X32: Optional[np.ndarray] = None) -> np.ndarray:
+        proba = _expit(X @ self.coef + self.intercept)
+        return np.column_stack([1.0 - proba, proba])
+
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {f'{prefix}coef': self.coef, f'{prefix}intercept': np.asarray(self.intercept)}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str) -> '_CompiledLinear':
+        return cls(arrays[f'{prefix}coef'], float(arrays[f'{prefix}intercept']))
+
+
+_COMPILERS = {
+    RandomForestClassifier: _CompiledForest,
+    GradientBoostingClassifier: _CompiledBoosting,
+    LogisticRegression: _CompiledLinear,
+}
+_KINDS = {compiled.kind: compiled for compiled in _COMPILERS.values()}
+
+
+def _compile_estimator(model):
+    for estimator_type, compiled in _COMPILERS.items():
+        if type(model) is estimator_type:
+            return compiled.from_estimator(model)
+    raise TypeError(f"Cannot compile estimator of type {type(model).__name__}")
+
+
+class CompiledEnsemble:
+    """
+    Standalone NumPy evaluator for a fitted StackEnsembleModel.
+
+    Every base model and the meta-model are exported to packed arrays, so a
+    prediction is a handful of vectorized array operations with none of
+    sklearn's per-call validation and dispatch. Exposes the same prediction
+    interface as ``StackEnsembleModel``.
+    """
+
+    def __init__(self, base_models: List, meta_model: _CompiledLinear, classes: np.ndarray,
+                 feature_names: Optional[List[str]] = None,
+                 feature_importance: Optional[Dict[str, float]] = None,
+                 cascade_calibration: Optional[Dict] = None):
+        self.base_models = base_models
+        self.meta_model = meta_model
+        self.classes = classes
+        self.feature_names = feature_names
+        self.feature_importance_ = feature_importance
+        self.cascade_calibration_ = cascade_calibration
+        self.is_fitted = True
+
+    @classmethod
+    def from_model(cls, model) -> 'CompiledEnsemble':
+        """Compile a fitted StackEnsembleModel into packed arrays."""
+        classes = np.asarray(model.meta_model.classes_)
+        if len(classes) != 2:
+            raise TypeError("Only binary ensembles can be compiled")
+        for base_model in model.base_models:
+            if not np.array_equal(base_model.classes_, classes):
+                raise TypeError("All base models must share the meta-model's classes")
+        return cls(
+            base_models=[_compile_estimator(base_model) for base_model in model.base_models],
+            meta_model=_CompiledLinear.from_estimator(model.meta_model),
+            classes=classes,
+            feature_names=list(model.feature_names) if model.feature_names is not None else None,
+            feature_importance=model.feature_importance_,
+            cascade_calibration=getattr(model, 'cascade_calibration_', None)
+        )
+
+    def _as_array(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names is not None:
+                X = X[self.feature_names]
+            return X.to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def _base_model_outputs(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        X32 = X.astype(np.float32)
+        meta_features = np.empty((X.shape[0], len(self.base_models)))
+        base_predictions = np.empty((len(self.base_models), X.shape[0]), dtype=int)
+        for i, base_model in enumerate(self.base_models):
+            proba = base_model.predict_proba(X, X32)
+            meta_features[:, i] = proba[:, 1]
+            base_predictions[i] = self.classes.take(np.argmax(proba, axis=1))
+        return meta_features, base_predictions
+
+    def _calculate_confidence_metrics(self, base_predictions: np.ndarray, probas: np.ndarray) -> Dict[str, np.ndarray]:
+        n_models = base_predictions.shape[0]
+        pairs = [(i, j) for i in range(n_models) for j in range(i + 1, n_models)]
+        if pairs:
+            prediction_stability = np.mean(
+                [base_predictions[i] == base_predictions[j] for i, j in pairs], axis=0
+            )
+        else:
+            prediction_stability = np.ones(probas.shape[0])
+
+        return {
+            'model_confidence': np.max(probas, axis=1),
+            'prediction_stability': prediction_stability
+        }
+
+    def predict_proba(
+        self, X: Union[pd.DataFrame, np.ndarray],
+        observe: Optional[Callable[[str, float], None]] = None
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Predict class probabilities and per-row confidence metrics, see ``StackEnsembleModel.predict_proba``."""
+        X = self._as_array(X)
+        if observe is None:
+            meta_features, base_predictions = self._base_model_outputs(X)
+            probas = self.meta_model.predict_proba(meta_features)
+            return probas, self._calculate_confidence_metrics(base_predictions, probas)
+
+        started = time.perf_counter()
+        meta_features, base_predictions = self._base_model_outputs(X)
+        base_done = time.perf_counter()
+        probas = self.meta_model.predict_proba(meta_features)
+        meta_done = time.perf_counter()
+        confidence_metrics = self._calculate_confidence_metrics(base_predictions, probas)
+        observe('base_models', base_done - started)
+        observe('meta_model', meta_done - base_done)
+        observe('confidence', time.perf_counter() - meta_done)
+        return probas, confidence_metrics
+
+    def predict(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        probas, _ = self.predict_proba(X)
+        return self.classes.take(np.argmax(probas, axis=1))
+
+    def get_feature_importance(self) -> Dict[str, float]:
+        """Return the feature importance dictionary of the source model."""
+        if not self.feature_importance_:
+            raise ValueError("Model must be fitted before getting feature importance")
+        return self.feature_importance_
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Flatten the ensemble into a dict of NumPy arrays."""
+        arrays = {'classes': self.classes}
+        for i, base_model in enumerate(self.base_models):
+            arrays[f'base{i}_kind'] = np.asarray(base_model.kind)
+            arrays.update(base_model.to_arrays(f'base{i}_'))
+        arrays.update(self.meta_model.to_arrays('meta_'))
+        if self.feature_names is not None:
+            arrays['feature_names'] = np.asarray(self.feature_names)
+        if self.feature_importance_:
+            arrays['importance_names'] = np.asarray(list(self.feature_importance_.keys()))
+            arrays['importance_values'] = np.asarray(list(self.feature_importance_.values()), dtype=np.float64)
+        if self.cascade_calibration_ is not None:
+            rules = self.cascade_calibration_['rules']
+            arrays['cascade_linear_index'] = np.asarray(self.cascade_calibration_['linear_index'])
+            arrays['cascade_platt'] = np.asarray(self.cascade_calibration_['platt'], dtype=np.float64)
+            arrays['cascade_rule_names'] = np.asarray(list(rules), dtype=str)
+            arrays['cascade_rule_counts'] = np.asarray(
+                [[counts['hits'], counts['support']] for counts in rules.values()], dtype=np.int64
+            ).reshape(-1, 2)
+            if self.cascade_calibration_.get('feature_min') is not None:
+                arrays['cascade_feature_min'] = np.asarray(self.cascade_calibration_['feature_min'], dtype=np.float64)
+                arrays['cascade_feature_max'] = np.asarray(self.cascade_calibration_['feature_max'], dtype=np.float64)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'CompiledEnsemble':
+        """Rebuild an ensemble from ``to_arrays`` output."""
+        base_models = []
+        i = 0
+        while f'base{i}_kind' in arrays:
+            kind = str(arrays[f'base{i}_kind'])
+            base_models.append(_KINDS[kind].from_arrays(arrays, f'base{i}_'))
+            i += 1
+        feature_importance = None
+        if 'importance_names' in arrays:
+            feature_importance = {
+                str(name): float(value)
+                for name, value in zip(arrays['importance_names'], arrays['importance_values'])
+            }
+        cascade_calibration = None
+        if 'cascade_platt' in arrays:
+            cascade_calibration = {
+                'linear_index': int(arrays['cascade_linear_index']),
+                'platt': tuple(float(value) for value in arrays['cascade_platt']),
+                'rules': {
+                    str(name): {'hits': int(hits), 'support': int(support)}
+                    for name, (hits, support) in zip(arrays['cascade_rule_names'], arrays['cascade_rule_counts'])
+                },
+                'feature_min': arrays['cascade_feature_min'].tolist() if 'cascade_feature_min' in arrays else None,
+                'feature_max': arrays['cascade_feature_max'].tolist() if 'cascade_feature_max' in arrays else None,
+            }
+        return cls(
+            base_models=base_models,
+            meta_model=_CompiledLinear.from_arrays(arrays, 'meta_'),
+            classes=np.asarray(arrays['classes']),
+            feature_names=[str(name) for name in arrays['feature_names']] if 'feature_names' in arrays else None,
+            feature_importance=feature_importance,
+            cascade_calibration=cascade_calibration
+        )
+
+    def save(self, path: str):
+        """Save the packed arrays to a ``.npz`` file."""
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: str) -> 'CompiledEnsemble':
+        """Load an ensemble saved with ``save``."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls.from_arrays({name: data[name] for name in data.files})
+
+    def save_mmap(self, directory: str, extra: Optional[Dict[str, np.ndarray]] = None):
+        """
+        Save every array as its own ``.npy`` file in ``directory``.
+
+        Unlike ``.npz`` archives these files can be memory-mapped, so every
+        process loading them shares one read-only page-cache copy. The
+        directory is written next to its final location and renamed into
+        place, so readers never see a partial artifact.
+        """
+        arrays = self.to_arrays()
+        arrays.update(extra or {})
+        parent = os.path.dirname(os.path.abspath(directory))
+        staging = tempfile.mkdtemp(prefix='.compiled-', dir=parent)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, f'{name}.npy'), array, allow_pickle=False)
+            os.chmod(staging, 0o755)
+            os.rename(staging, directory)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    @staticmethod
+    def read_mmap_arrays(directory: str) -> Dict[str, np.ndarray]:
+        """Memory-map every ``.npy`` file written by ``save_mmap``."""
+        return {
+            name[:-len('.npy')]: np.load(os.path.join(directory, name), mmap_mode='r', allow_pickle=False)
+            for name in os.listdir(directory) if name.endswith('.npy')
+        }
+
+    @classmethod
+    def load_mmap(cls, directory: str) -> 'CompiledEnsemble':
+        """Load an ensemble saved with ``save_mmap`` without copying its arrays."""
+        return cls.from_arrays(cls.read_mmap_arrays(directory))
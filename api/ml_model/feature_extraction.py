@@ -1,8 +1,20 @@
+import math
 import re
+import string
+from collections import Counter
 from urllib.parse import urlparse
-import tld
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+
+from .public_suffix import PUBLIC_SUFFIXES, netloc_hostname
+
+# Character and keyword patterns shared with the batch extractor
+SUSPICIOUS_CHARS = '<>{}|[]~`'
+SUSPICIOUS_KEYWORDS = (
+    'login', 'account', 'update', 'security', 'verify',
+    'support', 'service', 'signin', 'payment'
+)
+FREE_DOMAIN_SUFFIXES = ('tk', 'ml', 'ga', 'cf', 'gq')
 
 def extract_advanced_features(url: str) -> Dict[str, Any]:
     """
@@ -43,21 +55,17 @@ def extract_advanced_features(url: str) -> Dict[str, Any]:
             'has_suspicious_chars': int(bool(re.search(r'[<>{}|\[\]~`]', url))),
             'has_ip_pattern': int(bool(re.match(r'\d+\.\d+\.\d+\.\d+', domain))),
             'has_suspicious_keywords': int(bool(re.search(
-                r'(login|account|update|security|verify|support|service|signin|payment)',
+                '(' + '|'.join(SUSPICIOUS_KEYWORDS) + ')',
                 url.lower()
             ))),
             'digit_ratio': sum(c.isdigit() for c in url) / len(url),
             'special_char_ratio': len(re.findall(r'[^a-zA-Z0-9]', url)) / len(url),
         })
         
-        # Domain specific features
-        try:
-            res = tld.get_tld(url, as_object=True)
-            features['domain_suffix_length'] = len(res.suffix) if res.suffix else 0
-            features['is_free_domain'] = int(res.suffix in ['tk', 'ml', 'ga', 'cf', 'gq'])
-        except:
-            features['domain_suffix_length'] = 0
-            features['is_free_domain'] = 0
+        # Domain specific features; hosts without a public suffix, such as IPs, get 0
+        suffix = PUBLIC_SUFFIXES.suffix(parsed.hostname)
+        features['domain_suffix_length'] = len(suffix) if suffix else 0
+        features['is_free_domain'] = int(suffix in FREE_DOMAIN_SUFFIXES)
             
         # URL entropy as a measure of randomness
         features['url_entropy'] = calculate_entropy(url)
@@ -65,16 +73,138 @@ def extract_advanced_features(url: str) -> Dict[str, Any]:
         return features
     except Exception as e:
         # Fallback with safe default values
-        return {
-            'url_length': 0, 'domain_length': 0, 'path_length': 0,
-            'query_length': 0, 'has_https': 0, 'num_dots': 0,
-            'num_digits': 0, 'num_params': 0, 'path_depth': 0,
-            'num_fragments': 0, 'has_suspicious_chars': 1,
-            'has_ip_pattern': 0, 'has_suspicious_keywords': 1,
-            'digit_ratio': 0, 'special_char_ratio': 0,
-            'domain_suffix_length': 0, 'is_free_domain': 1,
-            'url_entropy': 0
-        }
+        return dict(_DEFAULT_FEATURES)
+
+# Fallback values used when a URL cannot be analyzed
+_DEFAULT_FEATURES = {
+    'url_length': 0, 'domain_length': 0, 'path_length': 0,
+    'query_length': 0, 'has_https': 0, 'num_dots': 0,
+    'num_digits': 0, 'num_params': 0, 'path_depth': 0,
+    'num_fragments': 0, 'has_suspicious_chars': 1,
+    'has_ip_pattern': 0, 'has_suspicious_keywords': 1,
+    'digit_ratio': 0, 'special_char_ratio': 0,
+    'domain_suffix_length': 0, 'is_free_domain': 1,
+    'url_entropy': 0
+}
+
+_IP_PATTERN = re.compile(r'\d+\.\d+\.\d+\.\d+')
+_KEYWORD_PATTERN = re.compile('|'.join(SUSPICIOUS_KEYWORDS))
+
+# Character classes, looked up once per distinct character of a URL
+_ASCII_DIGITS = frozenset(string.digits)
+_ASCII_ALNUM = frozenset(string.ascii_letters + string.digits)
+_SUSPICIOUS_CHAR_SET = frozenset(SUSPICIOUS_CHARS)
+
+# n * log2(n) for every character count of a URL up to this length, so the
+# entropy needs no logarithm per distinct character
+_ENTROPY_TABLE_LENGTH = 4096
+_N_LOG2_N = [0.0] + [n * math.log2(n) for n in range(1, _ENTROPY_TABLE_LENGTH + 1)]
+
+# Plain http(s) URLs that ``urlparse`` would split without any special
+# handling: no path params, no IPv6 brackets and no stripped whitespace
+_SIMPLE_URL = re.compile(
+    r'([hH][tT][tT][pP][sS]?)://([^/?#\[\]\t\r\n]*)([^?#;\[\]\t\r\n]*)'
+    r'(?:\?([^#\t\r\n]*))?(?:#([^\t\r\n]*))?\Z'
+)
+
+def _split_url(url: str) -> Tuple[str, str, str, str, str]:
+    """Return (scheme, netloc, path, query, fragment) exactly as ``urlparse`` would."""
+    match = _SIMPLE_URL.match(url)
+    if match is not None:
+        scheme, domain, path, query, fragment = match.groups()
+        return scheme.lower(), domain, path, query or '', fragment or ''
+    parsed = urlparse(url)
+    return parsed.scheme, parsed.netloc, parsed.path, parsed.query, parsed.fragment
+
+# Suffix lookups only depend on the host, which repeats heavily in real traffic
+_SUFFIX_CACHE_SIZE = 100000
+_suffix_cache: Dict[str, Tuple[int, int]] = {}
+
+def _suffix_features(netloc: str) -> Tuple[int, int]:
+    """Return (domain_suffix_length, is_free_domain) for a URL's netloc, cached."""
+    cached = _suffix_cache.get(netloc)
+    if cached is None:
+        suffix = PUBLIC_SUFFIXES.suffix(netloc_hostname(netloc))
+        cached = (len(suffix) if suffix else 0, int(suffix in FREE_DOMAIN_SUFFIXES))
+        if len(_suffix_cache) < _SUFFIX_CACHE_SIZE:
+            _suffix_cache[netloc] = cached
+    return cached
+
+def extract_feature_vector(url: str, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Extract features straight into a float array in ``get_feature_names()`` order.
+    
+    Produces the same values as ``extract_advanced_features`` without building
+    a dict, so the serving path can fill preallocated rows. This is the
+    single-URL kernel: one pass over the URL builds its character histogram,
+    and the digit, special and suspicious character counts and the entropy
+    all come from the histogram's distinct characters rather than from
+    further scans. The keyword check is one precompiled pattern over the
+    lowercased URL, which measures faster than a case-insensitive pattern.
+    
+    Parameters:
+    -----------
+    url : str
+        The URL to analyze
+    out : np.ndarray, optional
+        Row of length ``len(get_feature_names())`` to write into
+        
+    Returns:
+    --------
+    np.ndarray
+        The filled feature row
+    """
+    if out is None:
+        out = np.empty(len(_DEFAULT_FEATURES), dtype=np.float64)
+    try:
+        scheme, domain, path, query, fragment = _split_url(url)
+        url_length = len(url)
+        histogram = Counter(url)
+        count = histogram.__getitem__
+        chars = histogram.keys()
+        num_digits = sum(map(count, chars & _ASCII_DIGITS))
+        num_special = url_length - sum(map(count, chars & _ASCII_ALNUM))
+        if not url.isascii():
+            # Other scripts' digits count for ``isdigit`` but are special characters
+            num_digits += sum(count(c) for c in chars if not c.isascii() and c.isdigit())
+        if url_length <= _ENTROPY_TABLE_LENGTH:
+            spread = sum(map(_N_LOG2_N.__getitem__, histogram.values()))
+        else:
+            spread = sum(n * math.log2(n) for n in histogram.values())
+        segments = path.split('/')
+        
+        out[:] = (
+            url_length,
+            len(domain),
+            len(path),
+            len(query),
+            scheme == 'https',
+            domain.count('.'),
+            num_digits,
+            query.count('&') + 1 if query else 0,
+            len(segments) - segments.count(''),
+            fragment.count('&') + 1 if fragment else 0,
+            not chars.isdisjoint(_SUSPICIOUS_CHAR_SET),
+            _IP_PATTERN.match(domain) is not None,
+            _KEYWORD_PATTERN.search(url.lower()) is not None,
+            num_digits / url_length,
+            num_special / url_length,
+            *_suffix_features(domain),
+            # Shannon entropy, -sum(p * log2(p)) with p = n / url_length
+            math.log2(url_length) - spread / url_length
+        )
+    except Exception:
+        out[:] = [_DEFAULT_FEATURES[name] for name in get_feature_names()]
+    return out
+
+def feature_vector_to_dict(vector: np.ndarray) -> Dict[str, Any]:
+    """Convert a feature row back to the dict returned by ``extract_advanced_features``."""
+    return {
+        name: float(value) if name in _RATIO_FEATURES else int(value)
+        for name, value in zip(get_feature_names(), vector)
+    }
+
+_RATIO_FEATURES = frozenset(['digit_ratio', 'special_char_ratio', 'url_entropy'])
 
 def calculate_entropy(text: str) -> float:
     """Calculate Shannon entropy of a string."""
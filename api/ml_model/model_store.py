@@ -0,0 +1,102 @@
+"""
+Versioned model artifacts with an atomically updated current artifact.
+
+Every published model is written once as ``<stem>-<UTC timestamp><ext>`` next
+to the current artifact path (``stack_ensemble_model.joblib``), which is then
+swapped to the new version with a single ``os.replace``. Readers therefore see
+either the old or the new model, never a missing or half-written file, and
+older versions stay on disk for rollback.
+"""
+
+import glob
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+
+def artifact_version(path: str) -> str:
+    """Identify a model artifact by a short hash of its contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _version_pattern(model_path: str) -> str:
+    stem, ext = os.path.splitext(model_path)
+    return f"{glob.escape(stem)}-*{ext}"
+
+
+def list_versions(model_path: str) -> List[str]:
+    """Return the versioned artifacts of ``model_path``, oldest first."""
+    return sorted(glob.glob(_version_pattern(model_path)))
+
+
+def activate_version(model_path: str, version_path: str):
+    """Atomically make ``version_path`` the current artifact at ``model_path``."""
+    if os.path.abspath(version_path) not in map(os.path.abspath, list_versions(model_path)):
+        raise ValueError(f"{version_path} is not a version of {model_path}")
+    directory = os.path.dirname(os.path.abspath(model_path))
+    staging = os.path.join(directory, f'.current-{uuid.uuid4().hex}')
+    try:
+        try:
+            # A hard link costs nothing; copy where the filesystem has none
+            os.link(version_path, staging)
+        except OSError:
+            shutil.copy2(version_path, staging)
+        os.replace(staging, model_path)
+    except BaseException:
+        if os.path.exists(staging):
+            os.remove(staging)
+        raise
+    logger.info(f"Activated {os.path.basename(version_path)} as {model_path}")
+
+
+def publish_model(model, model_path: str, keep: int = 5) -> str:
+    """
+    Save ``model`` as a new version and make it the current artifact.
+
+    Parameters:
+    -----------
+    model : StackEnsembleModel
+        Fitted model to publish
+    model_path : str
+        Current artifact path served by the API
+    keep : int
+        Number of most recent versions kept on disk; 0 keeps all of them
+
+    Returns:
+    --------
+    str
+        Path of the new versioned artifact
+    """
+    directory = os.path.dirname(os.path.abspath(model_path))
+    os.makedirs(directory, exist_ok=True)
+    stem, ext = os.path.splitext(model_path)
+    version_path = f"{stem}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S%fZ}{ext}"
+
+    fd, staging = tempfile.mkstemp(prefix='.publish-', suffix=ext, dir=directory)
+    os.close(fd)
+    try:
+        model.save_model(staging)
+        os.chmod(staging, 0o644)
+        os.replace(staging, version_path)
+    except BaseException:
+        if os.path.exists(staging):
+            os.remove(staging)
+        raise
+
+    activate_version(model_path, version_path)
+
+    if keep > 0:
+        for old in list_versions(model_path)[:-keep]:
+            os.remove(old)
+    return version_path
@@ -0,0 +1,117 @@
+"""
+Public suffix matching from a bundled snapshot of the Public Suffix List.
+
+The list is parsed once, when this module is imported, into a trie keyed by
+domain labels from right to left, so a lookup walks at most as many nodes
+as the host has labels and never touches the network or the disk. Matches
+are the same as ``tld.get_tld`` over the same list, including its handling
+of wildcard and exception rules and of punycode names that only appear in
+comments, so the features the models were trained on do not change.
+
+To refresh the snapshot, replace ``public_suffix_list.dat`` with
+https://publicsuffix.org/list/public_suffix_list.dat and retrain.
+"""
+
+import os
+from typing import Iterable, Optional, Tuple
+from urllib.parse import SplitResult
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public_suffix_list.dat')
+
+# Node keys that cannot be labels, since labels never contain a dot
+_LEAF = '.leaf'
+_EXCEPTION = '.exception'
+
+
+class PublicSuffixTrie:
+    """
+    Reversed-label trie of public suffix rules.
+
+    Each node is a dict from label to child node; rule ends are marked with
+    ``_LEAF`` and an exception rule's label is stored under ``_EXCEPTION``.
+    """
+
+    def __init__(self):
+        self.root = {}
+        self.rules = 0
+
+    def add(self, rule: str):
+        """Add one rule, e.g. 'co.uk', '*.ck' or '!www.ck'."""
+        node = self.root
+        for label in reversed(rule.split('.')):
+            if label.startswith('!'):
+                # As in ``tld``, the exception's parent also becomes a rule end
+                node[_EXCEPTION] = label[1:]
+                break
+            node = node.setdefault(label, {})
+        node[_LEAF] = True
+        self.rules += 1
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> 'PublicSuffixTrie':
+        """Build a trie from the lines of a public suffix list file, private domains included."""
+        trie = cls()
+        for line in lines:
+            # Some punycode names only appear in comments
+            if '// xn--' in line:
+                line = line.split()[1]
+            line = line.strip()
+            if not line or line[0] == '/':
+                continue
+            trie.add(line)
+        return trie
+
+    @classmethod
+    def load(cls, path: str = SNAPSHOT_PATH) -> 'PublicSuffixTrie':
+        """Build a trie from the public suffix list file at ``path``."""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_lines(f)
+
+    def split(self, hostname: Optional[str]) -> Optional[Tuple[str, str]]:
+        """
+        Return the (suffix, registered domain) of a lowercase hostname.
+
+        For 'www.example.co.uk' that is ('co.uk', 'example.co.uk'). A host
+        that is itself a public suffix is returned for both, and so is the
+        suffix of a host with an empty label before it, like 'a..tk'. None
+        when the host is empty or no rule matches, e.g. for IP addresses.
+        """
+        if not hostname:
+            return None
+        labels = hostname.rstrip('.').split('.')
+        node = self.root
+        depth = 0
+        matched = 0
+        for label in reversed(labels):
+            if label == node.get(_EXCEPTION):
+                break
+            child = node.get(label)
+            if child is None:
+                child = node.get('*')
+                if child is None:
+                    break
+            depth += 1
+            node = child
+            if _LEAF in node:
+                matched = depth
+        if not matched:
+            return None
+        if matched == len(labels):
+            return hostname, hostname
+        suffix = '.'.join(labels[-matched:])
+        label = labels[-matched - 1]
+        return suffix, f"{label}.{suffix}" if label else suffix
+
+    def suffix(self, hostname: Optional[str]) -> Optional[str]:
+        """Public suffix of a lowercase hostname, see ``split``."""
+        result = self.split(hostname)
+        return result[0] if result is not None else None
+
+
+def netloc_hostname(netloc: str) -> Optional[str]:
+    """Lowercase hostname of a URL's netloc, as ``urlsplit(url).hostname`` returns it."""
+    return SplitResult('', netloc, '', '', '').hostname
+
+
+# Built once per process, at import, so no request pays for it
+PUBLIC_SUFFIXES = PublicSuffixTrie.load()
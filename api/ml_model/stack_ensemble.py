@@ -1,17 +1,77 @@
 import numpy as np
 import pandas as pd
 import joblib
+from joblib import Parallel, delayed
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import cross_val_predict
+from sklearn.model_selection import check_cv
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+import copy
 import logging
 import os
-from typing import Dict, List, Tuple, Optional, Union
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple, Optional, Union
+
+from api.ml_model.cascade import calibrate_cascade, find_linear_model
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Folds used to produce the out-of-fold meta-features
+CV_FOLDS = 5
+# Training rows kept with the model so incremental updates do not forget earlier data
+REPLAY_BUFFER_SIZE = 5000
+# Share of the update rows held out to refit the meta-model on unseen base model outputs
+UPDATE_META_HOLDOUT = 0.2
+
+
+def _fit_one(estimator, X: np.ndarray, y: np.ndarray, train: Optional[np.ndarray], test: Optional[np.ndarray]):
+    """
+    Fit ``estimator`` on the ``train`` rows (all rows when None).
+
+    Returns the fitted estimator, its positive-class probabilities for the
+    ``test`` rows (None without ``test``) and the seconds the fit took.
+    """
+    started = time.perf_counter()
+    if train is None:
+        estimator.fit(X, y)
+    else:
+        estimator.fit(X[train], y[train])
+    proba = estimator.predict_proba(X[test])[:, 1] if test is not None else None
+    return estimator, proba, time.perf_counter() - started
+
+
+def _update_one(estimator, X: np.ndarray, y: np.ndarray, sample_weight: np.ndarray, extra_estimators: int):
+    """
+    Update a fitted base model with new rows, keeping what it already learned where it can.
+
+    Ensembles with ``warm_start`` (random forests, gradient boosting) get
+    ``extra_estimators`` more trees or stages fitted on the rows; other
+    models with ``warm_start`` are refitted starting from their current
+    coefficients, and the rest are refitted from scratch. With
+    ``extra_estimators=0`` ensembles are left unchanged.
+
+    Returns the updated estimator and the seconds the update took.
+    """
+    started = time.perf_counter()
+    params = estimator.get_params()
+    if 'n_estimators' in params and 'warm_start' in params:
+        if extra_estimators > 0:
+            estimator.set_params(warm_start=True, n_estimators=params['n_estimators'] + extra_estimators)
+            estimator.fit(X, y, sample_weight=sample_weight)
+            # A later fit or clone should start from scratch again
+            estimator.set_params(warm_start=False)
+    elif 'warm_start' in params:
+        estimator.set_params(warm_start=True)
+        estimator.fit(X, y, sample_weight=sample_weight)
+        estimator.set_params(warm_start=params['warm_start'])
+    else:
+        estimator.fit(X, y, sample_weight=sample_weight)
+    return estimator, time.perf_counter() - started
+
+
 class StackEnsembleModel:
     """
     Enhanced stacking ensemble model for URL safety prediction with confidence scores
@@ -50,34 +110,226 @@ class StackEnsembleModel:
         self.feature_names = None
         self.feature_importance_ = None
     
-    def fit(self, X: pd.DataFrame, y: np.ndarray) -> 'StackEnsembleModel':
+    def fit(self, X: pd.DataFrame, y: np.ndarray, n_jobs: Optional[int] = None) -> 'StackEnsembleModel':
         """
         Train the stacking ensemble model with feature importance tracking.
+        
+        The out-of-fold fits of every base model and the full-data refits
+        are independent, so all of them run as one batch of jobs on
+        ``n_jobs`` workers (joblib semantics: None is serial, -1 uses every
+        core). Folds and random states are the same as a serial
+        ``cross_val_predict``, so the result does not depend on ``n_jobs``.
+        
+        The fold estimators are kept in ``cv_estimators_`` together with
+        their out-of-fold accuracy in ``cv_scores_``, and wall-clock seconds
+        per stage are recorded in ``fit_timings_``. Fold estimators are not
+        saved with the model. The out-of-fold outputs also calibrate the
+        cascade stages, see ``api.ml_model.cascade``.
         """
+        started = time.perf_counter()
         # Convert to DataFrame if not already
         if not isinstance(X, pd.DataFrame):
             X = pd.DataFrame(X)
         
         self.feature_names = X.columns.tolist()
-        meta_features = np.zeros((X.shape[0], len(self.base_models)))
+        # Base models see plain arrays; the column order lives in feature_names
+        X = X.to_numpy(dtype=np.float64)
+        y = np.asarray(y)
+        folds = list(check_cv(CV_FOLDS, y, classifier=True).split(X, y))
         
-        # Train base models and generate meta-features
+        # One job per (base model, fold) plus one full-data refit per base model
+        jobs = []
         for i, model in enumerate(self.base_models):
-            meta_features[:, i] = cross_val_predict(
-                model, X, y, cv=5, method='predict_proba'
-            )[:, 1]
-            model.fit(X, y)
+            jobs.append((i, None))
+            jobs.extend((i, k) for k in range(len(folds)))
+        base_started = time.perf_counter()
+        fitted = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_one)(
+                clone(self.base_models[i]), X, y,
+                folds[k][0] if k is not None else None,
+                folds[k][1] if k is not None else None
+            )
+            for i, k in jobs
+        )
+        base_done = time.perf_counter()
+        
+        meta_features = np.zeros((X.shape[0], len(self.base_models)))
+        self.cv_estimators_ = [[None] * len(folds) for _ in self.base_models]
+        fit_seconds = [0.0] * len(self.base_models)
+        for (i, k), (estimator, proba, seconds) in zip(jobs, fitted):
+            fit_seconds[i] += seconds
+            if k is None:
+                self.base_models[i] = estimator
+            else:
+                meta_features[folds[k][1], i] = proba
+                self.cv_estimators_[i][k] = estimator
+        # Out-of-fold accuracy of each base model, from predictions already made
+        self.cv_scores_ = {
+            type(model).__name__: float(np.mean((meta_features[:, i] > 0.5) == y))
+            for i, model in enumerate(self.base_models)
+        }
         
         # Train meta-model
         self.meta_model.fit(meta_features, y)
+        meta_done = time.perf_counter()
+        
+        linear_index = find_linear_model(self.base_models)
+        self.cascade_calibration_ = None if linear_index is None else calibrate_cascade(
+            X, y, self.feature_names, linear_index, meta_features[:, linear_index], y
+        )
+        
+        # Sample of the training rows that later updates replay alongside their new rows
+        keep = np.random.RandomState(42).permutation(len(y))[:REPLAY_BUFFER_SIZE]
+        keep.sort()
+        self.replay_X_ = X[keep]
+        self.replay_y_ = y[keep]
+        self.update_history_ = []
         
         # Calculate feature importance
-        self.feature_importance_ = self._calculate_feature_importance(X)
+        self.feature_importance_ = self._calculate_feature_importance()
+        
+        self.fit_timings_ = {
+            'base_models': base_done - base_started,
+            # Sum of the individual fits, i.e. the serial cost of the stage
+            'base_models_serial': sum(fit_seconds),
+            'meta_model': meta_done - base_done,
+            'fit': time.perf_counter() - started,
+        }
+        self.fit_timings_.update({
+            f'fit.{type(model).__name__}': seconds for model, seconds in zip(self.base_models, fit_seconds)
+        })
+        logger.info(
+            f"Fitted {len(jobs)} base model jobs in {self.fit_timings_['base_models']:.2f}s "
+            f"({self.fit_timings_['base_models_serial']:.2f}s of fitting), "
+            f"meta-model in {self.fit_timings_['meta_model']:.2f}s"
+        )
         
         self.is_fitted = True
         return self
     
-    def _calculate_feature_importance(self, X: pd.DataFrame) -> Dict[str, float]:
+    def update(self, X: Union[pd.DataFrame, np.ndarray], y: np.ndarray, extra_estimators: int = 20,
+               new_weight: float = 1.0, n_jobs: Optional[int] = None,
+               random_state: Optional[int] = 0) -> 'StackEnsembleModel':
+        """
+        Update the fitted ensemble with newly labeled rows instead of retraining it.
+        
+        The new rows are combined with the replay buffer of earlier training
+        rows kept with the model. Every base model is updated on most of
+        them: tree ensembles grow by ``extra_estimators`` warm-started trees
+        or boosting stages, logistic regression is refitted starting from its
+        current coefficients. The meta-model is then refitted on the base
+        model outputs for the held-out rest, so it weighs models that have
+        not seen those rows, as the out-of-fold fit in ``fit`` does; the
+        cascade calibration is refitted on the same rows. Finally
+        the new rows join the buffer, which keeps the most recent
+        ``REPLAY_BUFFER_SIZE`` rows.
+        
+        Tree ensembles grow with every update, so scoring gets slower and
+        the artifact larger until the next full ``fit``.
+        
+        Parameters:
+        -----------
+        X : Union[pd.DataFrame, np.ndarray]
+            Feature rows of the newly labeled URLs
+        y : np.ndarray
+            Their labels, 1 for malicious
+        extra_estimators : int
+            Trees or stages added to each tree ensemble; 0 only refits the
+            non-ensemble base models and the meta-model
+        new_weight : float
+            Sample weight of the new rows relative to the replayed ones
+        n_jobs : Optional[int]
+            Workers updating the base models (joblib semantics)
+        random_state : Optional[int]
+            Seed of the split into base model and meta-model rows
+        
+        Returns:
+        --------
+        StackEnsembleModel
+            This model, updated; on error it is left unchanged
+        """
+        if not hasattr(self.meta_model, 'classes_'):
+            raise ValueError("Model must be fitted before it can be updated")
+        started = time.perf_counter()
+        X = self._as_array(X)
+        y = np.asarray(y)
+        replay_X = getattr(self, 'replay_X_', None)
+        if replay_X is None:
+            # Artifacts from before the replay buffer only learn from the new rows
+            logger.warning("Model has no replay buffer; updating from the new rows only")
+            replay_X, replay_y = X[:0], y[:0]
+        else:
+            replay_y = self.replay_y_
+        X_all = np.vstack([replay_X, X])
+        y_all = np.concatenate([replay_y, y])
+        weights = np.concatenate([np.ones(len(replay_y)), np.full(len(y), float(new_weight))])
+        
+        order = np.random.RandomState(random_state).permutation(len(y_all))
+        n_meta = int(len(order) * UPDATE_META_HOLDOUT)
+        meta_rows, base_rows = order[:n_meta], order[n_meta:]
+        if len(np.unique(y_all[base_rows])) < 2:
+            raise ValueError("Update needs rows of both classes, counting the replay buffer")
+        
+        base_models = Parallel(n_jobs=n_jobs)(
+            delayed(_update_one)(
+                copy.deepcopy(model), X_all[base_rows], y_all[base_rows], weights[base_rows], extra_estimators
+            )
+            for model in self.base_models
+        )
+        base_done = time.perf_counter()
+        
+        meta_model = self.meta_model
+        calibration = getattr(self, 'cascade_calibration_', None)
+        if len(np.unique(y_all[meta_rows])) == 2:
+            meta_model = clone(self.meta_model)
+            previous = self.base_models
+            self.base_models = [model for model, _ in base_models]
+            try:
+                meta_features = self._get_meta_features(X_all[meta_rows])
+            finally:
+                self.base_models = previous
+            meta_model.fit(meta_features, y_all[meta_rows], sample_weight=weights[meta_rows])
+            linear_index = find_linear_model(self.base_models)
+            if linear_index is not None:
+                calibration = calibrate_cascade(
+                    X_all, y_all, self.feature_names, linear_index,
+                    meta_features[:, linear_index], y_all[meta_rows]
+                )
+        else:
+            logger.warning("Too few held-out rows of both classes; keeping the current meta-model")
+        
+        # Nothing is changed until every model has been updated
+        self.base_models = [model for model, _ in base_models]
+        self.meta_model = meta_model
+        self.cascade_calibration_ = calibration
+        self.feature_importance_ = self._calculate_feature_importance()
+        self.replay_X_ = np.vstack([replay_X, X])[-REPLAY_BUFFER_SIZE:]
+        self.replay_y_ = np.concatenate([replay_y, y])[-REPLAY_BUFFER_SIZE:]
+        
+        history = getattr(self, 'update_history_', None)
+        if history is None:
+            history = self.update_history_ = []
+        history.append({
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+            'rows': int(len(y)),
+            'replayed_rows': int(len(replay_y)),
+            'extra_estimators': int(extra_estimators),
+            'seconds': time.perf_counter() - started,
+            'base_models_seconds': base_done - started,
+        })
+        logger.info(
+            f"Updated ensemble with {len(y)} new and {len(replay_y)} replayed rows "
+            f"in {history[-1]['seconds']:.2f}s"
+        )
+        return self
+    
+    def __getstate__(self):
+        # Fold estimators are a training by-product and would multiply the artifact size
+        state = self.__dict__.copy()
+        state.pop('cv_estimators_', None)
+        return state
+    
+    def _calculate_feature_importance(self) -> Dict[str, float]:
         """Calculate aggregated feature importance from base models."""
         importance_dict = {}
         
@@ -89,84 +341,133 @@ class StackEnsembleModel:
             else:
                 continue
                 
-            for feat, imp in zip(X.columns, importances):
+            for feat, imp in zip(self.feature_names, importances):
                 importance_dict[feat] = importance_dict.get(feat, 0) + imp
                 
         # Normalize importances
         total = sum(importance_dict.values())
         return {k: v/total for k, v in importance_dict.items()}
     
+    def _as_array(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """Return X as a float array in the column order the model was fitted with."""
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names is not None:
+                X = X[self.feature_names]
+            return X.to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+    
     def predict(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
         """Make predictions with the ensemble model."""
         try:
-            # Convert to DataFrame if not already
-            if not isinstance(X, pd.DataFrame):
-                X = pd.DataFrame(X)
-            
+            X = self._as_array(X)
             meta_features = self._get_meta_features(X)
             return self.meta_model.predict(meta_features)
         except Exception as e:
             logger.error(f"Error in predict method: {str(e)}")
             return np.zeros(len(X), dtype=int)
     
-    def predict_proba(self, X: Union[pd.DataFrame, np.ndarray]) -> Tuple[np.ndarray, Dict[str, float]]:
+    def predict_proba(
+        self, X: Union[pd.DataFrame, np.ndarray],
+        observe: Optional[Callable[[str, float], None]] = None
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
         """
-        Predict class probabilities and return confidence metrics.
+        Predict class probabilities and return per-row confidence metrics.
+        
+        Every base model is evaluated exactly once; the agreement between base
+        models is derived from the probabilities already computed. Arrays are
+        used as-is and must follow the ``feature_names`` column order.
+        
+        Parameters:
+        -----------
+        X : Union[pd.DataFrame, np.ndarray]
+            Feature rows to score
+        observe : Optional[Callable[[str, float], None]]
+            Called with (stage, seconds) for the 'base_models', 'meta_model'
+            and 'confidence' stages; stages are not timed when omitted
         
         Returns:
         --------
-        Tuple[np.ndarray, Dict[str, float]]
+        Tuple[np.ndarray, Dict[str, np.ndarray]]
             - Array of shape (n_samples, 2) with class probabilities
-            - Dictionary with confidence metrics
+            - Dictionary mapping each confidence metric to an array of shape (n_samples,)
         """
         try:
-            # Convert to DataFrame if not already
-            if not isinstance(X, pd.DataFrame):
-                X = pd.DataFrame(X)
+            X = self._as_array(X)
+            if observe is None:
+                meta_features, base_predictions = self._base_model_outputs(X)
+                probas = self.meta_model.predict_proba(meta_features)
+                
+                # Calculate confidence metrics
+                confidence_metrics = self._calculate_confidence_metrics(base_predictions, probas)
+                
+                return probas, confidence_metrics
             
-            meta_features = self._get_meta_features(X)
+            started = time.perf_counter()
+            meta_features, base_predictions = self._base_model_outputs(X)
+            base_done = time.perf_counter()
             probas = self.meta_model.predict_proba(meta_features)
-            
-            # Calculate confidence metrics
-            confidence_metrics = self._calculate_confidence_metrics(X, meta_features, probas)
-            
+            meta_done = time.perf_counter()
+            confidence_metrics = self._calculate_confidence_metrics(base_predictions, probas)
+            observe('base_models', base_done - started)
+            observe('meta_model', meta_done - base_done)
+            observe('confidence', time.perf_counter() - meta_done)
             return probas, confidence_metrics
         except Exception as e:
             logger.error(f"Error in predict_proba method: {str(e)}")
             default_probas = np.zeros((len(X), 2))
             default_probas[:, 0] = 0.8  # 80% safe
             default_probas[:, 1] = 0.2  # 20% malicious
-            return default_probas, {'model_confidence': 0.2, 'prediction_stability': 0.0}
+            return default_probas, {
+                'model_confidence': np.full(len(X), 0.2),
+                'prediction_stability': np.zeros(len(X))
+            }
     
-    def _get_meta_features(self, X: pd.DataFrame) -> np.ndarray:
-        """Generate meta-features from base models."""
+    def _base_model_outputs(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Run every base model once.
+        
+        Returns:
+        --------
+        Tuple[np.ndarray, np.ndarray]
+            - Meta-features of shape (n_samples, n_base_models)
+            - Predicted classes of shape (n_base_models, n_samples)
+        """
         meta_features = np.zeros((X.shape[0], len(self.base_models)))
+        base_predictions = np.zeros((len(self.base_models), X.shape[0]), dtype=int)
         for i, model in enumerate(self.base_models):
-            meta_features[:, i] = model.predict_proba(X)[:, 1]
-        return meta_features
+            proba = model.predict_proba(X)
+            meta_features[:, i] = proba[:, 1]
+            base_predictions[i] = model.classes_.take(np.argmax(proba, axis=1))
+        return meta_features, base_predictions
+    
+    def _get_meta_features(self, X: np.ndarray) -> np.ndarray:
+        """Generate meta-features from base models."""
+        return self._base_model_outputs(X)[0]
     
     def _calculate_confidence_metrics(
-        self, X: pd.DataFrame, 
-        meta_features: np.ndarray, 
+        self, base_predictions: np.ndarray,
         probas: np.ndarray
-    ) -> Dict[str, float]:
+    ) -> Dict[str, np.ndarray]:
         """
-        Calculate various confidence metrics for the prediction.
+        Calculate confidence metrics for every row of the prediction.
         """
         # Model confidence (probability of predicted class)
-        model_confidence = np.max(probas, axis=1).mean()
-        
-        # Prediction stability (agreement between base models)
-        base_predictions = np.array([model.predict(X) for model in self.base_models])
-        prediction_stability = np.mean(
-            [np.mean(base_predictions[i] == base_predictions[j]) 
-             for i in range(len(self.base_models)) 
-             for j in range(i+1, len(self.base_models))]
-        )
+        model_confidence = np.max(probas, axis=1)
+        
+        # Prediction stability (share of base model pairs that agree on the row)
+        n_models = base_predictions.shape[0]
+        pairs = [(i, j) for i in range(n_models) for j in range(i + 1, n_models)]
+        if pairs:
+            prediction_stability = np.mean(
+                [base_predictions[i] == base_predictions[j] for i, j in pairs], axis=0
+            )
+        else:
+            prediction_stability = np.ones(probas.shape[0])
         
         return {
-            'model_confidence': float(model_confidence),
-            'prediction_stability': float(prediction_stability)
+            'model_confidence': model_confidence,
+            'prediction_stability': prediction_stability
         }
     
     def get_feature_importance(self) -> Dict[str, float]:
@@ -185,16 +486,42 @@ class StackEnsembleModel:
         
         joblib.dump(self, path)
     
+    def _strip_estimator_feature_names(self):
+        """
+        Let base models from older artifacts accept plain arrays.
+        
+        Those base models were fitted on DataFrames and would warn on every
+        array input; the ensemble itself now guarantees the column order.
+        """
+        for model in self.base_models:
+            names = getattr(model, 'feature_names_in_', None)
+            if names is None:
+                continue
+            if self.feature_names is not None and list(names) != list(self.feature_names):
+                raise ValueError("Base model feature names do not match the ensemble's feature names")
+            del model.feature_names_in_
+    
     @classmethod
-    def load_model(cls, path: str) -> 'StackEnsembleModel':
-        """Load a model from a file or create a new one if loading fails."""
+    def load_model(cls, path: str, strict: bool = False) -> 'StackEnsembleModel':
+        """
+        Load a model from a file or create a new one if loading fails.
+
+        With ``strict=True`` loading errors are raised instead, and an
+        artifact that is not a fitted ``StackEnsembleModel`` is rejected.
+        """
         try:
             model = joblib.load(path)
+            # is_fitted is always True, so look for the fitted meta-model instead
+            if strict and not (isinstance(model, cls) and hasattr(model.meta_model, 'classes_')):
+                raise ValueError(f"{path} does not contain a fitted {cls.__name__}")
+            model._strip_estimator_feature_names()
             # Ensure is_fitted is True
             model.is_fitted = True
             return model
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
+            if strict:
+                raise
             # Create a new model instance
             model = cls()
             # Ensure is_fitted is True
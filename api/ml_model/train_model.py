@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 import joblib
 import numpy as np
 import pandas as pd
@@ -7,6 +8,7 @@ from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from typing import Dict
 import logging
 
 # Add parent directory to Python path for imports
@@ -15,75 +17,176 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 # Import the enhanced modules
 from api.ml_model.stack_ensemble import StackEnsembleModel
 from api.ml_model.feature_extraction import extract_advanced_features, get_feature_names
+from api.ml_model.model_store import publish_model
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Components of the synthetic training URLs
+_PROTOCOLS = ['http://', 'https://']
+_DOMAINS = ['example.com', 'test.com', 'secure.com', 'login.com']
+_PATHS = ['', '/login', '/account', '/secure', '/update']
+
+# Samples parsed per block of random words, and distinct URLs whose feature
+# dicts are held at once; both bound memory
+_SAMPLE_BLOCK = 262144
+_FEATURE_BLOCK = 100000
+
+
+def _next_accepted(accepted: np.ndarray) -> np.ndarray:
+    """For every position, the first position at or after it where ``accepted`` holds (len when none)."""
+    n = len(accepted)
+    candidates = np.where(accepted, np.arange(n), n)
+    following = np.minimum.accumulate(candidates[::-1])[::-1]
+    # Padding lets lookups run past the end; they then point past the end too
+    return np.concatenate([following, np.full(8, n)])
+
+
+def _parse_samples(words: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Decode one sample as if it started at every position of ``words``.
+
+    ``words`` are raw 32-bit MT19937 outputs of the legacy ``np.random``
+    stream. Each sample consumes them the way the original per-sample loop
+    did: ``choice`` and ``randint`` draw one word per attempt and reject
+    masked values out of range, ``random`` combines two words into a double.
+    ``end`` is where the next sample starts, or beyond ``len(words)`` when
+    the sample runs past the available words.
+    """
+    n = len(words)
+    w = np.concatenate([words, np.zeros(8, dtype=words.dtype)]).astype(np.int64)
+    position = np.arange(n)
+
+    def read(at):
+        return w[np.minimum(at, n + 7)]
+
+    def uniform(at):
+        return ((read(at) >> 5) * 67108864.0 + (read(at + 1) >> 6)) / 9007199254740992.0
+
+    protocol = read(position) & 1
+    domain = read(position + 1) & 3
+    path_at = _next_accepted((w[:n] & 7) <= 4)[np.minimum(position + 2, n + 7)]
+    path = read(path_at) & 7
+    has_query = uniform(path_at + 1) > 0.5
+
+    id_at = _next_accepted((w[:n] & 1023) <= 999)[np.minimum(path_at + 3, n + 7)]
+    has_token = has_query & (uniform(id_at + 1) > 0.7)
+    token_at = _next_accepted((w[:n] & 16383) <= 9999)[np.minimum(id_at + 3, n + 7)]
+
+    end = np.where(has_query, np.where(has_token, token_at + 1, id_at + 3), path_at + 3)
+    return {
+        'protocol': protocol,
+        'domain': domain,
+        'path': path,
+        'id': np.where(has_query, read(id_at) & 1023, -1),
+        'token': np.where(has_token, read(token_at) & 16383, -1),
+        'end': end,
+    }
+
+
+def _draw_samples(n_samples: int) -> Dict[str, np.ndarray]:
+    """
+    Draw URL components for ``n_samples`` from the global ``np.random`` state.
+
+    Returns exactly the values the original per-sample loop drew, and leaves
+    the global state where that loop left it.
+    """
+    source = np.random.RandomState()
+    source.set_state(np.random.get_state())
+    columns = {name: [] for name in ('protocol', 'domain', 'path', 'id', 'token')}
+    pending = np.empty(0, dtype=np.uint32)
+    consumed = 0
+    remaining = n_samples
+    while remaining > 0:
+        block = min(remaining, _SAMPLE_BLOCK)
+        # About 8.4 words per sample on average; top up what is left over
+        needed = max(0, 9 * block + 64 - len(pending))
+        words = np.concatenate([pending, source.randint(0, 2 ** 32, size=needed, dtype=np.uint32)])
+        parsed = _parse_samples(words)
+        # Follow the chain of sample boundaries; everything else was vectorized
+        ends = parsed['end'].tolist()
+        starts = []
+        start = 0
+        while len(starts) < block and ends[start] <= len(words):
+            starts.append(start)
+            start = ends[start]
+        starts = np.asarray(starts, dtype=np.int64)
+        for name, values in columns.items():
+            values.append(parsed[name][starts])
+        consumed += start
+        pending = words[start:]
+        remaining -= len(starts)
+
+    # Advance the global state by exactly the words the samples used
+    for offset in range(0, consumed, 1 << 24):
+        np.random.randint(0, 2 ** 32, size=min(1 << 24, consumed - offset), dtype=np.uint32)
+    return {name: np.concatenate(values) if values else np.empty(0, dtype=np.int64)
+            for name, values in columns.items()}
+
+
 def generate_sample_data(n_samples=1000):
-    """Generate synthetic data for training the model with advanced features."""
+    """
+    Generate synthetic data for training the model with advanced features.
+
+    Draws the same samples as drawing them one at a time with
+    ``np.random.choice``, but decodes the random stream with vectorized
+    NumPy, and extracts features once per distinct URL: the URLs come from
+    a small combinatorial space, so most samples are duplicates.
+    """
     np.random.seed(42)
-    
-    # Generate sample URLs
-    domains = ['example.com', 'test.com', 'secure.com', 'login.com']
-    paths = ['', '/login', '/account', '/secure', '/update']
-    protocols = ['http://', 'https://']
-    
-    urls = []
-    labels = []
-    
-    for _ in range(n_samples):
-        # Generate URL components
-        protocol = np.random.choice(protocols)
-        domain = np.random.choice(domains)
-        path = np.random.choice(paths)
-        
-        # Add query parameters randomly
-        if np.random.random() > 0.5:
-            query = f"?id={np.random.randint(1000)}"
-            if np.random.random() > 0.7:
-                query += f"&token={np.random.randint(10000)}"
-        else:
-            query = ""
-            
-        url = f"{protocol}{domain}{path}{query}"
-        urls.append(url)
-        
-        # Generate label based on URL characteristics
-        is_malicious = (
-            protocol == "http://" or
-            "login" in url.lower() or
-            "token" in url.lower() or
-            len(query) > 20
-        )
-        labels.append(int(is_malicious))
-    
-    # Extract features for each URL
-    features_list = []
-    for url in urls:
-        features = extract_advanced_features(url)
-        features_list.append(features)
-    
-    # Convert to DataFrame
-    X = pd.DataFrame(features_list)
-    y = np.array(labels)
-    
+    samples = _draw_samples(n_samples)
+
+    # Generate label based on URL characteristics; no query is longer than 20 characters
+    labels = (
+        (samples['protocol'] == _PROTOCOLS.index('http://')) |
+        (samples['domain'] == _DOMAINS.index('login.com')) |
+        (samples['path'] == _PATHS.index('/login')) |
+        (samples['token'] >= 0)
+    ).astype(int)
+
+    # Identify every distinct URL by one integer built from its components
+    codes = (((samples['protocol'] * 4 + samples['domain']) * 5 + samples['path']) * 1001
+             + samples['id'] + 1) * 10001 + samples['token'] + 1
+    _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+
+    def build_url(i):
+        query = ""
+        if samples['id'][i] >= 0:
+            query = f"?id={samples['id'][i]}"
+            if samples['token'][i] >= 0:
+                query += f"&token={samples['token'][i]}"
+        return f"{_PROTOCOLS[samples['protocol'][i]]}{_DOMAINS[samples['domain'][i]]}{_PATHS[samples['path'][i]]}{query}"
+
+    # Extract features once per distinct URL, then map them back to the samples
+    first = first.tolist()
+    features = pd.concat([
+        pd.DataFrame([extract_advanced_features(build_url(i)) for i in first[start:start + _FEATURE_BLOCK]])
+        for start in range(0, len(first), _FEATURE_BLOCK)
+    ] or [pd.DataFrame([])], ignore_index=True)
+    X = features.iloc[inverse.ravel()].reset_index(drop=True)
+    # np.array([]) of no labels used to be float64
+    y = labels if n_samples > 0 else np.array([])
+
     return X, y
 
-def main():
-    logger.info("Starting model training process...")
-    
-    # Generate enhanced training data
-    logger.info("Generating synthetic training data...")
+# Worker processes for fitting the base models and CV folds; -1 uses every core
+TRAINING_WORKERS = int(os.environ.get("TRAINING_WORKERS", "-1"))
+
+def training_split():
+    """
+    Return the synthetic training data split into (X_train, X_test, y_train, y_test).
+
+    ``generate_sample_data`` is seeded, so this is the same split every
+    time, and later updates can be evaluated on the original test rows.
+    """
     X, y = generate_sample_data(n_samples=10000)
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
-    
-    # Define base models with enhanced parameters
-    base_models = [
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+def build_base_models():
+    """Base models of the published ensemble, with enhanced parameters."""
+    return [
         RandomForestClassifier(
             n_estimators=100,
             max_depth=10,
@@ -102,19 +205,37 @@ def main():
             random_state=42
         )
     ]
+
+
+def main():
+    logger.info("Starting model training process...")
+    timings = {}
+    
+    # Generate enhanced training data
+    logger.info("Generating synthetic training data...")
+    started = time.perf_counter()
+    X_train, X_test, y_train, y_test = training_split()
+    timings['generate_data'] = time.perf_counter() - started
+    
+    base_models = build_base_models()
     
     # Create and train stack ensemble model
-    logger.info("Training stack ensemble model...")
+    logger.info(f"Training stack ensemble model with TRAINING_WORKERS={TRAINING_WORKERS}...")
     model = StackEnsembleModel(base_models=base_models)
-    model.fit(X_train, y_train)
+    model.fit(X_train, y_train, n_jobs=TRAINING_WORKERS)
+    timings.update(model.fit_timings_)
     
     # Evaluate model with comprehensive metrics
     logger.info("Evaluating model performance...")
+    started = time.perf_counter()
     metrics = model.score(X_test, y_test)
+    timings['evaluate'] = time.perf_counter() - started
     
     logger.info("Model performance metrics:")
     for metric, value in metrics.items():
         logger.info(f"{metric.capitalize()}: {value:.4f}")
+    for name, accuracy in model.cv_scores_.items():
+        logger.info(f"Out-of-fold accuracy of {name}: {accuracy:.4f}")
     
     # Get and log feature importance
     logger.info("\nFeature Importance:")
@@ -129,15 +250,23 @@ def main():
     
     logger.info("\nSample Prediction:")
     logger.info(f"Prediction probabilities: Safe: {probas[0,0]:.4f}, Malicious: {probas[0,1]:.4f}")
-    logger.info(f"Confidence metrics: {confidence}")
+    logger.info(f"Confidence metrics: { {name: float(values[0]) for name, values in confidence.items()} }")
     
     # Save the model
     logger.info("\nSaving model...")
     save_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'saved_models')
     os.makedirs(save_dir, exist_ok=True)
     model_path = os.path.join(save_dir, 'stack_ensemble_model.joblib')
-    model.save_model(model_path)
-    logger.info(f"Model saved to {model_path}")
+    # Written as a new version and swapped in atomically, so a running
+    # server never sees the artifact missing or half-written
+    started = time.perf_counter()
+    version_path = publish_model(model, model_path)
+    timings['publish'] = time.perf_counter() - started
+    logger.info(f"Model saved to {version_path} and published as {model_path}")
+    
+    logger.info("\nTraining time per stage (wall clock):")
+    for stage, seconds in timings.items():
+        logger.info(f"{stage}: {seconds:.2f}s")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+Precomputed domain reputation that decides well-known domains without the model.
+
+The index is a reversed-label suffix trie over allow and deny entries. Only
+the nodes that carry a verdict are stored. Each is identified by a 64-bit
+hash of its label path, in a flat open-addressing hash table: an array of
+node hashes and a parallel array of verdicts. A host is looked up by walking
+its suffixes from the most specific (``www.github.com``, then
+``github.com``, then ``com``). A lookup therefore costs one table probe per
+label, and the deepest listed suffix decides. An entry covers the domain and
+all its subdomains, and a domain listed in both lists is denied. An entry
+written ``!host``, in either list, is an exception: that host and its
+subdomains go to the model even when a parent domain is listed, e.g.
+``!sites.google.com`` under an allowed ``google.com``. At about 15
+bytes per entry, millions of domains (for example a top-sites list and
+phishing feeds) fit in tens of megabytes. An index is built once with
+``python -m api.reputation`` and loaded at startup.
+
+A 64-bit hash makes a false match about as likely as n / 2**64 per lookup
+for n entries, which is negligible for any realistic list.
+
+Usage:
+    python -m api.reputation --allow top-1m.csv --deny phishing.txt --output domain_reputation.npz
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ALLOW = 1
+DENY = 2
+# Stored for ``!`` exception entries; a lookup that ends on it returns None
+PASS = 3
+VERDICT_NAMES = {ALLOW: 'allow', DENY: 'deny'}
+# For a domain on several lists: deny beats an exception, which beats allow
+_STRICTNESS = np.array([0, 0, 2, 1], dtype=np.uint8)
+
+# Subdomains of the default allowed domains where anyone can publish pages
+# or forms, so a phishing page there says nothing about the parent domain
+USER_CONTENT_HOSTS = (
+    'sites.google.com', 'docs.google.com', 'drive.google.com', 'forms.google.com',
+    'gist.github.com', 'raw.github.com',
+)
+# Domains where every page is user content, left out of the default allow list
+_USER_CONTENT_DOMAINS = frozenset(['medium.com', 'dev.to'])
+
+# Share of hash table slots in use; lower probes fewer slots per lookup but takes more memory
+LOAD_FACTOR = 0.6
+
+
+def _node_key(suffix: str) -> int:
+    """Stable, non-zero 64-bit identifier of the trie node for a domain suffix."""
+    # Zero marks an empty slot
+    return int.from_bytes(hashlib.blake2b(suffix.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+
+def _build_table(keys: np.ndarray, verdicts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Insert distinct non-zero keys into a linear-probing hash table, a whole round of keys at a time."""
+    size = max(1, int(len(keys) / LOAD_FACTOR) + 1)
+    table = np.zeros(size, dtype=np.uint64)
+    table_verdicts = np.zeros(size, dtype=np.uint8)
+    slots = keys % np.uint64(size)
+    pending = np.arange(len(keys))
+    while len(pending):
+        wanted = slots[pending]
+        # Of the keys that want the same free slot, the first takes it; the rest try the next slot
+        _, first = np.unique(wanted, return_index=True)
+        placed = np.zeros(len(pending), dtype=bool)
+        placed[first] = True
+        placed &= table[wanted] == 0
+        table[wanted[placed]] = keys[pending[placed]]
+        table_verdicts[wanted[placed]] = verdicts[pending[placed]]
+        pending = pending[~placed]
+        slots[pending] = (slots[pending] + np.uint64(1)) % np.uint64(size)
+    return table, table_verdicts
+
+
+def parse_entry(entry: str) -> Optional[Tuple[str, bool]]:
+    """
+    Turn one list line into (domain, is_exception), or None for blank lines and comments.
+
+    Accepts plain domains, ``*.`` or ``.`` prefixed suffixes, ranked CSV
+    lines such as ``1,google.com`` of top-sites lists, and ``!`` prefixed
+    exceptions.
+    """
+    entry = entry.split('#', 1)[0].strip()
+    if not entry:
+        return None
+    domain = entry.rsplit(',', 1)[-1].strip().lower()
+    exception = domain.startswith('!')
+    if exception:
+        domain = domain[1:]
+    if domain.startswith('*.'):
+        domain = domain[2:]
+    domain = domain.strip('.')
+    return (domain, exception) if domain else None
+
+
+def url_host(url: str) -> Optional[str]:
+    """Lowercase host of ``url`` without port, credentials or trailing dot; None if it has none."""
+    try:
+        host = urlparse(url if '//' in url else f'//{url}').hostname
+    except ValueError:
+        return None
+    return host.rstrip('.') if host else None
+
+
+class DomainReputationIndex:
+    """
+    Allow/deny verdicts for domains and all their subdomains.
+
+    Counts every lookup and every decided lookup, so the share of requests
+    that never reach the model can be reported.
+    """
+
+    def __init__(self, table: np.ndarray, verdicts: np.ndarray):
+        self.table = np.ascontiguousarray(table, dtype=np.uint64)
+        self.verdicts = np.ascontiguousarray(verdicts, dtype=np.uint8)
+        self.entries = int(np.count_nonzero(self.table))
+        # Indexing a memoryview yields plain ints, several times faster than NumPy scalars
+        self._slots = memoryview(self.table).cast('B').cast('Q')
+        self._slot_verdicts = memoryview(self.verdicts)
+        self.lookups = 0
+        self.decided = {ALLOW: 0, DENY: 0}
+
+    @classmethod
+    def build(cls, allow: Iterable[str], deny: Iterable[str]) -> 'DomainReputationIndex':
+        """Compile lists of domains (or list lines, see ``parse_entry``) into an index."""
+        keys, verdicts = [], []
+        for verdict, entries in ((ALLOW, allow), (DENY, deny)):
+            for parsed in map(parse_entry, entries):
+                if parsed is not None:
+                    domain, exception = parsed
+                    keys.append(_node_key(domain))
+                    verdicts.append(PASS if exception else verdict)
+        keys = np.array(keys, dtype=np.uint64)
+        verdicts = np.array(verdicts, dtype=np.uint8)
+        # Sort by key, then strictness, and keep the last, i.e. strictest, verdict per key
+        order = np.lexsort((_STRICTNESS[verdicts], keys))
+        keys, verdicts = keys[order], verdicts[order]
+        last = np.ones(len(keys), dtype=bool)
+        last[:-1] = keys[1:] != keys[:-1]
+        return cls(*_build_table(keys[last], verdicts[last]))
+
+    @classmethod
+    def load(cls, path: str) -> 'DomainReputationIndex':
+        with np.load(path) as arrays:
+            return cls(arrays['table'], arrays['verdicts'])
+
+    def save(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(f, table=self.table, verdicts=self.verdicts)
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def _verdict(self, key: int) -> int:
+        """Verdict stored for a node key, 0 if the node is not in the table."""
+        slots = self._slots
+        size = len(slots)
+        slot = key % size
+        while True:
+            found = slots[slot]
+            if found == key:
+                return self._slot_verdicts[slot]
+            if found == 0:
+                return 0
+            slot += 1
+            if slot == size:
+                slot = 0
+
+    def lookup_host(self, host: Optional[str]) -> Optional[int]:
+        """Verdict (ALLOW, DENY or None) of the deepest listed suffix of ``host``; None under an exception."""
+        if not host or not self.entries:
+            return None
+        labels = host.split('.')
+        for depth in range(len(labels)):
+            verdict = self._verdict(_node_key('.'.join(labels[depth:])))
+            if verdict:
+                return verdict if verdict != PASS else None
+        return None
+
+    def decide(self, urls: List[str]) -> List[Optional[int]]:
+        """Verdict for each URL's host, counted towards ``stats``."""
+        verdicts = [self.lookup_host(url_host(url)) for url in urls]
+        self.lookups += len(urls)
+        for verdict in verdicts:
+            if verdict is not None:
+                self.decided[verdict] += 1
+        return verdicts
+
+    def stats(self) -> Dict[str, float]:
+        decided = sum(self.decided.values())
+        return {
+            'entries': self.entries,
+            'bytes': int(self.table.nbytes + self.verdicts.nbytes),
+            'lookups': self.lookups,
+            'allowed': self.decided[ALLOW],
+            'denied': self.decided[DENY],
+            'skip_ratio': decided / self.lookups if self.lookups else 0.0,
+        }
+
+
+def default_lists() -> Tuple[List[str], List[str]]:
+    """
+    Allow and deny lists from the domains the synthetic data is generated with.
+
+    Legitimate domains are allowed, except ``USER_CONTENT_HOSTS`` and the
+    blogging platforms whose every page is user content; nothing is denied:
+    a whole TLD is not a reputation, and the TLD already is a model feature.
+    URL shorteners hide where they lead, so they are left to the model.
+    """
+    from api.data_collection.synthetic_data_generator import SyntheticDataGenerator
+
+    generator = SyntheticDataGenerator()
+    allow = [domain for domain in generator.legitimate_domains if domain not in _USER_CONTENT_DOMAINS]
+    return allow + [f'!{host}' for host in USER_CONTENT_HOSTS], []
+
+
+def load_index(path: str) -> DomainReputationIndex:
+    """Load a compiled index, or build one from ``default_lists`` when ``path`` is empty."""
+    if path:
+        return DomainReputationIndex.load(path)
+    return DomainReputationIndex.build(*default_lists())
+
+
+def _read_lists(paths: List[str]) -> Iterable[str]:
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            yield from f
+
+
+def main(argv: Optional[List[str]] = None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--allow', nargs='*', default=[], help='files of domains to allow, one per line; !host lines are exceptions')
+    parser.add_argument('--deny', nargs='*', default=[], help='files of domains to deny, one per line; !host lines are exceptions')
+    parser.add_argument('--no-defaults', action='store_true',
+                        help='leave out the built-in lists of the synthetic data generator')
+    parser.add_argument('--output', required=True, help='.npz file to write')
+    args = parser.parse_args(argv)
+
+    allow, deny = ([], []) if args.no_defaults else default_lists()
+    index = DomainReputationIndex.build(
+        [*allow, *_read_lists(args.allow)], [*deny, *_read_lists(args.deny)]
+    )
+    index.save(args.output)
+    stats = index.stats()
+    logger.info(f"Wrote {stats['entries']} entries ({stats['bytes'] / 2 ** 20:.1f} MiB) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
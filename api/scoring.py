@@ -0,0 +1,180 @@
+"""CPU-bound scoring work shared by the API and its inference workers."""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import glob
+import logging
+import os
+import shutil
+import time
+
+import numpy as np
+
+from api.ml_model.batch_features import extract_features_batch
+from api.ml_model.cascade import CascadeEnsemble
+from api.ml_model.compiled_ensemble import CompiledEnsemble
+from api.ml_model.feature_extraction import extract_feature_vector, get_feature_names
+from api.ml_model.model_store import artifact_version
+from api.ml_model.stack_ensemble import StackEnsembleModel
+
+logger = logging.getLogger(__name__)
+
+MODEL_RUNTIMES = ('sklearn', 'compiled')
+
+
+def prepare_model(model, runtime: str, cascade: Optional[Dict[str, Any]] = None):
+    """
+    Return the object that serves predictions for ``model``.
+
+    With the 'compiled' runtime the ensemble is exported to packed NumPy
+    arrays; models that cannot be compiled keep using sklearn. ``cascade``
+    holds the keyword arguments of ``CascadeEnsemble`` to serve the model
+    as a cost-ordered cascade; None scores every row with the full ensemble.
+    """
+    if runtime not in MODEL_RUNTIMES:
+        raise ValueError(f"Unknown model runtime {runtime!r}; expected one of {MODEL_RUNTIMES}")
+    if isinstance(model, CascadeEnsemble):
+        model = model.model
+    if runtime == 'compiled' and not isinstance(model, CompiledEnsemble):
+        try:
+            model = CompiledEnsemble.from_model(model)
+        except Exception as e:
+            logger.error(f"Cannot compile model, serving it with sklearn: {str(e)}")
+    if cascade is not None:
+        return CascadeEnsemble(model, **cascade)
+    return model
+
+
+def mmap_artifact_path(model_path: str, version: str) -> str:
+    """Directory holding the memory-mappable compiled arrays of ``model_path``."""
+    return f"{model_path}.{version}.arrays"
+
+
+def _remove_stale_arrays(model_path: str, current: str):
+    """
+    Delete arrays exported for earlier versions of ``model_path``.
+
+    Processes still mapping them keep their pages until they exit.
+    """
+    for path in glob.glob(f"{glob.escape(model_path)}.*.arrays"):
+        if path != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_serving_model(model_path: str, runtime: str, cascade: Optional[Dict[str, Any]] = None):
+    """
+    Load the model artifact at ``model_path`` ready to serve with ``runtime``
+    and ``cascade``, see ``prepare_model``.
+
+    With the 'compiled' runtime the packed arrays are memory-mapped from a
+    ``.npy`` directory next to the artifact, written on first use and keyed
+    by the artifact hash, so every worker process on a host shares one
+    read-only copy of the model. sklearn estimators copy their tree arrays
+    when unpickled, so the 'sklearn' runtime keeps a private copy per worker.
+    """
+    if runtime == 'compiled':
+        arrays_path = mmap_artifact_path(model_path, artifact_version(model_path))
+        if not os.path.isdir(arrays_path):
+            compiled = prepare_model(StackEnsembleModel.load_model(model_path, strict=True), runtime)
+            if not isinstance(compiled, CompiledEnsemble):
+                return prepare_model(compiled, 'sklearn', cascade)
+            try:
+                compiled.save_mmap(arrays_path)
+            except OSError as e:
+                # Another worker won the race, or the directory is read-only
+                if not os.path.isdir(arrays_path):
+                    logger.warning(f"Cannot write {arrays_path}, serving a private copy: {str(e)}")
+                    return prepare_model(compiled, runtime, cascade)
+            else:
+                _remove_stale_arrays(model_path, arrays_path)
+        return prepare_model(CompiledEnsemble.load_mmap(arrays_path), runtime, cascade)
+    return prepare_model(StackEnsembleModel.load_model(model_path, strict=True), runtime, cascade)
+
+
+N_FEATURES = len(get_feature_names())
+
+
+def score_urls(
+    model, urls: List[str],
+    observe: Optional[Callable[[str, float], None]] = None
+) -> List[Tuple[Dict[str, float], np.ndarray]]:
+    """
+    Extract features for ``urls`` and run the ensemble once over all of them.
+    
+    Features are written straight into one preallocated float64 matrix in
+    ``get_feature_names()`` order, which goes to the model without pandas.
+    ``observe`` is called with (stage, seconds) for feature extraction and
+    each stage of the model, see ``StackEnsembleModel.predict_proba``.
+    A cascade model also reports the stage that decided each URL as
+    'cascade_stage', an index into ``cascade.STAGE_NAMES``.
+
+    Returns:
+    --------
+    List[Tuple[Dict[str, float], np.ndarray]]
+        One (prediction_metrics, feature_vector) pair per URL, in order
+    """
+    started = time.perf_counter()
+    X = np.empty((len(urls), N_FEATURES), dtype=np.float64)
+    for i, url in enumerate(urls):
+        extract_feature_vector(url, X[i])
+    if observe is not None:
+        observe('feature_extraction', time.perf_counter() - started)
+        probas, confidence_metrics = model.predict_proba(X, observe=observe)
+    else:
+        probas, confidence_metrics = model.predict_proba(X)
+    model_confidence = confidence_metrics['model_confidence']
+    prediction_stability = confidence_metrics['prediction_stability']
+    results = [
+        (
+            {
+                'safe_probability': float(probas[i, 0]),
+                'malicious_probability': float(probas[i, 1]),
+                'model_confidence': float(model_confidence[i]),
+                'prediction_stability': float(prediction_stability[i])
+            },
+            # Copied so cached rows do not keep the whole batch matrix alive
+            X[i].copy()
+        )
+        for i in range(len(urls))
+    ]
+    if 'cascade_stage' in confidence_metrics:
+        for (prediction, _), stage in zip(results, confidence_metrics['cascade_stage'].tolist()):
+            prediction['cascade_stage'] = float(stage)
+    return results
+
+
+def score_urls_timed(model, urls: List[str]) -> Tuple[List[Tuple[Dict[str, float], np.ndarray]], List[Tuple[str, float]]]:
+    """Run ``score_urls`` and also return its (stage, seconds) timings, e.g. from a worker process."""
+    timings = []
+    results = score_urls(model, urls, lambda stage, seconds: timings.append((stage, seconds)))
+    return results, timings
+
+
+# Columns produced by ``score_columns``, in output order
+RESULT_COLUMNS = (
+    'is_safe', 'confidence_score', 'safe_probability', 'malicious_probability',
+    'model_confidence', 'prediction_stability'
+)
+
+
+def score_columns(model, urls: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Score ``urls`` for bulk jobs, returning one array per result column.
+
+    Uses the vectorized batch extractor and skips the per-URL dicts and
+    feature copies of ``score_urls``, which only interactive requests need.
+    ``is_safe`` and ``confidence_score`` are derived the same way as in the
+    API responses.
+    """
+    X = extract_features_batch(urls)
+    probas, confidence_metrics = model.predict_proba(X)
+    model_confidence = np.asarray(confidence_metrics['model_confidence'], dtype=np.float64)
+    prediction_stability = np.asarray(confidence_metrics['prediction_stability'], dtype=np.float64)
+    return {
+        'is_safe': probas[:, 0] > 0.5,
+        'confidence_score': 0.7 * model_confidence + 0.3 * prediction_stability,
+        'safe_probability': probas[:, 0],
+        'malicious_probability': probas[:, 1],
+        'model_confidence': model_confidence,
+        'prediction_stability': prediction_stability,
+    }
@@ -0,0 +1,125 @@
+"""Incremental parsing of NDJSON and CSV uploads for the streaming bulk endpoint."""
+
+import csv
+import json
+from typing import AsyncIterator, List, Optional, Tuple
+
+from starlette.responses import StreamingResponse
+
+STREAM_FORMATS = ('ndjson', 'csv')
+# Longer lines are reported as errors instead of being buffered
+MAX_LINE_BYTES = 64 * 1024
+
+
+class StreamFormatError(ValueError):
+    """Raised when an upload cannot be parsed at all, e.g. a CSV without a url column."""
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Streaming response that leaves ``receive`` to the endpoint.
+
+    Starlette's StreamingResponse listens for a disconnect on ``receive``
+    while streaming, which would swallow the request body chunks of an
+    endpoint that answers while it is still reading its upload. Here the
+    body reader sees the disconnect instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    """
+    Split a byte stream into decoded lines without holding more than one line.
+
+    Blank lines are skipped. A line longer than ``MAX_LINE_BYTES`` is
+    discarded and yielded as ``None`` so the caller can report it.
+    """
+    buffer = bytearray()
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b'\n', start)
+            if end < 0:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > MAX_LINE_BYTES:
+                        buffer.clear()
+                        oversized = True
+                break
+            if oversized:
+                yield None
+                oversized = False
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > MAX_LINE_BYTES:
+                    yield None
+                else:
+                    line = buffer.decode('utf-8', errors='replace').strip()
+                    if line:
+                        yield line
+            buffer.clear()
+            start = end + 1
+    if oversized:
+        yield None
+    elif buffer:
+        line = buffer.decode('utf-8', errors='replace').strip()
+        if line:
+            yield line
+
+
+def parse_ndjson_line(line: str) -> str:
+    """Return the URL of an NDJSON line: either {"url": ...} or a bare JSON string."""
+    value = json.loads(line)
+    if isinstance(value, dict):
+        value = value.get('url')
+    if not isinstance(value, str):
+        raise ValueError('expected a JSON string or an object with a "url" string')
+    return value
+
+
+def csv_url_column(header: str) -> int:
+    """Position of the ``url`` column in a CSV header line."""
+    names = [name.strip().lower() for name in next(csv.reader([header]))]
+    if 'url' not in names:
+        raise StreamFormatError(f"CSV header has no url column: {header[:200]!r}")
+    return names.index('url')
+
+
+def parse_csv_line(line: str, column: int) -> str:
+    """Return the URL in ``column`` of a CSV row; quoted fields may not span lines."""
+    row = next(csv.reader([line]))
+    if column >= len(row) or not row[column].strip():
+        raise ValueError('row has no url value')
+    return row[column].strip()
+
+
+async def iter_chunks(lines: AsyncIterator[Optional[str]], fmt: str, chunk_size: int,
+                      url_column: int = 0) -> AsyncIterator[List[Tuple[str, Optional[str]]]]:
+    """
+    Group parsed lines into lists of at most ``chunk_size`` (url, error) pairs.
+
+    ``url`` is the raw input text when the line could not be parsed, and
+    ``error`` then says why.
+    """
+    chunk = []
+    async for line in lines:
+        if line is None:
+            chunk.append(('', f"Line exceeds {MAX_LINE_BYTES} bytes"))
+        else:
+            try:
+                if fmt == 'csv':
+                    chunk.append((parse_csv_line(line, url_column), None))
+                else:
+                    chunk.append((parse_ndjson_line(line), None))
+            except (ValueError, csv.Error) as e:
+                chunk.append((line[:200], f"Invalid {fmt} line: {str(e)}"))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,57 @@
+"""
+URL extraction from raw tweet text for ``POST /analyze/tweet``.
+
+Finds the same candidates as ``twitter_scraper.extract_urls`` but cleans
+them up the way a reader would: punctuation that ends the sentence around
+a link is not part of it, and bare ``www.`` links get a scheme so they
+validate like any other URL.
+"""
+
+import re
+from typing import List
+
+_URL_PATTERN = re.compile(r'https?://[^\s<>"]+|www\.[^\s<>"]+', re.IGNORECASE)
+
+# Characters that end the sentence rather than the URL when they come last
+_TRAILING_PUNCTUATION = '.,;:!?\'"*…'
+_BRACKETS = {')': '(', ']': '[', '}': '{'}
+
+
+def _strip_trailing(url: str) -> str:
+    """Drop trailing punctuation, and closing brackets that were opened before the URL."""
+    while url:
+        last = url[-1]
+        if last in _TRAILING_PUNCTUATION:
+            url = url[:-1]
+        elif last in _BRACKETS and url.count(last) > url.count(_BRACKETS[last]):
+            url = url[:-1]
+        else:
+            break
+    return url
+
+
+def extract_urls(text: str) -> List[str]:
+    """
+    Return the URLs in tweet text, in order of first appearance and without duplicates.
+
+    Parameters:
+    -----------
+    text : str
+        Raw tweet text
+
+    Returns:
+    --------
+    List[str]
+        Cleaned URLs, e.g. 'http://www.example.com/a' for '(www.example.com/a).'
+    """
+    urls = []
+    seen = set()
+    for match in _URL_PATTERN.finditer(text):
+        url = _strip_trailing(match.group())
+        if url[:4].lower() == 'www.':
+            url = 'http://' + url
+        # A scheme with nothing after it, e.g. from 'https://.', is not a link
+        if not url.endswith('://') and url not in seen:
+            seen.add(url)
+            urls.append(url)
+    return urls
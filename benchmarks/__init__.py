@@ -0,0 +1 @@
+"""Performance benchmarks for the URL Safety Sentinel backend."""
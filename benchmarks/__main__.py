@@ -0,0 +1,5 @@
+"""Run the benchmark suite: ``python -m benchmarks run|compare``."""
+
+from benchmarks.suite import main
+
+main()
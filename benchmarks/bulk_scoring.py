@@ -0,0 +1,73 @@
+"""
+Measure how offline bulk scoring with ``score_dataset.py`` scales with workers.
+
+Writes a CSV of ``--rows`` fixture URLs in the shape of the collected
+datasets, then scores it with each worker count and reports rows/sec and
+the speed-up over a single worker process. Speed-up can only approach the
+worker count on a machine with at least that many idle cores.
+
+Usage:
+    python -m benchmarks.bulk_scoring --model api/saved_models/stack_ensemble_model.joblib
+    python -m benchmarks.bulk_scoring --rows 1000000 --workers 1 2 4 8
+"""
+
+import argparse
+import csv
+import logging
+import os
+import tempfile
+import warnings
+
+from benchmarks.common import load_urls
+
+
+def _write_dataset(path, n):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['tweet_id', 'url', 'potentially_malicious'])
+        for i, url in enumerate(load_urls(n)):
+            writer.writerow([i, f"{url}?row={i}", ''])
+
+
+def run(model_path, rows=200000, worker_counts=None, runtime='sklearn', chunk_size=10000):
+    from score_dataset import score_files
+
+    warnings.filterwarnings('ignore', category=UserWarning)
+    logging.disable(logging.INFO)
+    if worker_counts is None:
+        cores = os.cpu_count() or 1
+        worker_counts = sorted({0, 1, 2, cores} | ({cores // 2} if cores > 2 else set()))
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bulk-scoring-') as scratch:
+        source = os.path.join(scratch, 'urls.csv')
+        _write_dataset(source, rows)
+        for workers in worker_counts:
+            stats = score_files([source], os.path.join(scratch, 'scored.csv'), model_path,
+                                runtime, workers, chunk_size)
+            results.append({'workers': workers, **stats})
+
+    baseline = next((row['rows_per_second'] for row in results if row['workers'] == 1), None)
+    for row in results:
+        row['speedup'] = row['rows_per_second'] / baseline if baseline else None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='api/saved_models/stack_ensemble_model.joblib')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--workers', type=int, nargs='+', help='worker counts; 0 scores in-process')
+    parser.add_argument('--runtime', choices=['sklearn', 'compiled'], default='sklearn')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU(s), {args.rows} rows, {args.runtime} runtime")
+    for row in run(args.model, args.rows, args.workers, args.runtime, args.chunk_size):
+        speedup = f"x{row['speedup']:.2f}" if row['speedup'] is not None else ''
+        label = 'in-process' if row['workers'] == 0 else f"{row['workers']} workers"
+        print(f"{label:>12}: {row['rows_per_second']:8.0f} rows/sec ({row['seconds']:.1f}s) {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Measure the cost-ordered cascade against the full ensemble on held-out rows.
+
+Trains the ensemble the way ``train_model.py`` does, then scores the
+held-out rows of ``training_split`` with the full ensemble and with the
+cascade at each linear-stage threshold. Reports the share of rows each
+stage decides, the mean latency of scoring one row at a time and per row
+of one batch, and the accuracy change against the full ensemble.
+
+The stages are calibrated on the training distribution, so the same is
+reported for a campaign of ``SyntheticDataGenerator`` URLs, whose domains
+and labelling the training data never shows, to show what early exits
+cost on unfamiliar traffic.
+
+Usage:
+    python -m benchmarks.cascade
+    python -m benchmarks.cascade --thresholds 0.9 0.99 0.999 --runtime compiled
+"""
+
+import argparse
+import logging
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.common import ROOT_DIR  # noqa: F401  (puts the api package on sys.path)
+
+
+def _measure(model, X, y, single_rows):
+    started = time.perf_counter()
+    probas, metrics = model.predict_proba(X)
+    batch_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(single_rows):
+        model.predict_proba(X[i:i + 1])
+    single_seconds = time.perf_counter() - started
+    return {
+        'accuracy': float(np.mean((probas[:, 1] > 0.5) == y)),
+        'batch_us_per_row': batch_seconds / len(X) * 1e6,
+        'single_row_ms': single_seconds / single_rows * 1e3,
+        'stages': metrics.get('cascade_stage'),
+    }
+
+
+def _stage_shares(stages, n):
+    from api.ml_model.cascade import STAGE_NAMES
+
+    return dict(zip(STAGE_NAMES, (np.bincount(stages, minlength=len(STAGE_NAMES)) / n).tolist()))
+
+
+def run(thresholds=(0.9, 0.99, 0.999), rule_precision=0.995, runtime='sklearn', single_rows=500,
+        campaign_rows=2000, workers=None):
+    from api.data_collection.synthetic_data_generator import SyntheticDataGenerator
+    from api.ml_model.batch_features import extract_features_batch
+    from api.ml_model.stack_ensemble import StackEnsembleModel
+    from api.ml_model.train_model import build_base_models, training_split
+    from api.scoring import prepare_model
+
+    warnings.filterwarnings('ignore', category=UserWarning)
+    logging.disable(logging.WARNING)
+    X_train, X_test, y_train, y_test = training_split()
+    fitted = StackEnsembleModel(base_models=build_base_models()).fit(X_train, y_train, n_jobs=workers)
+    X = X_test[fitted.feature_names].to_numpy(dtype=np.float64)
+    y = np.asarray(y_test)
+    single_rows = min(single_rows, len(X))
+    campaign = SyntheticDataGenerator().generate_columns(
+        campaign_rows, campaign_rows // 2, np.random.default_rng(42), datetime(2025, 1, 1)
+    )
+    campaign_X = extract_features_batch(campaign['url'].tolist())
+    campaign_y = campaign['potentially_malicious'].astype(int)
+
+    def campaign_accuracy(model):
+        probas, metrics = model.predict_proba(campaign_X)
+        return float(np.mean((probas[:, 1] > 0.5) == campaign_y)), metrics.get('cascade_stage')
+
+    full_model = prepare_model(fitted, runtime)
+    full = _measure(full_model, X, y, single_rows)
+    full['campaign_accuracy'], _ = campaign_accuracy(full_model)
+    rows = [{'threshold': None, **full}]
+    for threshold in thresholds:
+        cascade = prepare_model(fitted, runtime, {'linear_confidence': threshold, 'rule_precision': rule_precision})
+        row = _measure(cascade, X, y, single_rows)
+        row['campaign_accuracy'], campaign_stages = campaign_accuracy(cascade)
+        row.update({
+            'threshold': threshold,
+            'rules': [name for name, *_ in cascade.rules],
+            'stage_shares': _stage_shares(row.pop('stages'), len(X)),
+            'campaign_stage_shares': _stage_shares(campaign_stages, len(campaign_y)),
+            'accuracy_change': row['accuracy'] - full['accuracy'],
+            'campaign_accuracy_change': row['campaign_accuracy'] - full['campaign_accuracy'],
+            'single_row_ms_saved': full['single_row_ms'] - row['single_row_ms'],
+            'batch_us_saved': full['batch_us_per_row'] - row['batch_us_per_row'],
+        })
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.9, 0.99, 0.999],
+                        help='calibrated confidence at which the linear stage decides')
+    parser.add_argument('--rule-precision', type=float, default=0.995)
+    parser.add_argument('--runtime', choices=['sklearn', 'compiled'], default='sklearn')
+    parser.add_argument('--single-rows', type=int, default=500, help='rows scored one at a time')
+    parser.add_argument('--campaign-rows', type=int, default=2000)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    rows = run(args.thresholds, args.rule_precision, args.runtime, args.single_rows, args.campaign_rows, args.workers)
+    full = rows[0]
+    print(f"full ensemble ({args.runtime}): accuracy {full['accuracy']:.4f}, "
+          f"{full['single_row_ms']:.3f} ms per single row, {full['batch_us_per_row']:.1f} us per batched row; "
+          f"campaign accuracy {full['campaign_accuracy']:.4f}")
+    print(f"enabled rules: {', '.join(rows[1]['rules']) if len(rows) > 1 and rows[1]['rules'] else 'none'}")
+    for row in rows[1:]:
+        shares = ', '.join(f"{stage} {share:.1%}" for stage, share in row['stage_shares'].items())
+        print(f"cascade @ {row['threshold']}: {shares}; accuracy {row['accuracy']:.4f} "
+              f"({row['accuracy_change']:+.4f}), {row['single_row_ms']:.3f} ms per single row "
+              f"({row['single_row_ms_saved']:.3f} ms saved), {row['batch_us_per_row']:.1f} us per batched row "
+              f"({row['batch_us_saved']:.1f} us saved)")
+        shares = ', '.join(f"{stage} {share:.1%}" for stage, share in row['campaign_stage_shares'].items())
+        print(f"    campaign: {shares}; accuracy {row['campaign_accuracy']:.4f} "
+              f"({row['campaign_accuracy_change']:+.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Measure the tweet collection pipeline on a fixture source with simulated latency.
+
+Serves the synthetic dataset through ``FixtureSource``, sleeping
+``--latency`` seconds per page of 20 tweets as a live search would, and
+collects ``--limit`` URLs for each of three queries at several concurrency
+levels. Also checks that a tight rate limit is respected, and measures
+resuming after a run that stopped halfway. The previous scraper slept a
+second per tweet and five seconds between queries, so it needed about
+``3 * limit + 10`` seconds regardless of the source.
+
+Usage:
+    python -m benchmarks.collection
+    python -m benchmarks.collection --limit 500 --latency 0.5 --concurrency 1 3
+"""
+
+import argparse
+import glob
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.common import ROOT_DIR
+
+QUERIES = ['query a', 'query b', 'query c']
+
+
+def run(limit=300, latency=0.2, concurrency_levels=(1, 3), rate=1000.0, limited_rate=20.0):
+    from api.data_collection.twitter_scraper import FixtureSource, collect
+
+    logging.disable(logging.INFO)
+    fixtures = sorted(glob.glob(os.path.join(ROOT_DIR, 'data', 'synthetic_twitter_urls_*.csv')))
+    source = FixtureSource(fixtures, latency=latency)
+    results = {'concurrency': []}
+    with tempfile.TemporaryDirectory(prefix='collection-') as scratch:
+        for level in concurrency_levels:
+            result = collect(source, QUERIES, os.path.join(scratch, f'c{level}.csv'), limit, rate=rate,
+                             burst=50, concurrency=level)
+            results['concurrency'].append({'concurrency': level, **result})
+
+        # A burst of one token makes the rate the only thing that paces fetching
+        wanted = int(limited_rate * 2)
+        result = collect(FixtureSource(fixtures), QUERIES, os.path.join(scratch, 'limited.csv'),
+                         wanted // len(QUERIES), rate=limited_rate, burst=1)
+        tweets = sum(query['rows'] for query in result['queries'].values())
+        results['rate_limit'] = {'rate': limited_rate, 'tweets': tweets,
+                                 'observed_rate': (tweets - 1) / result['seconds']}
+
+        # Stop after half the URLs by limiting the first run, then resume to the full limit
+        output = os.path.join(scratch, 'resumed.csv')
+        collect(source, QUERIES, output, limit // 2, rate=rate, burst=50, concurrency=len(QUERIES))
+        checkpoint = f"{output}.checkpoint.json"
+        with open(checkpoint) as f:
+            state = f.read()
+        with open(checkpoint, 'w') as f:
+            f.write(state.replace('"done": true', '"done": false'))
+        started = time.perf_counter()
+        result = collect(source, QUERIES, output, limit, rate=rate, burst=50, concurrency=len(QUERIES))
+        results['resume'] = {'seconds': time.perf_counter() - started, 'rows': result['rows'],
+                             'full_rows': results['concurrency'][-1]['rows']}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--limit', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 3])
+    args = parser.parse_args()
+
+    results = run(args.limit, args.latency, args.concurrency)
+    print(f"previous scraper: about {3 * args.limit + 10}s")
+    for row in results['concurrency']:
+        print(f"concurrency {row['concurrency']}: {row['seconds']:.2f}s, {row['rows']} unique URLs, "
+              f"{row['duplicates']} duplicates dropped")
+    limited = results['rate_limit']
+    print(f"rate limit {limited['rate']:.0f}/s: {limited['tweets']} tweets at {limited['observed_rate']:.1f}/s")
+    resume = results['resume']
+    print(f"resume from half: {resume['seconds']:.2f}s, {resume['rows']} unique URLs "
+          f"(uninterrupted run: {resume['full_rows']})")
+
+
+if __name__ == "__main__":
+    main()
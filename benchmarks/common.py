@@ -0,0 +1,43 @@
+"""Shared fixtures and timing helpers for the benchmarks."""
+
+import csv
+import glob
+import os
+import sys
+import time
+from typing import Callable, List, Tuple
+
+# Make the ``api`` package importable when running from a checkout
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+FIXTURE_PATTERN = os.path.join(ROOT_DIR, 'data', 'synthetic_twitter_urls_*.csv')
+
+
+def load_fixture_urls() -> List[str]:
+    """Load every URL from the bundled synthetic Twitter datasets."""
+    urls = []
+    for path in sorted(glob.glob(FIXTURE_PATTERN)):
+        with open(path, newline='', encoding='utf-8') as f:
+            urls.extend(row['url'] for row in csv.DictReader(f) if row.get('url'))
+    if not urls:
+        raise FileNotFoundError(f"No fixture URLs found matching {FIXTURE_PATTERN}")
+    return urls
+
+
+def load_urls(n: int) -> List[str]:
+    """Return ``n`` fixture URLs, cycling through the corpus when needed."""
+    corpus = load_fixture_urls()
+    repeats = n // len(corpus) + 1
+    return (corpus * repeats)[:n]
+
+
+def time_call(fn: Callable, *args, repeat: int = 3) -> Tuple[float, object]:
+    """Return the best wall-clock time in seconds over ``repeat`` runs and the last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -0,0 +1,98 @@
+"""
+Compare the compiled NumPy runtime with the sklearn ensemble.
+
+Checks that probabilities match within tolerance, then times single-URL
+requests (feature extraction plus inference) and larger batches.
+
+Usage:
+    python -m benchmarks.compiled_runtime --model api/saved_models/stack_ensemble_model.joblib
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import load_urls
+from api.ml_model.batch_features import extract_features_batch
+from api.ml_model.compiled_ensemble import CompiledEnsemble
+from api.ml_model.feature_extraction import extract_advanced_features, get_feature_names
+from api.ml_model.stack_ensemble import StackEnsembleModel
+
+TOLERANCE = 1e-9
+
+
+def check_parity(model, compiled, X):
+    expected, expected_metrics = model.predict_proba(X)
+    actual, actual_metrics = compiled.predict_proba(X)
+    max_error = float(np.abs(expected - actual).max())
+    if max_error > TOLERANCE:
+        raise AssertionError(f"Compiled probabilities differ from sklearn by {max_error}")
+    if not np.array_equal(expected_metrics['prediction_stability'], actual_metrics['prediction_stability']):
+        raise AssertionError("Compiled base model predictions differ from sklearn")
+    return max_error
+
+
+def _mean_seconds(fn, items):
+    fn(items[0])
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def run(model_path, n_single=500, batch_sizes=(100, 1000)):
+    warnings.filterwarnings('ignore', category=UserWarning)
+    model = StackEnsembleModel.load_model(model_path)
+    compiled = CompiledEnsemble.from_model(model)
+    names = get_feature_names()
+
+    urls = load_urls(max(n_single, max(batch_sizes)))
+    X = pd.DataFrame(extract_features_batch(urls), columns=names)
+    max_error = check_parity(model, compiled, X)
+
+    def sklearn_single(url):
+        return model.predict_proba(pd.DataFrame([extract_advanced_features(url)]))
+
+    def compiled_single(url):
+        features = extract_advanced_features(url)
+        return compiled.predict_proba(np.array([[features[name] for name in names]]))
+
+    single = urls[:n_single]
+    result = {
+        'max_abs_error': max_error,
+        'single_url_sklearn_ms': _mean_seconds(sklearn_single, single) * 1000,
+        'single_url_compiled_ms': _mean_seconds(compiled_single, single) * 1000,
+        'batches': [],
+    }
+    for size in batch_sizes:
+        frame = X.iloc[:size]
+        array = frame.to_numpy()
+        result['batches'].append({
+            'batch_size': size,
+            'sklearn_ms': _mean_seconds(model.predict_proba, [frame] * 10) * 1000,
+            'compiled_ms': _mean_seconds(compiled.predict_proba, [array] * 10) * 1000,
+        })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='api/saved_models/stack_ensemble_model.joblib')
+    parser.add_argument('--n-single', type=int, default=500)
+    args = parser.parse_args()
+
+    result = run(args.model, args.n_single)
+    print(f"max |p_sklearn - p_compiled| = {result['max_abs_error']:.2e}")
+    print(
+        f"single URL (extract + predict): sklearn {result['single_url_sklearn_ms']:.3f} ms, "
+        f"compiled {result['single_url_compiled_ms']:.3f} ms"
+    )
+    for row in result['batches']:
+        print(f"batch {row['batch_size']:>5}: sklearn {row['sklearn_ms']:.2f} ms, compiled {row['compiled_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark the batch feature engine against the per-URL extractor.
+
+Parity is checked first with ``check_parity``, which tests/test_batch_features.py
+also runs on the fixtures and ``EDGE_CASE_URLS``.
+
+Usage:
+    python -m benchmarks.feature_extraction --sizes 10000 1000000
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.common import load_urls, time_call
+from api.ml_model.feature_extraction import extract_advanced_features, get_feature_names
+from api.ml_model.batch_features import extract_features_batch
+
+# Hand-picked edge cases on top of the fixture corpus
+EDGE_CASE_URLS = [
+    '', 'https://', 'not a url', 'http://192.168.0.1:8080/login?a=1&b=2#x&y',
+    'https://user:pw@Sub.Example.CO.UK/a//b/;p?q=1', 'http://[::1]/path',
+    'http://[bad/', 'https://bücher.de/straße', 'https://example.tk/{x}|[y]~`',
+    'HTTPS://PAYMENT.example.ml/SignIn', 'https://x.com/٣٤٥', 'https://a.gq',
+    'ftp://files.example.org/pub', 'https://example.com/' + 'a' * 500,
+    'http://example.com/a;b/c;d?e;f#g;h', ' http://example.com', 'http://exa\tmple.com/x',
+    'hTtPs://Example.COM?#', 'http://example.com#frag?not-query', 'http:///no-host',
+]
+
+
+def scalar_extract(urls):
+    """Reference path: one dict per URL, then a matrix in feature order."""
+    names = get_feature_names()
+    return np.array(
+        [[features[name] for name in names] for features in map(extract_advanced_features, urls)],
+        dtype=np.float64
+    )
+
+
+def check_parity(urls):
+    """Raise AssertionError if the batch engine disagrees with the scalar extractor."""
+    expected = scalar_extract(urls)
+    actual = extract_features_batch(urls)
+    if not np.allclose(actual, expected, rtol=1e-9, atol=1e-12):
+        bad_rows, bad_cols = np.nonzero(~np.isclose(actual, expected, rtol=1e-9, atol=1e-12))
+        names = get_feature_names()
+        details = [
+            f"{urls[r]!r}: {names[c]} expected {expected[r, c]} got {actual[r, c]}"
+            for r, c in list(zip(bad_rows, bad_cols))[:10]
+        ]
+        raise AssertionError("Batch features differ from scalar features:\n" + "\n".join(details))
+
+
+def run(sizes, repeat=1):
+    check_parity(load_urls(2000) + EDGE_CASE_URLS)
+    results = []
+    for n in sizes:
+        urls = load_urls(n)
+        scalar_time, _ = time_call(scalar_extract, urls, repeat=repeat)
+        batch_time, _ = time_call(extract_features_batch, urls, repeat=repeat)
+        results.append({
+            'n_urls': n,
+            'scalar_seconds': scalar_time,
+            'batch_seconds': batch_time,
+            'scalar_urls_per_second': n / scalar_time,
+            'batch_urls_per_second': n / batch_time,
+            'speedup': scalar_time / batch_time,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 1000000])
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    for row in run(args.sizes, args.repeat):
+        print(
+            f"{row['n_urls']:>9} URLs: scalar {row['scalar_seconds']:.3f}s "
+            f"({row['scalar_urls_per_second']:,.0f}/s), batch {row['batch_seconds']:.3f}s "
+            f"({row['batch_urls_per_second']:,.0f}/s), speedup {row['speedup']:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Time the single-URL feature kernel against the reference extractor, in ns per URL.
+
+``extract_feature_vector`` is the kernel the serving path calls once per
+URL. It is first checked against ``extract_advanced_features`` on the
+fixture corpus and on edge cases: every count and flag must be equal, and
+the ratios and entropy may only differ by float rounding. Then both are
+timed over ``--urls`` fixture URLs, the kernel once allocating its row and
+once filling the rows of a preallocated matrix as ``score_urls`` does.
+
+Usage:
+    python -m benchmarks.feature_kernel
+    python -m benchmarks.feature_kernel --urls 100000 --repeat 5
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import load_urls
+from benchmarks.feature_extraction import EDGE_CASE_URLS
+from api.ml_model.feature_extraction import (
+    _RATIO_FEATURES, extract_advanced_features, extract_feature_vector, get_feature_names
+)
+
+# Characters whose lowercase, digit or histogram handling differs from plain ASCII
+KERNEL_EDGE_CASE_URLS = [
+    'https://example.com/logİn', 'https://example.com/sİgnin', 'https://example.com/Key/update',
+    'https://example.com/ſecurity', 'https://example.com/²³/١٢٣', 'https://Example.com/LOGIN',
+    'https://example.tk/' + 'ab' * 3000, 'https://example.com/' + 'z' * 5000, None,
+]
+
+
+def check_parity(urls):
+    """Raise AssertionError if the kernel disagrees with ``extract_advanced_features``."""
+    names = get_feature_names()
+    exact = np.array([name not in _RATIO_FEATURES for name in names])
+    details = []
+    for url in urls:
+        expected = np.array([extract_advanced_features(url)[name] for name in names], dtype=np.float64)
+        actual = extract_feature_vector(url)
+        wrong = (exact & (actual != expected)) | (~exact & ~np.isclose(actual, expected, rtol=1e-12, atol=1e-12))
+        details.extend(
+            f"{url!r}: {names[c]} expected {expected[c]} got {actual[c]}" for c in np.flatnonzero(wrong)
+        )
+    if details:
+        raise AssertionError("Kernel features differ from the reference:\n" + "\n".join(details[:10]))
+
+
+def _ns_per_url(fn, urls, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        fn(urls)
+        best = min(best, time.perf_counter_ns() - started)
+    return best / len(urls)
+
+
+def _reference(urls):
+    for url in urls:
+        extract_advanced_features(url)
+
+
+def _kernel(urls):
+    for url in urls:
+        extract_feature_vector(url)
+
+
+def _kernel_into_rows(urls):
+    X = np.empty((len(urls), len(get_feature_names())), dtype=np.float64)
+    for i, url in enumerate(urls):
+        extract_feature_vector(url, X[i])
+
+
+def run(n_urls=20000, repeat=3):
+    check_parity(load_urls(5000) + EDGE_CASE_URLS + KERNEL_EDGE_CASE_URLS)
+    urls = load_urls(n_urls)
+    reference = _ns_per_url(_reference, urls, repeat)
+    kernel = _ns_per_url(_kernel, urls, repeat)
+    into_rows = _ns_per_url(_kernel_into_rows, urls, repeat)
+    return {
+        'urls': n_urls,
+        'reference_ns': reference,
+        'kernel_ns': kernel,
+        'kernel_into_rows_ns': into_rows,
+        'speedup': reference / kernel,
+        'into_rows_speedup': reference / into_rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--urls', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    result = run(args.urls, args.repeat)
+    print(f"kernel matches extract_advanced_features; timed over {result['urls']} URLs")
+    for label, key, speedup in (('extract_advanced_features', 'reference_ns', None),
+                                ('extract_feature_vector', 'kernel_ns', 'speedup'),
+                                ('into preallocated rows', 'kernel_into_rows_ns', 'into_rows_speedup')):
+        line = f"{label:>26}: {result[key]:8.0f} ns/URL"
+        print(line + (f" (x{result[speedup]:.1f})" if speedup else ''))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Measure /health latency while /analyze is saturated.
+
+Runs the FastAPI app in-process through an ASGI client, keeps ``--concurrency``
+/analyze requests in flight with cache-busting URLs, and probes /health on a
+fixed schedule. Each executor kind is measured in turn.
+
+Usage:
+    python -m benchmarks.health_latency --model api/saved_models/stack_ensemble_model.joblib
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.common import load_fixture_urls
+
+
+def _percentiles(samples):
+    if not samples:
+        return {'count': 0}
+    values = np.asarray(samples) * 1000.0
+    return {
+        'count': len(values),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max()),
+    }
+
+
+async def _saturate(client, urls, counter, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        url = f"{next(urls)}?bench={next(counter)}"
+        start = time.perf_counter()
+        response = await client.post('/analyze', json={'url': url})
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(response.status_code)
+
+
+async def _probe(client, deadline, interval, latencies):
+    # Latency is measured from when each probe was due, so probes delayed by a
+    # blocked event loop count against /health (no coordinated omission)
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        await client.get('/health')
+        now = time.perf_counter()
+        latencies.append(now - scheduled)
+        scheduled += interval
+        while scheduled < now - interval:
+            # Probes that should have been sent while we were stalled
+            latencies.append(now - scheduled)
+            scheduled += interval
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+
+
+async def _run_kind(kind, model_path, concurrency, duration, workers, interval):
+    from api import main
+    from api.cache import VerdictCache
+    from api.inference import InferenceExecutor
+    from api.ml_model.stack_ensemble import StackEnsembleModel
+
+    main.inference_executor.shutdown()
+    main.inference_executor = InferenceExecutor(
+        kind=kind, max_workers=workers, max_pending=concurrency * 2, timeout=60.0
+    )
+    main.verdict_cache = VerdictCache(0, 0)
+    main._set_model(StackEnsembleModel.load_model(model_path), model_path)
+
+    urls = itertools.cycle(load_fixture_urls())
+    counter = itertools.count()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        # Warm up workers (process pools load the model lazily)
+        await asyncio.gather(*(client.post('/analyze', json={'url': f'https://warmup.example/{i}'}) for i in range(workers)))
+
+        analyze_latencies, errors, health_latencies = [], [], []
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            _probe(client, deadline, interval, health_latencies),
+            *(_saturate(client, urls, counter, deadline, analyze_latencies, errors) for _ in range(concurrency))
+        )
+
+    main.inference_executor.shutdown()
+    return {
+        'executor': kind,
+        'concurrency': concurrency,
+        'analyze_per_second': len(analyze_latencies) / duration,
+        'analyze_errors': len(errors),
+        'analyze': _percentiles(analyze_latencies),
+        'health': _percentiles(health_latencies),
+    }
+
+
+def run(model_path, kinds=('inline', 'thread', 'process'), concurrency=32, duration=10.0, workers=4, interval=0.01):
+    logging.disable(logging.INFO)
+    return [
+        asyncio.run(_run_kind(kind, model_path, concurrency, duration, workers, interval))
+        for kind in kinds
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='api/saved_models/stack_ensemble_model.joblib')
+    parser.add_argument('--kinds', nargs='+', default=['inline', 'thread', 'process'])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    for row in run(args.model, args.kinds, args.concurrency, args.duration, args.workers):
+        health, analyze = row['health'], row['analyze']
+        print(
+            f"{row['executor']:>8}: /analyze {row['analyze_per_second']:.0f} req/s "
+            f"(p99 {analyze.get('p99_ms', 0):.1f} ms, {row['analyze_errors']} errors) | "
+            f"/health p50 {health.get('p50_ms', 0):.1f} ms, p99 {health.get('p99_ms', 0):.1f} ms, "
+            f"max {health.get('max_ms', 0):.1f} ms over {health['count']} probes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare the DataFrame-based request path with the array-based serving path.
+
+The old path builds a feature dict and a one-row DataFrame per request; the
+serving path writes features into a preallocated float64 row that goes
+straight to the model. Reports mean latency and the peak memory traced by
+``tracemalloc`` during a single request.
+
+Usage:
+    python -m benchmarks.hot_path --model api/saved_models/stack_ensemble_model.joblib
+"""
+
+import argparse
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+from benchmarks.common import load_urls
+from api.ml_model.feature_extraction import extract_advanced_features
+from api.ml_model.stack_ensemble import StackEnsembleModel
+from api.scoring import prepare_model, score_urls
+
+
+def dataframe_path(model, url):
+    features = extract_advanced_features(url)
+    return model.predict_proba(pd.DataFrame([features]))
+
+
+def array_path(model, url):
+    return score_urls(model, [url])
+
+
+def _measure(fn, model, urls):
+    fn(model, urls[0])
+    start = time.perf_counter()
+    for url in urls:
+        fn(model, url)
+    latency = (time.perf_counter() - start) / len(urls)
+
+    peaks = []
+    tracemalloc.start()
+    for url in urls[:50]:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn(model, url)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return latency, sum(peaks) / len(peaks)
+
+
+def run(model_path, n_requests=500, runtimes=('sklearn', 'compiled')):
+    warnings.filterwarnings('ignore', category=UserWarning)
+    urls = load_urls(n_requests)
+    results = []
+    for runtime in runtimes:
+        model = prepare_model(StackEnsembleModel.load_model(model_path), runtime)
+        for name, fn in (('dataframe', dataframe_path), ('array', array_path)):
+            latency, peak = _measure(fn, model, urls)
+            results.append({
+                'runtime': runtime,
+                'path': name,
+                'latency_us': latency * 1e6,
+                'peak_alloc_kib': peak / 1024,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='api/saved_models/stack_ensemble_model.joblib')
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    for row in run(args.model, args.requests):
+        print(
+            f"{row['runtime']:>8} / {row['path']:<9}: {row['latency_us']:9.1f} us per request, "
+            f"peak {row['peak_alloc_kib']:8.1f} KiB allocated"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Measure /analyze latency around a hot model swap.
+
+Runs the FastAPI app in-process through an ASGI client with ``--model``
+published as the current artifact in a scratch directory, keeps
+``--concurrency`` /analyze requests in flight, then publishes ``--new-model``
+halfway through and triggers ``reload_model``. Latencies are split into the
+windows before, during and after the swap.
+
+Usage:
+    python -m benchmarks.hot_swap --model old.joblib --new-model new.joblib
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import load_fixture_urls
+from benchmarks.health_latency import _percentiles
+
+
+async def _saturate(client, urls, counter, deadline, samples, errors):
+    while time.perf_counter() < deadline:
+        url = f"{next(urls)}?bench={next(counter)}"
+        start = time.perf_counter()
+        response = await client.post('/analyze', json={'url': url})
+        end = time.perf_counter()
+        if response.status_code == 200:
+            samples.append((start, end))
+        else:
+            errors.append(response.status_code)
+
+
+async def _run(model_path, new_model_path, kind, concurrency, duration, workers):
+    from api import config, main
+    from api.cache import VerdictCache
+    from api.inference import InferenceExecutor
+    from api.ml_model.model_store import publish_model
+    from api.ml_model.stack_ensemble import StackEnsembleModel
+    from api.scoring import load_serving_model
+
+    scratch = tempfile.mkdtemp(prefix='hot-swap-')
+    config.MODEL_PATH = os.path.join(scratch, 'stack_ensemble_model.joblib')
+    publish_model(StackEnsembleModel.load_model(model_path, strict=True), config.MODEL_PATH)
+
+    main.inference_executor.shutdown()
+    main.inference_executor = InferenceExecutor(
+        kind=kind, max_workers=workers, max_pending=concurrency * 2, timeout=60.0,
+        runtime=config.MODEL_RUNTIME
+    )
+    main.verdict_cache = VerdictCache(0, 0)
+    main._set_model(load_serving_model(config.MODEL_PATH, config.MODEL_RUNTIME), config.MODEL_PATH)
+    new_model = StackEnsembleModel.load_model(new_model_path, strict=True)
+
+    urls = itertools.cycle(load_fixture_urls())
+    counter = itertools.count()
+    samples, errors = [], []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        await main._warm_up(1)
+
+        async def swap():
+            await asyncio.sleep(duration / 2)
+            swap_start = time.perf_counter()
+            publish_model(new_model, config.MODEL_PATH)
+            result = await main.reload_model()
+            return swap_start, time.perf_counter(), result
+
+        deadline = time.perf_counter() + duration
+        (swap_start, swap_end, result), *_ = await asyncio.gather(
+            swap(),
+            *(_saturate(client, urls, counter, deadline, samples, errors) for _ in range(concurrency))
+        )
+
+    main.inference_executor.shutdown()
+    windows = {
+        'before': [end - start for start, end in samples if end < swap_start],
+        'during': [end - start for start, end in samples if end >= swap_start and start <= swap_end],
+        'after': [end - start for start, end in samples if start > swap_end],
+    }
+    return {
+        'executor': kind,
+        'swapped': result['swapped'],
+        'swap_seconds': swap_end - swap_start,
+        'errors': len(errors),
+        **{name: _percentiles(values) for name, values in windows.items()},
+    }
+
+
+def run(model_path, new_model_path, kinds=('thread', 'process'), concurrency=16, duration=10.0, workers=4):
+    logging.disable(logging.INFO)
+    return [
+        asyncio.run(_run(model_path, new_model_path, kind, concurrency, duration, workers))
+        for kind in kinds
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='api/saved_models/stack_ensemble_model.joblib')
+    parser.add_argument('--new-model', required=True)
+    parser.add_argument('--kinds', nargs='+', default=['thread', 'process'])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    for row in run(args.model, args.new_model, args.kinds, args.concurrency, args.duration, args.workers):
+        print(
+            f"{row['executor']:>8}: swap {'done' if row['swapped'] else 'skipped'} in "
+            f"{row['swap_seconds'] * 1000:.0f} ms, {row['errors']} errors"
+        )
+        for window in ('before', 'during', 'after'):
+            stats = row[window]
+            print(
+                f"          {window:<6}: p50 {stats.get('p50_ms', 0):7.1f} ms, p99 {stats.get('p99_ms', 0):7.1f} ms, "
+                f"max {stats.get('max_ms', 0):7.1f} ms over {stats['count']} requests"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare an incremental model update with a full retrain on a new campaign.
+
+Trains the ensemble the way ``train_model.py`` does, then labels a
+campaign of URLs from ``SyntheticDataGenerator``, whose domains and paths
+the training data never shows, and runs ``update_model.update_from_labels``
+with ``--full-retrain``. Reports the seconds each path takes and accuracy
+on held-out campaign rows and on the original test rows.
+
+Usage:
+    python -m benchmarks.incremental_update
+    python -m benchmarks.incremental_update --campaign-rows 5000 --extra-estimators 0 20 50
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.common import ROOT_DIR  # noqa: F401  (puts the api package on sys.path)
+
+
+def run(campaign_rows=2000, extra_estimators=(20,), workers=None):
+    from api.data_collection.synthetic_data_generator import SyntheticDataGenerator
+    from api.ml_model.stack_ensemble import StackEnsembleModel
+    from api.ml_model.train_model import build_base_models, training_split
+    from update_model import update_from_labels
+
+    warnings.filterwarnings('ignore', category=UserWarning)
+    logging.disable(logging.INFO)
+    X_train, _, y_train, _ = training_split()
+    base = StackEnsembleModel(base_models=build_base_models()).fit(X_train, y_train, n_jobs=workers)
+
+    rng = np.random.default_rng(42)
+    campaign = SyntheticDataGenerator().generate_columns(
+        campaign_rows, campaign_rows // 2, rng, datetime(2025, 1, 1)
+    )
+    urls, labels = campaign['url'].tolist(), campaign['potentially_malicious'].astype(int)
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix='incremental-update-') as scratch:
+        base_path = os.path.join(scratch, 'base.joblib')
+        base.save_model(base_path)
+        for i, extra in enumerate(extra_estimators):
+            model_path = os.path.join(scratch, f'model{i}', 'model.joblib')
+            os.makedirs(os.path.dirname(model_path))
+            shutil.copy(base_path, model_path)
+            report = update_from_labels(model_path, urls, labels, extra_estimators=extra,
+                                        full_retrain=i == 0, publish=False, n_jobs=workers)
+            rows.append({'extra_estimators': extra, **report})
+    # Every run retrains the same way, so the first run's retrain stands for all of them
+    for row in rows[1:]:
+        row['full_retrain'] = rows[0]['full_retrain']
+        row['full_retrain_seconds'] = rows[0]['full_retrain_seconds']
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--campaign-rows', type=int, default=2000)
+    parser.add_argument('--extra-estimators', type=int, nargs='+', default=[20])
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    rows = run(args.campaign_rows, args.extra_estimators, args.workers)
+    print(f"full retrain: {rows[0]['full_retrain_seconds']:.2f}s, accuracy "
+          + ', '.join(f"{name} {value:.4f}" for name, value in rows[0]['full_retrain'].items()))
+    print(f"before update: accuracy "
+          + ', '.join(f"{name} {value:.4f}" for name, value in rows[0]['before'].items()))
+    for row in rows:
+        print(f"update +{row['extra_estimators']:>3} estimators: {row['update_seconds']:.2f}s "
+              f"(x{row['full_retrain_seconds'] / row['update_seconds']:.0f} faster), accuracy "
+              + ', '.join(f"{name} {value:.4f}" for name, value in row['after'].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Measure the cost of the /metrics instrumentation.
+
+Reports the cost of the individual primitives, then the instrumentation a
+single /analyze request pays: the ASGI middleware around a no-op app, six
+histogram observations and one counter increment, plus the stage timing
+inside ``score_urls``. Finally times rendering /metrics.
+
+Usage:
+    python -m benchmarks.metrics_overhead --model api/saved_models/stack_ensemble_model.joblib
+"""
+
+import argparse
+import asyncio
+import time
+import warnings
+
+from benchmarks.common import load_urls
+from api.metrics import Counter, Histogram, MetricsMiddleware, MetricsRegistry
+from api.ml_model.stack_ensemble import StackEnsembleModel
+from api.scoring import score_urls
+
+
+def _per_call_ns(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e9
+
+
+async def _noop_app(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _asgi_ns(app, n):
+    scope = {'type': 'http', 'path': '/analyze'}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def _score_ns(model, urls, observe):
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for url in urls:
+            score_urls(model, [url], observe)
+        best = min(best, (time.perf_counter() - start) / len(urls) * 1e9)
+    return best
+
+
+def run(model_path, n=200000, n_requests=300):
+    warnings.filterwarnings('ignore', category=UserWarning)
+    histogram = Histogram('bench_seconds', 'bench', ('stage',))
+    counter = Counter('bench_total', 'bench', ('endpoint', 'status'))
+    observe_ns = _per_call_ns(lambda: histogram.observe(0.0042, 'base_models'), n)
+    inc_ns = _per_call_ns(lambda: counter.inc('/analyze', '200'), n)
+
+    middleware = MetricsMiddleware(_noop_app, counter, histogram, routes=lambda: ['/analyze'])
+    bare_ns = asyncio.run(_asgi_ns(_noop_app, n // 4))
+    wrapped_ns = asyncio.run(_asgi_ns(middleware, n // 4))
+
+    # Stage timing inside score_urls, recorded like the executor does
+    model = StackEnsembleModel.load_model(model_path)
+    urls = load_urls(n_requests)
+    stages = Histogram('bench_stage_seconds', 'bench', ('stage',))
+    untimed_ns = _score_ns(model, urls, None)
+    timed_ns = _score_ns(model, urls, lambda stage, seconds: stages.observe(seconds, stage))
+
+    registry = MetricsRegistry()
+    for name in ('a', 'b', 'c', 'd'):
+        h = registry.register(Histogram(f'bench_{name}_seconds', 'bench', ('stage',)))
+        for stage in ('feature_extraction', 'base_models', 'meta_model', 'confidence'):
+            h.observe(0.001, stage)
+    render_us = _per_call_ns(registry.render, 2000) / 1000
+
+    return {
+        'histogram_observe_ns': observe_ns,
+        'counter_inc_ns': inc_ns,
+        'middleware_ns': wrapped_ns - bare_ns,
+        'score_urls_untimed_us': untimed_ns / 1000,
+        'score_urls_timed_us': timed_ns / 1000,
+        # Middleware plus 6 observations (4 stages, batch size, HTTP latency) and 1 increment
+        'per_request_estimate_ns': (wrapped_ns - bare_ns) + 5 * observe_ns,
+        'render_us': render_us,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='api/saved_models/stack_ensemble_model.joblib')
+    args = parser.parse_args()
+
+    row = run(args.model)
+    print(f"Histogram.observe:        {row['histogram_observe_ns']:8.0f} ns")
+    print(f"Counter.inc:              {row['counter_inc_ns']:8.0f} ns")
+    print(f"MetricsMiddleware:        {row['middleware_ns']:8.0f} ns per request (includes 1 observe + 1 inc)")
+    print(f"Per /analyze request:     {row['per_request_estimate_ns']:8.0f} ns")
+    print(f"score_urls, 1 URL:        {row['score_urls_untimed_us']:8.1f} us untimed, {row['score_urls_timed_us']:.1f} us with stage timings")
+    print(f"Render /metrics:          {row['render_us']:8.1f} us for 16 histogram series")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Throughput versus p99 latency of /analyze with and without micro-batching.
+
+Runs the FastAPI app in-process through an ASGI client with the verdict
+cache disabled and unique URLs, and keeps ``concurrency`` closed-loop clients
+busy for ``--duration`` seconds at each concurrency level. Each level is run
+once with every request scored on its own and once with concurrent requests
+coalesced by ``api.batching.MicroBatcher``.
+
+Usage:
+    python -m benchmarks.microbatching --model api/saved_models/stack_ensemble_model.joblib
+    python -m benchmarks.microbatching --concurrency 1 16 256 --max-size 256 --max-wait 0.005
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import time
+import warnings
+
+import httpx
+
+from benchmarks.common import load_fixture_urls
+from benchmarks.health_latency import _percentiles
+from benchmarks.hot_swap import _saturate
+
+
+async def _run(model_path, kind, workers, concurrency, duration, max_size, max_wait):
+    from api import config, main
+    from api.batching import MicroBatcher
+    from api.cache import VerdictCache
+    from api.inference import InferenceExecutor
+    from api.scoring import load_serving_model
+
+    main.inference_executor.shutdown()
+    main.inference_executor = InferenceExecutor(
+        kind=kind, max_workers=workers, max_pending=max(64, concurrency * 2), timeout=60.0,
+        runtime=config.MODEL_RUNTIME
+    )
+    config.MICROBATCH_MAX_SIZE = max_size
+    main.microbatcher = MicroBatcher(main._score_coalesced, max(1, max_size), max_wait, workers)
+    main.verdict_cache = VerdictCache(0, 0)
+    main._set_model(load_serving_model(model_path, config.MODEL_RUNTIME), model_path)
+
+    urls = itertools.cycle(load_fixture_urls())
+    counter = itertools.count()
+    samples, errors = [], []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        await main._warm_up(1)
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            _saturate(client, urls, counter, deadline, samples, errors) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    main.inference_executor.shutdown()
+    batching = main.microbatcher.stats()
+    return {
+        'batching': max_size > 1,
+        'concurrency': concurrency,
+        'throughput_rps': len(samples) / elapsed,
+        'errors': len(errors),
+        'mean_batch_size': batching['mean_batch_size'] if max_size > 1 else 1.0,
+        **_percentiles([end - start for start, end in samples]),
+    }
+
+
+def run(model_path, concurrency_levels=(1, 4, 16, 64, 256), kind='thread', workers=4,
+        duration=5.0, max_size=256, max_wait=0.005):
+    warnings.filterwarnings('ignore', category=UserWarning)
+    logging.disable(logging.INFO)
+    rows = []
+    for concurrency in concurrency_levels:
+        for size in (1, max_size):
+            rows.append(asyncio.run(_run(model_path, kind, workers, concurrency, duration, size, max_wait)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='api/saved_models/stack_ensemble_model.joblib')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64, 256])
+    parser.add_argument('--kind', default='thread', choices=['thread', 'process', 'inline'])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--max-size', type=int, default=256)
+    parser.add_argument('--max-wait', type=float, default=0.005)
+    args = parser.parse_args()
+
+    rows = run(args.model, args.concurrency, args.kind, args.workers, args.duration, args.max_size, args.max_wait)
+    print(f"{'mode':>10} {'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'batch':>6} {'errors':>6}")
+    for row in rows:
+        print(
+            f"{'batched' if row['batching'] else 'single':>10} {row['concurrency']:>8} "
+            f"{row['throughput_rps']:8.0f} {row.get('p50_ms', 0):8.1f} {row.get('p99_ms', 0):8.1f} "
+            f"{row['mean_batch_size']:6.1f} {row['errors']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Measure per-worker memory of the loaded model with and without memory-mapping.
+
+Starts ``--workers`` processes that each load the model the way an API worker
+does, score a few URLs so every array is paged in, and then report how much
+their memory grew. RSS counts shared pages in every process; PSS splits them
+between the processes sharing them, and private memory is what each worker
+holds on its own. Linux only (reads ``/proc/self/smaps_rollup``).
+
+Modes:
+    sklearn          joblib artifact, sklearn estimators (private tree arrays)
+    compiled-private compiled at load time in every worker
+    compiled-mmap    compiled arrays memory-mapped from the shared .npy directory
+
+Usage:
+    python -m benchmarks.model_memory --model api/saved_models/stack_ensemble_model.joblib --workers 4
+"""
+
+import argparse
+import multiprocessing
+import warnings
+from typing import Dict
+
+from benchmarks.common import load_urls
+
+MODES = ('sklearn', 'compiled-private', 'compiled-mmap')
+
+
+def _memory_kib() -> Dict[str, int]:
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'private': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def _worker(mode, model_path, urls, loaded, results):
+    warnings.filterwarnings('ignore', category=UserWarning)
+    from api.ml_model.stack_ensemble import StackEnsembleModel
+    from api.ml_model.feature_extraction import extract_feature_vector
+    from api.scoring import load_serving_model, prepare_model, score_urls
+
+    # Extract features before loading so the public suffix list is in the baseline
+    for url in urls:
+        extract_feature_vector(url)
+    try:
+        before = _memory_kib()
+        if mode == 'compiled-private':
+            model = prepare_model(StackEnsembleModel.load_model(model_path, strict=True), 'compiled')
+        else:
+            model = load_serving_model(model_path, 'compiled' if mode == 'compiled-mmap' else 'sklearn')
+        score_urls(model, urls)
+        # Measure only once every worker holds the model, so shared pages are split
+        loaded.wait()
+        after = _memory_kib()
+        results.put({key: after[key] - before[key] for key in after})
+        loaded.wait()
+    except BaseException as e:
+        # Release the other workers and the parent instead of leaving them waiting
+        loaded.abort()
+        results.put({'error': repr(e)})
+        raise
+
+
+def run(model_path, workers=4, modes=MODES, n_urls=256):
+    urls = load_urls(n_urls)
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for mode in modes:
+        if mode == 'compiled-mmap':
+            # Write the shared arrays up front, as the first deployment would
+            from api.scoring import load_serving_model
+            load_serving_model(model_path, 'compiled')
+        loaded = context.Barrier(workers)
+        queue = context.Queue()
+        processes = [
+            context.Process(target=_worker, args=(mode, model_path, urls, loaded, queue))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        deltas = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+        errors = [d['error'] for d in deltas if 'error' in d]
+        if errors:
+            raise RuntimeError(f"{mode} worker failed: {errors[0]}")
+        results.append({
+            'mode': mode,
+            'workers': workers,
+            **{f'{key}_kib_per_worker': sum(d[key] for d in deltas) / workers for key in deltas[0]},
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='api/saved_models/stack_ensemble_model.joblib')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    for row in run(args.model, args.workers):
+        print(
+            f"{row['mode']:>16} x {row['workers']}: RSS +{row['rss_kib_per_worker'] / 1024:7.2f} MiB, "
+            f"PSS +{row['pss_kib_per_worker'] / 1024:7.2f} MiB, "
+            f"private +{row['private_kib_per_worker'] / 1024:7.2f} MiB per worker"
+        )
+
+
+if __name__ == "__main__":
+    main()
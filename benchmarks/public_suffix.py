@@ -0,0 +1,115 @@
+"""
+Compare the bundled public suffix trie with ``tld.get_tld`` on the fixture corpus.
+
+Reports the one-off cost each pays before its first lookup, measured in a
+fresh interpreter, and lookups per second over ``--urls`` fixture URLs:
+``tld.get_tld`` parses the URL itself, so the trie is timed both with the
+same ``urlsplit`` and on the already parsed host the feature extractors
+pass it. Also counts URLs where the two disagree, which should be none.
+Needs the ``tld`` package.
+
+Usage:
+    python -m benchmarks.public_suffix
+    python -m benchmarks.public_suffix --urls 1000000
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.common import ROOT_DIR, load_urls, time_call
+
+_COLD_TLD = (
+    "import time, tld\n"
+    "started = time.perf_counter()\n"
+    "tld.get_tld('https://www.example.co.uk/', as_object=True)\n"
+    "print(time.perf_counter() - started)\n"
+)
+# Rebuilds the trie after import, so the time leaves out the api.ml_model package imports
+_COLD_TRIE = (
+    "import time\n"
+    "from api.ml_model.public_suffix import PublicSuffixTrie\n"
+    "started = time.perf_counter()\n"
+    "PublicSuffixTrie.load().split('www.example.co.uk')\n"
+    "print(time.perf_counter() - started)\n"
+)
+
+
+def _cold_seconds(code):
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.strip())
+
+
+def _tld_split(urls):
+    import tld
+
+    results = []
+    for url in urls:
+        try:
+            res = tld.get_tld(url, as_object=True)
+            results.append((res.suffix, res.fld))
+        except Exception:
+            results.append(None)
+    return results
+
+
+def _trie_split(urls):
+    from api.ml_model.public_suffix import PUBLIC_SUFFIXES, netloc_hostname
+
+    split = PUBLIC_SUFFIXES.split
+    results = []
+    for url in urls:
+        try:
+            results.append(split(netloc_hostname(urlsplit(url).netloc)))
+        except ValueError:
+            results.append(None)
+    return results
+
+
+def _trie_split_hosts(hosts):
+    from api.ml_model.public_suffix import PUBLIC_SUFFIXES
+
+    split = PUBLIC_SUFFIXES.split
+    return [split(host) for host in hosts]
+
+
+def run(n_urls=200000):
+    from api.ml_model.public_suffix import netloc_hostname
+
+    urls = load_urls(n_urls)
+    hosts = [netloc_hostname(urlsplit(url).netloc) for url in urls]
+    tld_seconds, expected = time_call(_tld_split, urls)
+    trie_seconds, got = time_call(_trie_split, urls)
+    host_seconds, _ = time_call(_trie_split_hosts, hosts)
+    return {
+        'urls': n_urls,
+        'tld_cold_seconds': _cold_seconds(_COLD_TLD),
+        'trie_cold_seconds': _cold_seconds(_COLD_TRIE),
+        'tld_per_second': n_urls / tld_seconds,
+        'trie_per_second': n_urls / trie_seconds,
+        'trie_host_per_second': n_urls / host_seconds,
+        'mismatches': sum(a != b for a, b in zip(expected, got)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--urls', type=int, default=200000)
+    args = parser.parse_args()
+
+    result = run(args.urls)
+    print(f"first lookup in a fresh process: tld {result['tld_cold_seconds'] * 1e3:.1f} ms, "
+          f"trie {result['trie_cold_seconds'] * 1e3:.1f} ms (parse and build)")
+    for label, key in (('tld.get_tld', 'tld_per_second'), ('trie + urlsplit', 'trie_per_second'),
+                       ('trie on parsed host', 'trie_host_per_second')):
+        rate = result[key]
+        print(f"{label:>20}: {rate:10.0f} URLs/s ({1e6 / rate:.2f} us/URL, "
+              f"x{rate / result['tld_per_second']:.1f} vs tld)")
+    print(f"{result['mismatches']} of {result['urls']} URLs differ from tld")
+
+
+if __name__ == "__main__":
+    main()
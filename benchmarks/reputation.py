@@ -0,0 +1,119 @@
+"""
+Measure the domain reputation index: size, lookup cost and share of URLs it decides.
+
+Builds indexes of ``--entries`` random domains and reports build time,
+memory and the cost of a lookup, one URL at a time and in batches. The
+index built from the default lists is then run over the fixture URLs of
+``data/*.csv`` to report the share of URLs that would skip the model, and
+with ``--model`` the time per URL that scoring those URLs costs instead.
+
+Usage:
+    python -m benchmarks.reputation
+    python -m benchmarks.reputation --entries 1000000 5000000 --model api/saved_models/stack_ensemble_model.joblib
+"""
+
+import argparse
+import glob
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import ROOT_DIR
+
+
+def _random_domains(n, rng):
+    labels = rng.integers(0, 16, size=(n, 10), dtype=np.uint8)
+    names = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)[labels].view('S10').ravel().astype(str)
+    tlds = np.array(['com', 'net', 'org', 'co.uk', 'io', 'de'])[rng.integers(0, 6, size=n)]
+    return np.char.add(np.char.add(names, '.'), tlds).tolist()
+
+
+def _fixture_urls():
+    urls = []
+    for path in sorted(glob.glob(os.path.join(ROOT_DIR, 'data', '*.csv'))):
+        try:
+            urls.extend(pd.read_csv(path, usecols=['url'], dtype=str)['url'].dropna().tolist())
+        except (pd.errors.EmptyDataError, ValueError):
+            continue
+    return urls
+
+
+def run(entries=(1000000,), model_path=None, lookups=100000):
+    from api.reputation import DomainReputationIndex, load_index
+
+    rng = np.random.default_rng(42)
+    sizes = []
+    for n in entries:
+        domains = _random_domains(n, rng)
+        started = time.perf_counter()
+        index = DomainReputationIndex.build(domains[: n // 2], domains[n // 2:])
+        build_seconds = time.perf_counter() - started
+
+        # Half of the lookups are subdomains of listed domains, half are unlisted
+        sample = rng.choice(n, size=lookups // 2)
+        urls = [f"https://www.{domains[i]}/path" for i in sample.tolist()]
+        urls += [f"https://{domain}/path" for domain in _random_domains(lookups - len(urls), rng)]
+        started = time.perf_counter()
+        for url in urls[:10000]:
+            index.decide([url])
+        single = (time.perf_counter() - started) / 10000
+        started = time.perf_counter()
+        decided = 0
+        for start in range(0, len(urls), 1000):
+            decided += sum(v is not None for v in index.decide(urls[start:start + 1000]))
+        batched = (time.perf_counter() - started) / len(urls)
+        sizes.append({
+            'entries': len(index),
+            'mib': index.stats()['bytes'] / 2 ** 20,
+            'build_seconds': build_seconds,
+            'lookup_us': single * 1e6,
+            'batched_lookup_us': batched * 1e6,
+            'decided': decided / len(urls),
+        })
+        del domains, index
+
+    urls = _fixture_urls()
+    index = load_index('')
+    started = time.perf_counter()
+    verdicts = index.decide(urls)
+    fixture = {
+        'urls': len(urls),
+        'skip_ratio': index.stats()['skip_ratio'],
+        'lookup_us': (time.perf_counter() - started) / max(1, len(urls)) * 1e6,
+    }
+    if model_path:
+        from api.scoring import load_serving_model, score_urls
+
+        warnings.filterwarnings('ignore', category=UserWarning)
+        model = load_serving_model(model_path, 'sklearn')
+        skipped = [url for url, verdict in zip(urls, verdicts) if verdict is not None][:2000]
+        score_urls(model, skipped[:10])
+        started = time.perf_counter()
+        for url in skipped:
+            score_urls(model, [url])
+        fixture['model_us'] = (time.perf_counter() - started) / max(1, len(skipped)) * 1e6
+    return sizes, fixture
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, nargs='+', default=[1000000])
+    parser.add_argument('--model', help='also time scoring the URLs the index decides')
+    args = parser.parse_args()
+
+    sizes, fixture = run(args.entries, args.model)
+    for row in sizes:
+        print(f"{row['entries']:>9} entries: {row['mib']:.1f} MiB index, built in {row['build_seconds']:.1f}s, "
+              f"{row['lookup_us']:.1f}us per lookup, {row['batched_lookup_us']:.1f}us per URL in batches of 1000")
+    line = (f"fixtures: {fixture['skip_ratio']:.1%} of {fixture['urls']} URLs decided without the model, "
+            f"{fixture['lookup_us']:.1f}us per URL")
+    if 'model_us' in fixture:
+        line += f", versus {fixture['model_us']:.0f}us to score one of them"
+    print(line)
+
+
+if __name__ == "__main__":
+    main()
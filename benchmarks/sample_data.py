@@ -0,0 +1,59 @@
+"""
+Time ``train_model.generate_sample_data`` at increasing sample counts.
+
+Reports the seconds spent decoding the random stream into samples, the
+total time including feature extraction, and peak resident memory.
+
+Usage:
+    python -m benchmarks.sample_data --sizes 10000 1000000 10000000
+"""
+
+import argparse
+import resource
+import time
+import warnings
+
+import numpy as np
+
+from benchmarks.common import ROOT_DIR  # noqa: F401  (puts the api package on sys.path)
+
+
+def run(sizes=(10000, 1000000, 10000000)):
+    from api.ml_model import train_model
+
+    warnings.filterwarnings('ignore', category=UserWarning)
+    rows = []
+    for n in sizes:
+        np.random.seed(42)
+        started = time.perf_counter()
+        train_model._draw_samples(n)
+        draw_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        X, y = train_model.generate_sample_data(n)
+        seconds = time.perf_counter() - started
+        rows.append({
+            'samples': n,
+            'draw_seconds': draw_seconds,
+            'seconds': seconds,
+            'frame_mib': X.memory_usage().sum() / 2 ** 20,
+            'peak_rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        })
+        del X, y
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 1000000, 10000000])
+    args = parser.parse_args()
+
+    for row in run(args.sizes):
+        print(
+            f"{row['samples']:>9} samples: {row['seconds']:7.2f}s total, {row['draw_seconds']:6.2f}s drawing, "
+            f"{row['frame_mib']:6.0f} MiB of features, peak RSS {row['peak_rss_mib']:.0f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
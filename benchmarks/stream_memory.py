@@ -0,0 +1,174 @@
+"""
+Measure server memory and throughput of the streaming /analyze/stream endpoint.
+
+Starts uvicorn in a subprocess with ``--model``, streams uploads of
+increasing size to it without building them in memory, reads the NDJSON
+verdicts back line by line and samples the server's resident set size while
+it works. Flat peak RSS across sizes shows the upload and the results are
+never held whole.
+
+Usage:
+    python -m benchmarks.stream_memory --model api/saved_models/stack_ensemble_model.joblib
+    python -m benchmarks.stream_memory --sizes 10000 100000 1000000 --format csv
+"""
+
+import argparse
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+from benchmarks.common import ROOT_DIR, load_fixture_urls
+
+
+def _rss_mib(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _upload(n, fmt):
+    """Yield the request body for ``n`` unique fixture URLs in small pieces."""
+    urls = itertools.cycle(load_fixture_urls())
+    if fmt == 'csv':
+        yield b'id,url\n'
+    lines = []
+    for i in range(n):
+        url = f"{next(urls)}?row={i}"
+        lines.append(f'{i},{url}\n' if fmt == 'csv' else json.dumps({'url': url}) + '\n')
+        if len(lines) == 1000:
+            yield ''.join(lines).encode('utf-8')
+            lines = []
+    if lines:
+        yield ''.join(lines).encode('utf-8')
+
+
+def _stream(port, n, fmt):
+    """
+    POST a chunked upload while reading the chunked NDJSON response.
+
+    The server answers while it is still reading, so the client has to
+    upload and download at the same time; clients that send the whole body
+    before reading (like httpx) stall once the socket buffers fill.
+    """
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    sock = socket.create_connection(('127.0.0.1', port))
+
+    def upload():
+        sock.sendall(
+            f"POST /analyze/stream HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: {content_type}\r\n"
+            "Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n".encode('ascii')
+        )
+        for piece in _upload(n, fmt):
+            sock.sendall(b'%x\r\n%s\r\n' % (len(piece), piece))
+        sock.sendall(b'0\r\n\r\n')
+    uploader = threading.Thread(target=upload, daemon=True)
+    uploader.start()
+
+    scored = failed = 0
+    with sock, sock.makefile('rb') as response:
+        status = response.readline().split()[1]
+        if status != b'200':
+            raise RuntimeError(f"/analyze/stream answered {status.decode()}")
+        while response.readline() not in (b'\r\n', b''):
+            pass
+        # Each chunk holds whole result lines
+        while True:
+            size = int(response.readline().split(b';')[0], 16)
+            if size == 0:
+                break
+            data = response.read(size)
+            response.readline()
+            scored += data.count(b'\n')
+            failed += data.count(b'"error":')
+    uploader.join()
+    return scored, failed
+
+
+def _start_server(model_path, port, workers):
+    env = dict(os.environ, MODEL_PATH=os.path.abspath(model_path), WARMUP_ROUNDS='1',
+               MODEL_WATCH_INTERVAL='0', INFERENCE_WORKERS=str(workers), PYTHONPATH=ROOT_DIR)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api.main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=ROOT_DIR, env=env
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if httpx.get(f'http://127.0.0.1:{port}/ready').status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    server.kill()
+    raise RuntimeError('Server did not become ready')
+
+
+def run(model_path, sizes=(10000, 100000, 1000000), fmt='ndjson', workers=4):
+    port = _free_port()
+    server = _start_server(model_path, port, workers)
+    rows = []
+    try:
+        idle_rss = _rss_mib(server.pid)
+        for n in sizes:
+            peak = [_rss_mib(server.pid)]
+            done = threading.Event()
+
+            def sample():
+                while not done.wait(0.2):
+                    peak[0] = max(peak[0], _rss_mib(server.pid))
+            sampler = threading.Thread(target=sample, daemon=True)
+            sampler.start()
+
+            started = time.perf_counter()
+            scored, failed = _stream(port, n, fmt)
+            elapsed = time.perf_counter() - started
+            done.set()
+            sampler.join()
+            rows.append({
+                'urls': n,
+                'results': scored,
+                'errors': failed,
+                'seconds': elapsed,
+                'urls_per_second': n / elapsed,
+                'idle_rss_mib': idle_rss,
+                'peak_rss_mib': peak[0],
+            })
+    finally:
+        server.terminate()
+        server.wait()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='api/saved_models/stack_ensemble_model.joblib')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--format', dest='fmt', choices=['ndjson', 'csv'], default='ndjson')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    for row in run(args.model, args.sizes, args.fmt, args.workers):
+        print(
+            f"{row['urls']:>9} URLs: {row['results']} results ({row['errors']} errors) in {row['seconds']:.1f}s, "
+            f"{row['urls_per_second']:.0f} URLs/s, server RSS {row['idle_rss_mib']:.0f} MiB idle, "
+            f"{row['peak_rss_mib']:.0f} MiB peak"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Reproducible benchmark suite with JSON results that can be compared between commits.
+
+Covers feature extraction, ``predict_proba`` at batch sizes from 1 to 10,000
+for both model runtimes, and /analyze end-to-end through an in-process ASGI
+client. Every case is timed ``--repeat`` times with the garbage collector
+paused, on the bundled ``data/synthetic_twitter_urls_*.csv`` fixtures.
+
+Usage:
+    python -m benchmarks run --output before.json
+    python -m benchmarks run --output after.json --cases 'inference.*'
+    python -m benchmarks compare before.json after.json --threshold 0.1
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import gc
+import hashlib
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.common import ROOT_DIR, load_fixture_urls, load_urls
+
+SCHEMA_VERSION = 1
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+STATS = ('median', 'min', 'mean')
+
+
+def _sample(fn: Callable[[], object], number: int, repeat: int) -> List[float]:
+    """Seconds per call of ``fn`` for each of ``repeat`` runs of ``number`` calls."""
+    fn()
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            samples.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return samples
+
+
+def _summarize(samples: List[float], unit: str, **params) -> Dict:
+    return {
+        'unit': unit,
+        'params': params,
+        'samples': samples,
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def _extraction_cases(repeat: int) -> Dict[str, Callable[[], Dict]]:
+    from api.ml_model.batch_features import extract_features_batch
+    from api.ml_model.feature_extraction import extract_advanced_features, extract_feature_vector
+
+    urls = load_urls(2000)
+    batch_urls = load_urls(10000)
+
+    def per_url(fn):
+        def loop():
+            for url in urls:
+                fn(url)
+        return lambda: _summarize(
+            [s / len(urls) for s in _sample(loop, 1, repeat)], 's/url', n_urls=len(urls)
+        )
+
+    return {
+        'extraction.extract_advanced_features': per_url(extract_advanced_features),
+        'extraction.extract_feature_vector': per_url(extract_feature_vector),
+        'extraction.extract_features_batch': lambda: _summarize(
+            [s / len(batch_urls) for s in _sample(lambda: extract_features_batch(batch_urls), 1, repeat)],
+            's/url', n_urls=len(batch_urls)
+        ),
+    }
+
+
+def _inference_cases(model_path: str, repeat: int) -> Dict[str, Callable[[], Dict]]:
+    from api.ml_model.batch_features import extract_features_batch
+    from api.ml_model.stack_ensemble import StackEnsembleModel
+    from api.scoring import prepare_model
+
+    X = extract_features_batch(load_urls(max(BATCH_SIZES)))
+    cases = {}
+    for runtime in ('sklearn', 'compiled'):
+        for size in BATCH_SIZES:
+            def case(runtime=runtime, size=size):
+                model = prepare_model(StackEnsembleModel.load_model(model_path, strict=True), runtime)
+                rows = X[:size]
+                # Small batches are too fast to time one call at a time
+                number = max(1, 200 // size)
+                return _summarize(
+                    _sample(lambda: model.predict_proba(rows), number, repeat), 's/call',
+                    runtime=runtime, batch_size=size
+                )
+            cases[f'inference.predict_proba[{runtime},{size}]'] = case
+    return cases
+
+
+async def _analyze_latencies(model_path: str, n_requests: int, cached: bool) -> List[float]:
+    import httpx
+    from api import config, main
+    from api.cache import VerdictCache
+    from api.inference import InferenceExecutor
+    from api.scoring import load_serving_model
+
+    main.inference_executor.shutdown()
+    main.inference_executor = InferenceExecutor(
+        kind=config.INFERENCE_EXECUTOR, max_workers=config.INFERENCE_WORKERS,
+        max_pending=config.INFERENCE_MAX_PENDING, timeout=60.0, runtime=config.MODEL_RUNTIME
+    )
+    main.verdict_cache = VerdictCache(config.VERDICT_CACHE_SIZE if cached else 0, config.VERDICT_CACHE_TTL)
+    main._set_model(load_serving_model(model_path, config.MODEL_RUNTIME), model_path)
+
+    urls = load_urls(n_requests)
+    latencies = []
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            await main._warm_up(1)
+            if cached:
+                # Every measured request is a cache hit
+                for url in set(urls):
+                    await client.post('/analyze', json={'url': url})
+            for url in urls:
+                start = time.perf_counter()
+                response = await client.post('/analyze', json={'url': url})
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+    finally:
+        main.inference_executor.shutdown()
+    return latencies
+
+
+def _http_cases(model_path: str, repeat: int) -> Dict[str, Callable[[], Dict]]:
+    from api import config
+
+    def case(cached):
+        def run_case():
+            samples, p99s = [], []
+            for _ in range(repeat):
+                latencies = asyncio.run(_analyze_latencies(model_path, 200, cached))
+                samples.append(statistics.median(latencies))
+                p99s.append(float(np.percentile(latencies, 99)))
+            result = _summarize(
+                samples, 's/request', n_requests=200, cached=cached,
+                executor=config.INFERENCE_EXECUTOR, runtime=config.MODEL_RUNTIME
+            )
+            result['p99'] = statistics.median(p99s)
+            return result
+        return run_case
+
+    return {
+        'http.analyze[miss]': case(False),
+        'http.analyze[hit]': case(True),
+    }
+
+
+def _git_state() -> Dict[str, Optional[str]]:
+    def git(*args):
+        try:
+            return subprocess.run(
+                ['git', *args], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(status) if status is not None else None}
+
+
+def _environment() -> Dict:
+    import pandas
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pandas.__version__,
+        'scikit-learn': sklearn.__version__,
+    }
+
+
+def run(model_path: str, repeat: int = 5, patterns: Optional[List[str]] = None) -> Dict:
+    """Run every case matching ``patterns`` (all by default) and return the results document."""
+    from api.ml_model.model_store import artifact_version
+
+    warnings.filterwarnings('ignore', category=UserWarning)
+    logging.disable(logging.INFO)
+    cases = {
+        **_extraction_cases(repeat),
+        **_inference_cases(model_path, repeat),
+        **_http_cases(model_path, repeat),
+    }
+    selected = [
+        name for name in cases
+        if not patterns or any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+    ]
+
+    results = {}
+    for name in selected:
+        started = time.perf_counter()
+        results[name] = cases[name]()
+        print(f"{name:<45} {results[name]['median']:.3e} {results[name]['unit']} "
+              f"({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+
+    fixture_digest = hashlib.sha256('\n'.join(load_fixture_urls()).encode('utf-8')).hexdigest()[:12]
+    return {
+        'schema': SCHEMA_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'git': _git_state(),
+        'environment': _environment(),
+        'settings': {
+            'repeat': repeat,
+            'model_path': model_path,
+            'model_version': artifact_version(model_path),
+            'fixtures': fixture_digest,
+        },
+        'results': results,
+    }
+
+
+def compare(base: Dict, head: Dict, stat: str = 'median', threshold: float = 0.1) -> List[Dict]:
+    """
+    Compare two results documents case by case.
+
+    A case regressed when ``head`` is slower than ``base`` by more than
+    ``threshold`` (0.1 = 10%) on ``stat``, and improved when it is faster by
+    more than that.
+    """
+    rows = []
+    for name in sorted(set(base['results']) | set(head['results'])):
+        before = base['results'].get(name)
+        after = head['results'].get(name)
+        if before is None or after is None:
+            rows.append({'case': name, 'status': 'added' if before is None else 'removed'})
+            continue
+        ratio = after[stat] / before[stat] if before[stat] else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regressed'
+        elif ratio < 1 - threshold:
+            status = 'improved'
+        else:
+            status = 'unchanged'
+        rows.append({'case': name, 'status': status, 'base': before[stat], 'head': after[stat],
+                     'unit': after['unit'], 'ratio': ratio})
+    return rows
+
+
+def _print_comparison(rows: List[Dict], base: Dict, head: Dict):
+    def describe(doc):
+        commit = (doc['git'].get('commit') or 'unknown')[:10]
+        return f"{commit}{' (dirty)' if doc['git'].get('dirty') else ''}"
+    print(f"base {describe(base)} vs head {describe(head)}")
+    for key in ('environment', 'settings'):
+        for field in sorted(set(base[key]) | set(head[key])):
+            if field != 'repeat' and base[key].get(field) != head[key].get(field):
+                print(f"  note: {key}.{field} differs: {base[key].get(field)} -> {head[key].get(field)}")
+    for row in rows:
+        if 'ratio' not in row:
+            print(f"{row['case']:<45} {row['status']}")
+            continue
+        print(f"{row['case']:<45} {row['base']:.3e} -> {row['head']:.3e} {row['unit']:<10} "
+              f"x{row['ratio']:.2f} {row['status']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the suite and write JSON results')
+    run_parser.add_argument('--model', default='api/saved_models/stack_ensemble_model.joblib')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--cases', nargs='+', help="glob patterns of case names, e.g. 'inference.*'")
+    run_parser.add_argument('--output', '-o', help='file to write; defaults to stdout')
+
+    compare_parser = commands.add_parser('compare', help='compare two JSON result files')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('head')
+    compare_parser.add_argument('--stat', choices=STATS, default='median')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+    compare_parser.add_argument('--fail-on-regression', action='store_true',
+                                help='exit with status 1 when any case regressed')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        document = json.dumps(run(args.model, args.repeat, args.cases), indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(document + '\n')
+        else:
+            print(document)
+        return
+
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.head, encoding='utf-8') as f:
+        head = json.load(f)
+    rows = compare(base, head, args.stat, args.threshold)
+    _print_comparison(rows, base, head)
+    if args.fail_on_regression and any(row['status'] == 'regressed' for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
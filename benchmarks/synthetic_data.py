@@ -0,0 +1,75 @@
+"""
+Time the chunked synthetic dataset writer against the row-by-row generator.
+
+Runs ``SyntheticDataGenerator.generate_dataset`` on a small sample for the
+baseline rate, then streams corpora of increasing size to CSV with
+``write_dataset`` and reports rows/sec, bytes written and peak resident
+memory, which should stay flat as the row count grows.
+
+Usage:
+    python -m benchmarks.synthetic_data --sizes 1000000 10000000
+    python -m benchmarks.synthetic_data --sizes 100000000 --workers 8 --shards 8
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.common import ROOT_DIR  # noqa: F401  (puts the api package on sys.path)
+
+
+def _peak_rss_mib():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+def run(sizes=(1000000, 10000000), baseline_rows=20000, chunk_size=10000, workers=1, shards=1):
+    from api.data_collection.synthetic_data_generator import SyntheticDataGenerator, write_dataset
+
+    started = time.perf_counter()
+    SyntheticDataGenerator().generate_dataset(size=baseline_rows)
+    baseline = baseline_rows / (time.perf_counter() - started)
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix='synthetic-data-') as scratch:
+        for n in sizes:
+            output = os.path.join(scratch, f'{n}.csv')
+            started = time.perf_counter()
+            result = write_dataset(output, n, seed=42, chunk_size=chunk_size, shards=shards, workers=workers)
+            seconds = time.perf_counter() - started
+            rows.append({
+                'rows': result['rows'],
+                'seconds': seconds,
+                'rows_per_second': result['rows'] / seconds,
+                'speedup': result['rows'] / seconds / baseline,
+                'gib_written': sum(os.path.getsize(path) for path in result['files']) / 2 ** 30,
+                'peak_rss_mib': _peak_rss_mib(),
+            })
+            for path in result['files']:
+                os.remove(path)
+    return baseline, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000000, 10000000])
+    parser.add_argument('--baseline-rows', type=int, default=20000)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--shards', type=int, default=1)
+    args = parser.parse_args()
+
+    baseline, rows = run(args.sizes, args.baseline_rows, args.chunk_size, args.workers, args.shards)
+    print(f"generate_dataset: {baseline:.0f} rows/sec")
+    for row in rows:
+        print(
+            f"{row['rows']:>11} rows: {row['seconds']:7.1f}s, {row['rows_per_second']:8.0f} rows/sec "
+            f"(x{row['speedup']:.0f}), {row['gib_written']:.2f} GiB, peak RSS {row['peak_rss_mib']:.0f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,22 +11,14 @@ logger = logging.getLogger(__name__)
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 def main():
-    """Force rebuild the model by removing the old one and training a new one."""
+    """Force rebuild the model by training a new one and publishing it over the old one."""
     logger.info("Starting force model rebuild process...")
     
     # Path to the model file
     model_path = os.path.join('api', 'saved_models', 'stack_ensemble_model.joblib')
     
-    # Remove old model if it exists
-    if os.path.exists(model_path):
-        logger.info(f"Removing old model: {model_path}")
-        try:
-            os.remove(model_path)
-            logger.info("Old model removed successfully")
-        except Exception as e:
-            logger.error(f"Error removing old model: {str(e)}")
-    
-    # Ensure saved_models directory exists
+    # The old model stays in place until the new version atomically replaces
+    # it, so a running server keeps serving throughout the rebuild
     os.makedirs(os.path.join('api', 'saved_models'), exist_ok=True)
     
     try:
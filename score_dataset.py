@@ -0,0 +1,266 @@
+"""
+Score collected URL datasets offline across all CPU cores.
+
+Reads CSV files in chunks, extracts features and runs the ensemble on a
+process pool that loads the model once per worker, and writes every input
+column plus the verdict and probabilities to CSV or Parquet (needs pyarrow).
+Rows with an empty url get empty result columns. Input files may order
+their columns differently; every file is written in the first file's
+column order, leaving its missing columns empty and dropping extra ones.
+
+Usage:
+    python score_dataset.py data/twitter_urls_*.csv --output scored.csv
+    python score_dataset.py data/*.csv --output scored.parquet --workers 8 --runtime compiled
+    python score_dataset.py data/*.csv --output scored.csv --cascade
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api.scoring import RESULT_COLUMNS, load_serving_model, score_columns
+
+# Model held by each worker process
+_worker_model = None
+
+
+def _init_worker(model_path: str, runtime: str, cascade: Optional[Dict[str, Any]] = None):
+    """Load the model once per worker process."""
+    global _worker_model
+    _worker_model = load_serving_model(model_path, runtime, cascade)
+
+
+def _score_frame(chunk: pd.DataFrame, url_column: str, as_csv: bool):
+    """
+    Score the url column of ``chunk`` and append the result columns.
+
+    Rendering CSV is slower than scoring a row, so it happens here in the
+    worker rather than in the single parent process. Rows with an empty url
+    are not scored.
+    """
+    chunk = chunk.reset_index(drop=True)
+    urls = chunk[url_column].str.strip()
+    mask = (urls != '').to_numpy()
+    scored = score_columns(_worker_model, urls[mask].tolist()) if mask.any() else None
+    for name in RESULT_COLUMNS:
+        values = np.full(len(chunk), np.nan, dtype=np.float64)
+        if scored is not None:
+            values[mask] = scored[name]
+        if name == 'is_safe':
+            values = pd.array(np.where(mask, values == 1.0, None), dtype='boolean')
+        chunk[name] = values
+    return chunk.to_csv(index=False, header=False) if as_csv else chunk
+
+
+def _read_chunks(paths: List[str], chunk_size: int) -> Iterator[pd.DataFrame]:
+    for path in paths:
+        try:
+            # Read as text so carried-through columns such as tweet ids are written back unchanged
+            reader = pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+        except pd.errors.EmptyDataError:
+            logger.warning(f"Skipping empty file {path}")
+            continue
+        with reader:
+            yield from reader
+
+
+def _align_columns(chunk: pd.DataFrame, columns: List[str], warned: set) -> pd.DataFrame:
+    """
+    Reorder ``chunk`` to ``columns``, the first input's, so rows stay under their header.
+
+    Missing columns are left empty and extra ones dropped, with one warning
+    per distinct input layout.
+    """
+    if list(chunk.columns) == columns:
+        return chunk
+    layout = tuple(chunk.columns)
+    if layout not in warned:
+        warned.add(layout)
+        missing = [name for name in columns if name not in chunk.columns]
+        extra = [name for name in chunk.columns if name not in columns]
+        if missing or extra:
+            logger.warning(f"Input columns differ from the first file's: leaving {missing} empty, "
+                           f"dropping {extra}")
+    return chunk.reindex(columns=columns, fill_value='')
+
+
+class _ResultWriter:
+    """Append scored chunks to a CSV or Parquet file."""
+
+    def __init__(self, path: str, overwrite: bool = False):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self._parquet_writer = None
+        self._wrote_header = False
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        if os.path.exists(path):
+            if not overwrite:
+                raise FileExistsError(f"{path} already exists; choose a new output file or overwrite it")
+            os.remove(path)
+
+    def write(self, columns: List[str], result):
+        """Write one result of ``_score_frame``: CSV text or, for Parquet, a DataFrame."""
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._parquet_writer is None:
+                table = pa.Table.from_pandas(result, preserve_index=False)
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                # Later chunks follow the first chunk's schema, even when a column is all empty
+                table = pa.Table.from_pandas(result, schema=self._parquet_writer.schema, preserve_index=False)
+            self._parquet_writer.write_table(table)
+            return
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            if not self._wrote_header:
+                f.write(pd.DataFrame(columns=columns).to_csv(index=False))
+                self._wrote_header = True
+            f.write(result)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def _is_output(path: str, output: str) -> bool:
+    """Whether input ``path`` is the ``output`` file, which must never be read while it is written."""
+    if os.path.exists(path) and os.path.exists(output):
+        return os.path.samefile(path, output)
+    return os.path.abspath(path) == os.path.abspath(output)
+
+
+def score_files(paths: List[str], output: str, model_path: str, runtime: str = 'sklearn',
+                workers: int = 0, chunk_size: int = 10000, url_column: str = 'url',
+                cascade: Optional[Dict[str, Any]] = None, overwrite: bool = False) -> Dict[str, float]:
+    """
+    Score every row of the CSV files in ``paths`` and write them to ``output``.
+
+    An input that is ``output`` itself, e.g. matched by the same glob on a
+    rerun, is skipped, since reading it while appending to it never ends.
+
+    Parameters:
+    -----------
+    workers : int
+        Worker processes; 0 scores in this process
+    chunk_size : int
+        Rows read and scored per job. At most two chunks per worker are in
+        flight, so memory does not grow with the input size
+    cascade : Optional[Dict[str, Any]]
+        Cascade settings, see ``api.scoring.prepare_model``; None scores
+        every row with the full ensemble
+    overwrite : bool
+        Replace an existing ``output`` instead of raising ``FileExistsError``
+
+    Returns:
+    --------
+    Dict[str, float]
+        Row count, elapsed seconds and rows per second
+    """
+    skipped = [path for path in paths if _is_output(path, output)]
+    if skipped:
+        logger.warning(f"Not reading {skipped[0]}: it is the output file")
+        paths = [path for path in paths if path not in skipped]
+    writer = _ResultWriter(output, overwrite)
+    pool = None
+    if workers > 0:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path, runtime, cascade))
+    else:
+        _init_worker(model_path, runtime, cascade)
+
+    started = time.perf_counter()
+    rows = 0
+    in_flight = deque()
+    input_columns = None
+    warned = set()
+
+    def write_oldest():
+        columns, job = in_flight.popleft()
+        writer.write(columns, job.result() if pool is not None else job)
+
+    try:
+        for chunk in _read_chunks(paths, chunk_size):
+            if url_column not in chunk.columns:
+                raise SystemExit(f"Input has no {url_column!r} column: {list(chunk.columns)}")
+            # Files may order their columns differently; the output has one header
+            if input_columns is None:
+                input_columns = list(chunk.columns)
+            chunk = _align_columns(chunk, input_columns, warned)
+            columns = input_columns + list(RESULT_COLUMNS)
+            if pool is not None:
+                job = pool.submit(_score_frame, chunk, url_column, not writer.parquet)
+            else:
+                job = _score_frame(chunk, url_column, not writer.parquet)
+            in_flight.append((columns, job))
+            rows += len(chunk)
+            # Keep every worker busy without reading the whole input ahead
+            while len(in_flight) > max(1, 2 * workers):
+                write_oldest()
+        while in_flight:
+            write_oldest()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        writer.close()
+
+    seconds = time.perf_counter() - started
+    return {'rows': rows, 'seconds': seconds, 'rows_per_second': rows / seconds if seconds else 0.0}
+
+
+def main(argv: Optional[List[str]] = None):
+    from api import config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help='CSV files or glob patterns')
+    parser.add_argument('--output', '-o', required=True, help='.csv or .parquet file to write')
+    parser.add_argument('--model', default=config.MODEL_PATH)
+    parser.add_argument('--runtime', choices=['sklearn', 'compiled'], default=config.MODEL_RUNTIME)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: one per core); 0 scores in this process')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--url-column', default='url')
+    parser.add_argument('--cascade', action='store_true', default=config.CASCADE_ENABLED,
+                        help='decide confident rows with rules or the linear model before the full ensemble, '
+                             'with the CASCADE_* thresholds')
+    parser.add_argument('--overwrite', action='store_true', help='replace the output file if it exists')
+    args = parser.parse_args(argv)
+
+    paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)
+                    if not _is_output(path, args.output)})
+    if not paths:
+        parser.error(f"No input files match {args.inputs} apart from the output file")
+    if os.path.exists(args.output) and not args.overwrite:
+        parser.error(f"{args.output} already exists; choose a new output file or pass --overwrite")
+
+    logger.info(f"Scoring {len(paths)} file(s) with {args.workers} worker(s) into {args.output}")
+    cascade = {
+        'rule_precision': config.CASCADE_RULE_PRECISION,
+        'linear_confidence': config.CASCADE_LINEAR_CONFIDENCE,
+    } if args.cascade else None
+    stats = score_files(paths, args.output, args.model, args.runtime, args.workers,
+                        args.chunk_size, args.url_column, cascade, overwrite=args.overwrite)
+    logger.info(f"Scored {stats['rows']} rows in {stats['seconds']:.1f} seconds "
+                f"({stats['rows_per_second']:.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
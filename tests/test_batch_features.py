@@ -0,0 +1,21 @@
+"""Batch feature engine parity with the scalar extractor, also checked by ``benchmarks.feature_extraction``."""
+
+import pytest
+
+from benchmarks.common import load_fixture_urls
+from benchmarks.feature_extraction import EDGE_CASE_URLS, check_parity
+
+
+def test_fixture_urls_match_scalar_features():
+    check_parity(load_fixture_urls())
+
+
+@pytest.mark.parametrize('url', EDGE_CASE_URLS)
+def test_edge_case_url_matches_scalar_features(url):
+    check_parity([url])
+
+
+def test_mixed_batch_matches_scalar_features():
+    # Edge cases between ordinary URLs, so no row depends on being alone in its batch
+    urls = load_fixture_urls()
+    check_parity(urls[:500] + EDGE_CASE_URLS + urls[500:1000])
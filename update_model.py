@@ -0,0 +1,167 @@
+"""
+Update the published model with newly labeled URLs without a full retrain.
+
+Reads CSV files of labeled URLs (for example a phishing campaign analysts
+just labeled), holds part of them out for evaluation, updates the current
+artifact with ``StackEnsembleModel.update`` and publishes the result as a
+new version. Accuracy before and after the update is reported on the
+held-out new rows and on the original test rows, and with
+``--full-retrain`` also for a model retrained from scratch on the original
+training data plus the new rows, so the two paths can be compared.
+
+Usage:
+    python update_model.py data/campaign_*.csv
+    python update_model.py labeled.csv --label-column label --full-retrain --dry-run
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sklearn.model_selection import train_test_split
+
+from api.ml_model.batch_features import extract_features_batch
+from api.ml_model.feature_extraction import get_feature_names
+from api.ml_model.model_store import publish_model
+from api.ml_model.stack_ensemble import StackEnsembleModel
+from api.ml_model.train_model import TRAINING_WORKERS, build_base_models, training_split
+
+# Label values read as malicious; anything else is safe
+_MALICIOUS_LABELS = {'1', '1.0', 'true', 'yes', 'malicious', 'phishing'}
+
+
+def read_labeled_urls(paths: List[str], url_column: str = 'url',
+                      label_column: str = 'potentially_malicious') -> Tuple[List[str], np.ndarray]:
+    """
+    Read URLs and their labels (1 for malicious) from CSV files.
+
+    Rows without a URL are skipped; a URL labeled more than once keeps its
+    last label.
+    """
+    frames = []
+    for path in paths:
+        frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+        missing = {url_column, label_column} - set(frame.columns)
+        if missing:
+            raise ValueError(f"{path} has no {sorted(missing)} column(s): {list(frame.columns)}")
+        frames.append(frame[[url_column, label_column]])
+    if not frames:
+        return [], np.zeros(0, dtype=int)
+    labeled = pd.concat(frames, ignore_index=True)
+    labeled[url_column] = labeled[url_column].str.strip()
+    labeled = labeled[labeled[url_column] != ''].drop_duplicates(url_column, keep='last')
+    labels = labeled[label_column].str.strip().str.lower().isin(_MALICIOUS_LABELS).astype(int)
+    return labeled[url_column].tolist(), labels.to_numpy()
+
+
+def _accuracy(model, eval_sets: Dict[str, Tuple[pd.DataFrame, np.ndarray]]) -> Dict[str, float]:
+    return {name: float(model.score(X, y)['accuracy']) for name, (X, y) in eval_sets.items() if len(y)}
+
+
+def update_from_labels(model_path: str, urls: List[str], labels: np.ndarray, extra_estimators: int = 20,
+                       new_weight: float = 1.0, eval_fraction: float = 0.2, full_retrain: bool = False,
+                       publish: bool = True, n_jobs: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Update the model at ``model_path`` with labeled URLs and publish it as a new version.
+
+    Parameters:
+    -----------
+    eval_fraction : float
+        Share of the new rows held out to measure accuracy on the new data
+    full_retrain : bool
+        Also retrain from scratch on the original training rows plus the new
+        ones and report its accuracy and time next to the update's
+    publish : bool
+        Publish the updated model; False only reports
+
+    Returns:
+    --------
+    Dict[str, Any]
+        Accuracy per evaluation set before and after the update (and of the
+        full retrain), seconds taken, and the published version path
+    """
+    model = StackEnsembleModel.load_model(model_path, strict=True)
+    X = pd.DataFrame(extract_features_batch(urls), columns=get_feature_names())
+    stratify = labels if np.bincount(labels, minlength=2).min() >= 2 else None
+    X_new, X_eval, y_new, y_eval = train_test_split(
+        X, labels, test_size=eval_fraction, random_state=42, stratify=stratify
+    )
+    X_train, X_test, y_train, y_test = training_split()
+    eval_sets = {'new': (X_eval, y_eval), 'original': (X_test, y_test)}
+
+    report = {'rows': len(labels), 'update_rows': len(y_new), 'eval_rows': len(y_eval)}
+    report['before'] = _accuracy(model, eval_sets)
+    model.update(X_new, y_new, extra_estimators=extra_estimators, new_weight=new_weight, n_jobs=n_jobs)
+    report['update_seconds'] = model.update_history_[-1]['seconds']
+    report['after'] = _accuracy(model, eval_sets)
+
+    if full_retrain:
+        started = time.perf_counter()
+        retrained = StackEnsembleModel(base_models=build_base_models())
+        retrained.fit(pd.concat([X_train, X_new[X_train.columns]], ignore_index=True),
+                      np.concatenate([y_train, y_new]), n_jobs=n_jobs)
+        report['full_retrain_seconds'] = time.perf_counter() - started
+        report['full_retrain'] = _accuracy(retrained, eval_sets)
+
+    model.update_history_[-1]['evaluation'] = {
+        key: report[key] for key in ('before', 'after', 'full_retrain') if key in report
+    }
+    report['version_path'] = publish_model(model, model_path) if publish else None
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    from api import config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help='CSV files or glob patterns')
+    parser.add_argument('--model', default=config.MODEL_PATH)
+    parser.add_argument('--url-column', default='url')
+    parser.add_argument('--label-column', default='potentially_malicious')
+    parser.add_argument('--extra-estimators', type=int, default=20,
+                        help='trees or boosting stages added to each tree ensemble')
+    parser.add_argument('--new-weight', type=float, default=1.0,
+                        help='sample weight of the new rows relative to replayed training rows')
+    parser.add_argument('--eval-fraction', type=float, default=0.2)
+    parser.add_argument('--full-retrain', action='store_true',
+                        help='also retrain from scratch and compare accuracy and time')
+    parser.add_argument('--dry-run', action='store_true', help='report without publishing')
+    parser.add_argument('--workers', type=int, default=TRAINING_WORKERS)
+    args = parser.parse_args(argv)
+
+    paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    if not paths:
+        parser.error(f"No input files match {args.inputs}")
+    urls, labels = read_labeled_urls(paths, args.url_column, args.label_column)
+    logger.info(f"Read {len(urls)} labeled URLs ({int(labels.sum())} malicious) from {len(paths)} file(s)")
+
+    report = update_from_labels(args.model, urls, labels, args.extra_estimators, args.new_weight,
+                                args.eval_fraction, args.full_retrain, not args.dry_run, args.workers)
+    logger.info(f"Updated in {report['update_seconds']:.2f}s")
+    if 'full_retrain_seconds' in report:
+        logger.info(f"Full retrain took {report['full_retrain_seconds']:.2f}s")
+    for name in report['before']:
+        line = f"Accuracy on {name} rows: {report['before'][name]:.4f} before, {report['after'][name]:.4f} updated"
+        if 'full_retrain' in report:
+            line += f", {report['full_retrain'][name]:.4f} fully retrained"
+        logger.info(line)
+    if report['version_path']:
+        logger.info(f"Published {report['version_path']} as {args.model}")
+
+
+if __name__ == "__main__":
+    main()